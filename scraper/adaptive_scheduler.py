@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Adaptive concurrency and retry scheduler for the async scrapers
+(qguide/downloader.py, parallel_course_scraper.py and
+parallel_scraper_with_reuse.py).
+Grows the number of in-flight requests while the server keeps up and backs
+off multiplicatively when it starts throttling (429s, 5xx, timeouts).
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class RetryableError(Exception):
+    """Raised by a scheduled job to request another attempt.
+
+    Set throttled=True when the failure means the server is overloaded
+    (rate limiting, 5xx, timeouts) so the scheduler also lowers concurrency.
+    """
+
+    def __init__(self, message: str, throttled: bool = False):
+        super().__init__(message)
+        self.throttled = throttled
+
+
+class AdaptiveScheduler:
+    def __init__(self,
+                 max_concurrent: int = 50,
+                 min_concurrent: int = 2,
+                 initial_concurrent: Optional[int] = None,
+                 max_retries: int = 3,
+                 retry_delay: float = 1.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrent: Upper bound on in-flight jobs
+            min_concurrent: Lower bound the limit never drops below
+            initial_concurrent: Starting limit (default: half of max_concurrent)
+            max_retries: Maximum retries per job
+            retry_delay: Base delay between retries (exponential backoff)
+        """
+        self.max_concurrent = max_concurrent
+        self.min_concurrent = max(1, min(min_concurrent, max_concurrent))
+        if initial_concurrent is None:
+            initial_concurrent = max(self.min_concurrent, max_concurrent // 2)
+        self.limit = max(self.min_concurrent, min(initial_concurrent, max_concurrent))
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+        self._successes_since_change = 0
+
+        # Metrics
+        self.latencies: List[float] = []
+        self.retries = 0
+        self.throttle_events = 0
+        self.failures = 0
+        self.peak_limit = self.limit
+        self.started_at: Optional[float] = None
+
+    async def _acquire(self):
+        async with self._condition:
+            while self._in_flight >= self.limit:
+                await self._condition.wait()
+            self._in_flight += 1
+
+    async def _release(self):
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _on_success(self):
+        # Additive increase: one extra slot per `limit` consecutive successes
+        self._successes_since_change += 1
+        if self._successes_since_change >= self.limit and self.limit < self.max_concurrent:
+            self.limit += 1
+            self.peak_limit = max(self.peak_limit, self.limit)
+            self._successes_since_change = 0
+
+    def _on_throttle(self):
+        # Multiplicative decrease
+        self.throttle_events += 1
+        self.limit = max(self.min_concurrent, self.limit // 2)
+        self._successes_since_change = 0
+
+    async def run(self, job: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Run a job under the concurrency limit, retrying RetryableError with
+        exponential backoff. Any other exception propagates immediately.
+
+        Returns:
+            The job's result
+
+        Raises:
+            RetryableError: if the job still fails after max_retries retries
+        """
+        if self.started_at is None:
+            self.started_at = time.time()
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire()
+            start = time.perf_counter()
+            try:
+                result = await job(*args, **kwargs)
+            except RetryableError as e:
+                if e.throttled:
+                    self._on_throttle()
+                if attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+            else:
+                self.latencies.append(time.perf_counter() - start)
+                self._on_success()
+                return result
+            finally:
+                await self._release()
+
+            # Back off outside the slot so other jobs can proceed
+            await asyncio.sleep(self.retry_delay * (2 ** attempt))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return throughput and latency metrics for the jobs run so far."""
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            'completed': len(latencies),
+            'failed': self.failures,
+            'retries': self.retries,
+            'throttle_events': self.throttle_events,
+            'elapsed_time': elapsed,
+            'jobs_per_second': len(latencies) / elapsed if elapsed > 0 else 0,
+            'latency_mean': sum(latencies) / len(latencies) if latencies else 0,
+            'latency_p50': percentile(0.50),
+            'latency_p95': percentile(0.95),
+            'latency_max': latencies[-1] if latencies else 0,
+            'final_concurrency': self.limit,
+            'peak_concurrency': self.peak_limit,
+        }
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""Versioned deltas between successive master_courses.json outputs.
+
+A version is the short sha256 of the minified catalog (the same hash publish.py
+puts in the published file name). The merge stage keeps the last few versions
+in results/versions/ and writes one delta from each of them to the newest
+version into results/deltas/, plus a manifest. A client holding an older
+version downloads only that delta and applies it with the same rules as
+apply_delta.
+
+A delta is keyed by course_id and, within a course, by section id:
+
+    removed   course_ids no longer offered
+    changed   course_id -> {"set": {field: value}, "sections": {...}}
+              or {"replace": entry} when the entry's field order changed
+    added     [index in the new catalog, entry] pairs, ascending
+    order     the full course_id order, only when surviving courses moved
+
+A course's "sections" patch has "removed" section ids, "set" (new or restructured
+sections), "patch" (section id -> changed fields) and, only when it changed,
+the section "order". apply_delta(old, delta) minified is byte-identical to the
+new catalog; every delta is checked before it is written.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DELTA_FORMAT = 'crimsoncal-delta'
+DELTA_VERSION = 1
+
+DEFAULT_HISTORY_DIR = 'results/versions'
+DEFAULT_DELTA_DIR = 'results/deltas'
+DELTA_MANIFEST_FILE = 'manifest.json'
+HISTORY_FILE = 'history.json'
+DEFAULT_KEEP = 5
+
+
+def minified(data) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _same_key_order(old, new) -> bool:
+    """Whether two equal values list their dict keys in the same order, at every level."""
+    if type(old) is dict:
+        return list(old) == list(new) and all(_same_key_order(value, new[key]) for key, value in old.items())
+    if type(old) is list:
+        return all(map(_same_key_order, old, new))
+    return True
+
+
+def _same(old, new) -> bool:
+    """Equal and serialized alike: == ignores dict key order, the published bytes do not."""
+    return old == new and _same_key_order(old, new)
+
+
+def version_of(body: bytes) -> str:
+    """Version id of a minified catalog: its short content hash."""
+    return hashlib.sha256(body).hexdigest()[:10]
+
+
+def _section_ids(course: Dict) -> Optional[List[str]]:
+    """Section ids of a course, or None if they cannot key its sections (missing or repeated)."""
+    ids = [section.get('section') for section in course.get('current_sections', [])]
+    if None in ids or len(set(ids)) != len(ids):
+        return None
+    return ids
+
+
+def diff_sections(old: Dict, new: Dict) -> Optional[Dict]:
+    """Section patch from old to new (None if nothing changed); raises ValueError if unkeyable."""
+    old_ids = _section_ids(old)
+    new_ids = _section_ids(new)
+    if old_ids is None or new_ids is None:
+        raise ValueError('sections cannot be keyed by section id')
+    old_sections = dict(zip(old_ids, old.get('current_sections', [])))
+    new_sections = dict(zip(new_ids, new.get('current_sections', [])))
+
+    patch = {}
+    removed = [sid for sid in old_ids if sid not in new_sections]
+    if removed:
+        patch['removed'] = removed
+    replaced = {}
+    changed = {}
+    for sid in new_ids:
+        section = new_sections[sid]
+        previous = old_sections.get(sid)
+        if previous is None or list(previous) != list(section):
+            replaced[sid] = section
+        elif not _same(previous, section):
+            changed[sid] = {field: value for field, value in section.items() if not _same(previous[field], value)}
+    if replaced:
+        patch['set'] = replaced
+    if changed:
+        patch['patch'] = changed
+
+    default_order = [sid for sid in old_ids if sid in new_sections]
+    default_order += [sid for sid in replaced if sid not in old_sections]
+    if default_order != new_ids:
+        patch['order'] = new_ids
+    return patch or None
+
+
+def diff_course(old: Dict, new: Dict) -> Optional[Dict]:
+    """Patch turning one course entry into another, or None if they are equal."""
+    if _same(old, new):
+        return None
+    if list(old) != list(new):
+        return {'replace': new}
+    patch = {}
+    changed = {
+        field: value for field, value in new.items()
+        if field != 'current_sections' and not _same(old[field], value)
+    }
+    if changed:
+        patch['set'] = changed
+    if 'current_sections' in new and not _same(old['current_sections'], new['current_sections']):
+        try:
+            sections = diff_sections(old, new)
+        except ValueError:
+            return {'replace': new}
+        if sections:
+            patch['sections'] = sections
+    return patch
+
+
+def compute_delta(old_courses: List[Dict], new_courses: List[Dict], old_version: str, new_version: str) -> Dict[str, Any]:
+    old_by_id = {course['course_id']: course for course in old_courses}
+    new_by_id = {course['course_id']: course for course in new_courses}
+    if len(old_by_id) != len(old_courses) or len(new_by_id) != len(new_courses):
+        raise ValueError('course_ids are not unique')
+
+    removed = [course_id for course_id in old_by_id if course_id not in new_by_id]
+    changed = {}
+    for course_id, course in new_by_id.items():
+        if course_id in old_by_id:
+            patch = diff_course(old_by_id[course_id], course)
+            if patch is not None:
+                changed[course_id] = patch
+
+    delta = {
+        'format': DELTA_FORMAT,
+        'version': DELTA_VERSION,
+        'from': old_version,
+        'to': new_version,
+        'removed': removed,
+        'changed': changed,
+    }
+
+    survivors_old = [course['course_id'] for course in old_courses if course['course_id'] in new_by_id]
+    survivors_new = [course['course_id'] for course in new_courses if course['course_id'] in old_by_id]
+    if survivors_old == survivors_new:
+        delta['added'] = [
+            [index, course] for index, course in enumerate(new_courses) if course['course_id'] not in old_by_id
+        ]
+    else:
+        delta['added'] = [[None, course] for course in new_courses if course['course_id'] not in old_by_id]
+        delta['order'] = [course['course_id'] for course in new_courses]
+    return delta
+
+
+def apply_sections(course: Dict, patch: Dict) -> List[Dict]:
+    old_sections = course.get('current_sections', [])
+    sections = {section['section']: section for section in old_sections}
+    for sid in patch.get('removed', []):
+        del sections[sid]
+    for sid, section in patch.get('set', {}).items():
+        sections[sid] = section
+    for sid, fields in patch.get('patch', {}).items():
+        sections[sid] = {**sections[sid], **fields}
+
+    if 'order' in patch:
+        order = patch['order']
+    else:
+        old_ids = [section['section'] for section in old_sections]
+        order = [sid for sid in old_ids if sid in sections]
+        order += [sid for sid in patch.get('set', {}) if sid not in old_ids]
+    return [sections[sid] for sid in order]
+
+
+def apply_course(course: Dict, patch: Dict) -> Dict:
+    if 'replace' in patch:
+        return patch['replace']
+    updated = dict(course)
+    updated.update(patch.get('set', {}))
+    if 'sections' in patch:
+        updated['current_sections'] = apply_sections(course, patch['sections'])
+    return updated
+
+
+def apply_delta(courses: List[Dict], delta: Dict[str, Any]) -> List[Dict]:
+    """Reference client: apply a delta to the catalog it was computed from. The input is not modified."""
+    if delta.get('format') != DELTA_FORMAT or delta.get('version') != DELTA_VERSION:
+        raise ValueError(f"Unsupported delta: {delta.get('format')} v{delta.get('version')}")
+    removed = set(delta['removed'])
+    changed = delta['changed']
+    result = [
+        apply_course(course, changed[course['course_id']]) if course['course_id'] in changed else course
+        for course in courses if course['course_id'] not in removed
+    ]
+
+    if 'order' in delta:
+        by_id = {course['course_id']: course for course in result}
+        by_id.update((course['course_id'], course) for _, course in delta['added'])
+        return [by_id[course_id] for course_id in delta['order']]
+    for index, course in delta['added']:
+        result.insert(index, course)
+    return result
+
+
+def verify_delta(old_body: bytes, delta_body: bytes, new_body: bytes) -> bool:
+    """Whether applying the serialized delta to the old catalog reproduces the new one byte for byte."""
+    result = apply_delta(json.loads(old_body), json.loads(delta_body))
+    return minified(result) == new_body
+
+
+def _read_json(path: str, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_bytes(path: str, body: bytes):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def record_version(courses: List[Dict], keep: int = DEFAULT_KEEP, seed: Optional[List[Dict]] = None,
+                   history_dir: str = DEFAULT_HISTORY_DIR, delta_dir: str = DEFAULT_DELTA_DIR) -> Dict[str, Any]:
+    """
+    Add the catalog to the version history and write deltas from up to `keep` previous versions to it.
+
+    seed is the catalog clients currently have (the published master_courses.json);
+    it is added to the history first if it is not there, so there is always a
+    delta from it even when results/ starts empty.
+
+    Returns:
+        The delta manifest
+    """
+    os.makedirs(history_dir, exist_ok=True)
+    os.makedirs(delta_dir, exist_ok=True)
+    body = minified(courses)
+    version = version_of(body)
+
+    history = [v for v in _read_json(os.path.join(history_dir, HISTORY_FILE), [])
+               if os.path.exists(os.path.join(history_dir, f"{v}.json"))]
+
+    if seed:
+        seed_body = minified(seed)
+        seed_version = version_of(seed_body)
+        if seed_version != version and seed_version not in history:
+            _write_bytes(os.path.join(history_dir, f"{seed_version}.json"), seed_body)
+            history.append(seed_version)
+
+    if version in history:
+        history.remove(version)
+    else:
+        _write_bytes(os.path.join(history_dir, f"{version}.json"), body)
+    history.append(version)
+
+    for old_version in history[:-(keep + 1)]:
+        os.remove(os.path.join(history_dir, f"{old_version}.json"))
+    history = history[-(keep + 1):]
+    _write_bytes(os.path.join(history_dir, HISTORY_FILE), json.dumps(history).encode('utf-8'))
+
+    deltas = {}
+    for old_version in history[:-1]:
+        name = f"{old_version}.{version}.json"
+        path = os.path.join(delta_dir, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                delta_body = f.read()
+        else:
+            with open(os.path.join(history_dir, f"{old_version}.json"), 'rb') as f:
+                old_body = f.read()
+            delta = compute_delta(json.loads(old_body), courses, old_version, version)
+            delta_body = minified(delta)
+            if not verify_delta(old_body, delta_body, body):
+                print(f"Warning: delta {old_version} -> {version} does not reproduce the catalog, not writing it")
+                continue
+            _write_bytes(path, delta_body)
+        deltas[old_version] = {'path': name, 'bytes': len(delta_body)}
+
+    for name in os.listdir(delta_dir):
+        if name != DELTA_MANIFEST_FILE and name not in {entry['path'] for entry in deltas.values()}:
+            os.remove(os.path.join(delta_dir, name))
+
+    manifest = {
+        'format': DELTA_FORMAT,
+        'version': DELTA_VERSION,
+        'latest': version,
+        'sha256': hashlib.sha256(body).hexdigest(),
+        'bytes': len(body),
+        'generated': datetime.now().isoformat(),
+        'deltas': deltas,
+    }
+    # 'generated' only changes when the delta set does, so unchanged runs keep the same manifest bytes
+    previous = _read_json(os.path.join(delta_dir, DELTA_MANIFEST_FILE))
+    if previous and {k: v for k, v in previous.items() if k != 'generated'} == \
+            {k: v for k, v in manifest.items() if k != 'generated'}:
+        manifest = previous
+    _write_bytes(os.path.join(delta_dir, DELTA_MANIFEST_FILE), json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute, apply or verify catalog deltas')
+    parser.add_argument('old', help='Old master_courses.json')
+    parser.add_argument('new', help='New master_courses.json')
+    parser.add_argument('--output', help='Write the delta here')
+    parser.add_argument('--verify', action='store_true', help='Check that applying the delta gives the new catalog byte for byte')
+    args = parser.parse_args()
+
+    old_body = minified(_read_json(args.old))
+    new_body = minified(_read_json(args.new))
+    delta = compute_delta(json.loads(old_body), json.loads(new_body), version_of(old_body), version_of(new_body))
+    delta_body = minified(delta)
+
+    print(f"{delta['from']} -> {delta['to']}: {len(delta['removed'])} removed, {len(delta['added'])} added, "
+          f"{len(delta['changed'])} changed courses")
+    print(f"Delta {len(delta_body) / 1e3:.1f} KB vs full catalog {len(new_body) / 1e6:.2f} MB")
+    if args.output:
+        _write_bytes(args.output, delta_body)
+    if args.verify:
+        ok = verify_delta(old_body, delta_body, new_body)
+        print(f"Apply: {'byte-identical' if ok else 'MISMATCH'}")
+        if not ok:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Columnar encoding of master_courses.json.
+
+Courses, their current sections, their historical semesters and those
+semesters' individual sections are each stored as one table: every field is a
+column array instead of a key repeated on every object, string columns with
+few distinct values are dictionary-encoded (a string table plus integer
+codes), and the seven lecture_<day> booleans of a section become one weekday
+bitmask. decode_catalog is the reference decoder; decode_catalog(encode_catalog(x)) == x.
+"""
+
+import argparse
+import gzip
+import json
+from typing import Any, Dict, List
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COLUMNAR_FORMAT = 'crimsoncal-columnar'
+COLUMNAR_VERSION = 1
+
+DAYS = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+
+# Nested fields stored as child tables: field -> (container type, the child table's own nested fields)
+CATALOG_CHILDREN = {
+    'current_sections': ('list', {}),
+    'historical_semesters': ('dict', {
+        'individual_sections': ('list', {}),
+    }),
+}
+
+# Key column of child tables built from dicts (e.g. the semester name of historical_semesters)
+DICT_KEY_FIELD = '_key'
+
+
+def encode_column(values: List[Any]) -> Dict[str, Any]:
+    """Dictionary-encode a column of strings that repeat; keep anything else as a plain array."""
+    if values and all(type(v) is str for v in values):
+        table = {}
+        codes = [table.setdefault(v, len(table)) for v in values]
+        if len(table) <= len(values) // 2:
+            return {'dict': list(table), 'codes': codes}
+    return {'values': values}
+
+
+def decode_column(column: Dict[str, Any]) -> List[Any]:
+    if 'dict' in column:
+        table = column['dict']
+        return [table[code] for code in column['codes']]
+    return column['values']
+
+
+def encode_table(rows: List[Dict], children: Dict = None) -> Dict[str, Any]:
+    """
+    Encode a list of dicts as columns.
+
+    Each distinct key sequence is a "shape"; rows store a shape code and each
+    column only holds values for the rows that have that field, so missing keys
+    and key order both survive the round trip.
+    """
+    children = children or {}
+    shapes = {}
+    shape_codes = []
+    columns = {}
+    child_rows = {field: [] for field in children}
+    child_counts = {field: [] for field in children}
+
+    for row in rows:
+        shape_codes.append(shapes.setdefault(tuple(row), len(shapes)))
+        for field, value in row.items():
+            if field in children:
+                kind = children[field][0]
+                if kind == 'dict':
+                    items = [{DICT_KEY_FIELD: key, **child} for key, child in value.items()]
+                else:
+                    items = value
+                child_rows[field].extend(items)
+                child_counts[field].append(len(items))
+            else:
+                columns.setdefault(field, []).append(value)
+
+    return {
+        'rows': len(rows),
+        'shapes': [list(shape) for shape in shapes],
+        'shape': encode_column(shape_codes) if len(shapes) > 1 else {'values': [0]},
+        'columns': {field: encode_column(values) for field, values in columns.items()},
+        'children': {
+            field: {
+                'counts': encode_column(child_counts[field]),
+                'table': encode_table(child_rows[field], children[field][1]),
+            }
+            for field in children if child_counts[field]
+        },
+    }
+
+
+def decode_table(table: Dict[str, Any], children: Dict = None) -> List[Dict]:
+    """Inverse of encode_table."""
+    children = children or {}
+    shapes = table['shapes']
+    shape_codes = decode_column(table['shape'])
+    if len(shape_codes) != table['rows']:
+        shape_codes = shape_codes * table['rows']
+    columns = {field: iter(decode_column(column)) for field, column in table['columns'].items()}
+
+    child_iters = {}
+    for field, child in table['children'].items():
+        counts = iter(decode_column(child['counts']))
+        child_iters[field] = (counts, iter(decode_table(child['table'], children[field][1])))
+
+    rows = []
+    for code in shape_codes:
+        row = {}
+        for field in shapes[code]:
+            if field in children:
+                counts, items = child_iters[field]
+                values = [next(items) for _ in range(next(counts))]
+                if children[field][0] == 'dict':
+                    row[field] = {item.pop(DICT_KEY_FIELD): item for item in values}
+                else:
+                    row[field] = values
+            else:
+                row[field] = next(columns[field])
+        rows.append(row)
+    return rows
+
+
+def pack_weekdays(section: Dict) -> Dict:
+    """Replace the lecture_<day> booleans with a bitmask (bit i = DAYS[i]) and a mask of which were present."""
+    packed = {}
+    days = 0
+    present = 0
+    for field, value in section.items():
+        if field.startswith('lecture_') and field[8:] in DAYS:
+            bit = 1 << DAYS.index(field[8:])
+            present |= bit
+            if value:
+                days |= bit
+        else:
+            packed[field] = value
+    if present:
+        packed['lecture_days'] = days
+        if present != (1 << len(DAYS)) - 1:
+            packed['lecture_days_present'] = present
+    return packed
+
+
+def unpack_weekdays(section: Dict) -> Dict:
+    """Inverse of pack_weekdays; the lecture_<day> fields go back at the end, in DAYS order."""
+    days = section.pop('lecture_days', None)
+    present = section.pop('lecture_days_present', (1 << len(DAYS)) - 1)
+    if days is not None:
+        for i, day in enumerate(DAYS):
+            if present & (1 << i):
+                section[f'lecture_{day}'] = bool(days & (1 << i))
+    return section
+
+
+def encode_catalog(courses: List[Dict]) -> Dict[str, Any]:
+    """Encode merged course entries (the master_courses.json list)."""
+    rows = []
+    for course in courses:
+        if 'current_sections' in course:
+            course = {**course, 'current_sections': [pack_weekdays(s) for s in course['current_sections']]}
+        rows.append(course)
+    return {
+        'format': COLUMNAR_FORMAT,
+        'version': COLUMNAR_VERSION,
+        'days': DAYS,
+        'courses': encode_table(rows, CATALOG_CHILDREN),
+    }
+
+
+def decode_catalog(encoded: Dict[str, Any]) -> List[Dict]:
+    """Reference decoder: rebuild the master_courses.json list from encode_catalog output."""
+    if encoded.get('format') != COLUMNAR_FORMAT or encoded.get('version') != COLUMNAR_VERSION:
+        raise ValueError(f"Unsupported catalog encoding: {encoded.get('format')} v{encoded.get('version')}")
+    courses = decode_table(encoded['courses'], CATALOG_CHILDREN)
+    for course in courses:
+        for section in course.get('current_sections', []):
+            unpack_weekdays(section)
+    return courses
+
+
+def minified(data) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def verify_round_trip(courses: List[Dict], encoded: Dict[str, Any] = None) -> bool:
+    """Check that decoding the (serialized) encoding gives back exactly the same JSON."""
+    encoded = encoded if encoded is not None else encode_catalog(courses)
+    decoded = decode_catalog(json.loads(minified(encoded)))
+    return minified(decoded) == minified(courses)
+
+
+def size_report(courses: List[Dict], encoded: Dict[str, Any], with_brotli: bool = True) -> List[Dict[str, Any]]:
+    """Raw, gzip and brotli sizes of the pretty, minified and columnar forms.
+
+    Brotli at quality 11 takes about a minute per variant on a full catalog;
+    pass with_brotli=False to skip it.
+    """
+    variants = [
+        ('pretty JSON (indent=2)', json.dumps(courses, indent=2, ensure_ascii=False).encode('utf-8')),
+        ('minified JSON', minified(courses)),
+        ('columnar JSON', minified(encoded)),
+    ]
+    report = []
+    for name, body in variants:
+        row = {'name': name, 'raw': len(body), 'gzip': len(gzip.compress(body, compresslevel=9))}
+        if with_brotli and brotli is not None:
+            row['brotli'] = len(brotli.compress(body, quality=11))
+        report.append(row)
+    return report
+
+
+def print_size_report(report: List[Dict[str, Any]]):
+    baseline = report[0]
+    codecs = [codec for codec in ('raw', 'gzip', 'brotli') if codec in baseline]
+    print(f"{'':<24}" + ''.join(f"{codec:>20}" for codec in codecs))
+    for row in report:
+        cells = ''.join(
+            f"{row[codec] / 1e6:>10.2f} MB ({row[codec] / baseline[codec]:>4.0%})" for codec in codecs
+        )
+        print(f"{row['name']:<24}{cells}")
+    if brotli is None:
+        print("(install brotli for brotli sizes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Encode master_courses.json in the columnar format')
+    parser.add_argument('--input', default='results/master_courses.json', help='Merged course list')
+    parser.add_argument('--output', default='results/master_courses.columnar.json', help='Columnar output file')
+    parser.add_argument('--verify', action='store_true', help='Check that the encoding round-trips exactly')
+    parser.add_argument('--no-brotli', action='store_true', help='Skip the (slow) brotli sizes in the report')
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        courses = json.load(f)
+
+    encoded = encode_catalog(courses)
+    with open(args.output, 'wb') as f:
+        f.write(minified(encoded))
+    print(f"Encoded {len(courses)} courses to {args.output}\n")
+    print_size_report(size_report(courses, encoded, with_brotli=not args.no_brotli))
+
+    if args.verify:
+        ok = verify_round_trip(courses, encoded)
+        print(f"\nRound trip: {'OK' if ok else 'FAILED'}")
+        if not ok:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Split merged course data into a slim index plus lazily loaded detail shards.
+
+The index holds the fields the course list and filters need. The long-form
+fields (description, notes, Q guide history, ...) go into per-department or
+per-course shards. Every file except manifest.json has its content hash in its
+name, so browsers can cache them forever; manifest.json says which ones are current.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+DEFAULT_CATALOG_DIR = 'results/catalog'
+MANIFEST_FILE = 'manifest.json'
+CATALOG_FORMAT_VERSION = 1
+
+# Course fields only needed on the course detail view; everything else stays in the index
+DETAIL_FIELDS = (
+    'description', 'notes', 'course_requirements', 'course_url', 'course_website', 'exam',
+    'cross_registration', 'term_type', 'historical_semesters', 'all_historical_codes', 'all_historical_titles',
+)
+
+SHARD_MODES = ('department', 'course')
+
+
+def content_hash(data: bytes) -> str:
+    """Short content hash used in file names."""
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def compact_json(data) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def shard_key(course: Dict, shard_by: str = 'department') -> str:
+    """File-name-safe key of the shard a course's details go into."""
+    if shard_by == 'course':
+        value = course.get('course_id', '')
+    else:
+        value = course.get('department', '')
+    return re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-') or 'other'
+
+
+def split_catalog(merged_data: List[Dict], shard_by: str = 'department') -> Tuple[List[Dict], Dict[str, Dict]]:
+    """
+    Split merged courses into index entries and detail shards.
+
+    Returns:
+        Tuple of (index entries in merged_data order, shard key -> {course_id: detail fields})
+    """
+    index = []
+    shards = {}
+    for course in merged_data:
+        key = shard_key(course, shard_by)
+        entry = {field: value for field, value in course.items() if field not in DETAIL_FIELDS}
+        entry['has_evaluations'] = bool(course.get('historical_semesters'))
+        entry['shard'] = key
+        index.append(entry)
+        shards.setdefault(key, {})[course['course_id']] = {
+            field: course[field] for field in DETAIL_FIELDS if field in course
+        }
+    return index, shards
+
+
+def write_sharded_catalog(merged_data: List[Dict], output_dir: str = DEFAULT_CATALOG_DIR,
+                          shard_by: str = 'department') -> Dict:
+    """
+    Write the index, detail shards and manifest to output_dir.
+
+    The set is built in a sibling directory and swapped in at the end, so
+    output_dir never holds a manifest pointing at missing or stale files.
+
+    Returns:
+        The manifest
+    """
+    index, shards = split_catalog(merged_data, shard_by)
+
+    staging_dir = output_dir.rstrip('/') + '.tmp'
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(os.path.join(staging_dir, 'details'))
+
+    def write(name_prefix, data):
+        body = compact_json(data)
+        relative_path = f"{name_prefix}.{content_hash(body)}.json"
+        with open(os.path.join(staging_dir, relative_path), 'wb') as f:
+            f.write(body)
+        return relative_path, len(body)
+
+    index_path, index_size = write('index', index)
+    shard_paths = {}
+    shard_bytes = 0
+    for key in sorted(shards):
+        shard_paths[key], size = write(f"details/{key}", shards[key])
+        shard_bytes += size
+
+    manifest = {
+        'version': CATALOG_FORMAT_VERSION,
+        'generated': datetime.now().isoformat(),
+        'course_count': len(index),
+        'shard_by': shard_by,
+        'index': index_path,
+        'index_bytes': index_size,
+        'shards': shard_paths,
+        'shard_bytes': shard_bytes,
+    }
+    # 'generated' only changes with the files, so an unchanged catalog keeps the same manifest bytes
+    previous_path = os.path.join(output_dir, MANIFEST_FILE)
+    if os.path.exists(previous_path):
+        with open(previous_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        if {k: v for k, v in previous.items() if k != 'generated'} == \
+                {k: v for k, v in manifest.items() if k != 'generated'}:
+            manifest['generated'] = previous['generated']
+    with open(os.path.join(staging_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.rename(staging_dir, output_dir)
+    return manifest
+
+
+def load_sharded_catalog(catalog_dir: str = DEFAULT_CATALOG_DIR) -> List[Dict]:
+    """Reassemble full course entries from a sharded catalog (inverse of write_sharded_catalog)."""
+    with open(os.path.join(catalog_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    with open(os.path.join(catalog_dir, manifest['index']), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    details = {}
+    for relative_path in manifest['shards'].values():
+        with open(os.path.join(catalog_dir, relative_path), 'r', encoding='utf-8') as f:
+            details.update(json.load(f))
+
+    courses = []
+    for entry in index:
+        course = {field: value for field, value in entry.items() if field not in ('has_evaluations', 'shard')}
+        course.update(details.get(entry['course_id'], {}))
+        courses.append(course)
+    return courses
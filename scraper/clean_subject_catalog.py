@@ -60,23 +60,12 @@ def clean_subject_catalog(subject_catalog, is_mit=False):
     
     return cleaned
 
-def process_courses(input_file='results/all_courses.json', output_file='results/all_courses_cleaned.json'):
-    """Process all courses to clean subject_catalog and extract sections."""
-    
-    # Load the JSON file
-    print(f"Loading {input_file}...")
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            courses = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: File {input_file} not found")
-        return
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON: {e}")
-        return
-    
-    print(f"Loaded {len(courses)} courses")
-    
+def clean_courses(courses):
+    """Clean subject_catalog and extract sections of scraped course records in memory.
+
+    Returns:
+        Tuple of (cleaned courses, report dict for print_cleaning_report)
+    """
     # First pass: count course_id occurrences
     course_id_counts = defaultdict(int)
     for course in courses:
@@ -169,19 +158,27 @@ def process_courses(input_file='results/all_courses.json', output_file='results/
                     course_copy['_original_subject_catalog'] = original_catalog
         
         processed_courses.append(course_copy)
-    
-    # Save the cleaned data
-    print(f"\nSaving cleaned data to {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(processed_courses, f, indent=2, ensure_ascii=False)
-    
+
+    report = {
+        'stats': stats,
+        'unique_course_ids': len(unique_course_ids),
+        'non_unique_course_ids': len(non_unique_course_ids),
+        'section_examples': section_examples,
+    }
+    return processed_courses, report
+
+def print_cleaning_report(report, processed_courses):
+    """Print the statistics and examples of a clean_courses run."""
+    stats = report['stats']
+    section_examples = report['section_examples']
+
     # Print statistics
     print("\n" + "="*60)
     print("PROCESSING STATISTICS:")
     print("="*60)
     print(f"Total courses processed: {stats['total']}")
-    print(f"Unique course IDs: {len(unique_course_ids)}")
-    print(f"Non-unique course IDs: {len(non_unique_course_ids)}")
+    print(f"Unique course IDs: {report['unique_course_ids']}")
+    print(f"Non-unique course IDs: {report['non_unique_course_ids']}")
     print(f"MIT courses found: {stats['mit_courses']}")
     print(f"Sections extracted: {stats['sections_extracted']}")
     print(f"  - Numeric sections (e.g., '001'): {stats['numeric_sections']}")
@@ -236,6 +233,32 @@ def process_courses(input_file='results/all_courses.json', output_file='results/
             print(f"  Original: '{course['_original_subject_catalog']}'")
             print(f"  Cleaned:  '{course['subject_catalog']}'")
             space_examples += 1
+
+def process_courses(input_file='results/all_courses.json', output_file='results/all_courses_cleaned.json'):
+    """Process all courses to clean subject_catalog and extract sections."""
+    
+    # Load the JSON file
+    print(f"Loading {input_file}...")
+    try:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            courses = json.load(f)
+    except FileNotFoundError:
+        print(f"Error: File {input_file} not found")
+        return
+    except json.JSONDecodeError as e:
+        print(f"Error parsing JSON: {e}")
+        return
+    
+    print(f"Loaded {len(courses)} courses")
+
+    processed_courses, report = clean_courses(courses)
+    
+    # Save the cleaned data
+    print(f"\nSaving cleaned data to {output_file}...")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(processed_courses, f, indent=2, ensure_ascii=False)
+
+    print_cleaning_report(report, processed_courses)
     
     print(f"\n✅ Processing complete! Cleaned data saved to {output_file}")
 
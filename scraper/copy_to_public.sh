@@ -1,10 +1,10 @@
 #!/bin/bash
 # Copy generated data files to public directory for the React app
 
-echo "Copying master_courses.json to public/data..."
-cp results/master_courses.json ../public/data/master_courses.json
-
-echo "Copying last_updated.json to public/data..."
-cp results/last_updated.json ../public/data/last_updated.json
+# Minified, precompressed, content-hashed copies plus a manifest referenced from config.json
+# (including the sharded catalog, if this merge wrote one); does nothing if the data is
+# unchanged since the last publish
+echo "Publishing master_courses.json and last_updated.json to public/data..."
+python3 publish.py || exit 1
 
 echo "Files copied successfully!"
\ No newline at end of file
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Persistent store of the last known location of each (course_id, section).
+
+Scrapes sometimes come back without locations (e.g. when the my.harvard
+cookie has expired). The merge then falls back to the last non-empty location
+seen for that section. This store keeps those locations in SQLite, together
+with when and in which run they were last scraped, so the merge looks them up
+one section at a time instead of re-reading the previously published catalog.
+It also lets us ask how stale each fallback location is.
+"""
+
+import argparse
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_LOCATION_DB = 'results/locations.sqlite'
+IMPORT_RUN_ID = 'import'
+
+
+def current_run_id() -> str:
+    """Id of this pipeline run: the GitHub Actions run id in CI, else a timestamp."""
+    return os.environ.get('GITHUB_RUN_ID') or datetime.now().strftime('%Y%m%d%H%M%S')
+
+
+class LocationStore:
+    """
+    (course_id, section) -> last non-empty scraped location.
+
+    Supports len(), get(key, default) and `in`, so merge_course can use it
+    like a dict of old locations.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOCATION_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS locations (
+                course_id TEXT NOT NULL,
+                section TEXT NOT NULL,
+                location TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                PRIMARY KEY (course_id, section)
+            ) WITHOUT ROWID
+        ''')
+        self.db.commit()
+
+    def __len__(self) -> int:
+        return self.db.execute('SELECT COUNT(*) FROM locations').fetchone()[0]
+
+    def get(self, key: Tuple[str, str], default: Optional[str] = None) -> Optional[str]:
+        row = self.db.execute(
+            'SELECT location FROM locations WHERE course_id = ? AND section = ?', (str(key[0]), str(key[1]))
+        ).fetchone()
+        return row[0] if row else default
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return self.get(key) is not None
+
+    def record(self, observations: Iterable[Tuple[str, str, str]], run_id: str,
+               timestamp: Optional[str] = None) -> int:
+        """
+        Save freshly scraped (course_id, section, location) triples; empty locations are ignored.
+
+        Returns:
+            Number of non-empty locations recorded
+        """
+        timestamp = timestamp or datetime.now().isoformat(timespec='seconds')
+        recorded = 0
+
+        def rows():
+            nonlocal recorded
+            for course_id, section, location in observations:
+                if course_id and location:
+                    recorded += 1
+                    yield str(course_id), str(section), location, timestamp, run_id
+
+        with self.db:
+            self.db.executemany('''
+                INSERT INTO locations (course_id, section, location, updated_at, run_id)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (course_id, section) DO UPDATE SET
+                    location = excluded.location, updated_at = excluded.updated_at, run_id = excluded.run_id
+            ''', rows())
+        return recorded
+
+    def import_master(self, courses: List[Dict], timestamp: Optional[str] = None) -> int:
+        """Seed the store from a published master_courses.json (its locations' real age is unknown)."""
+        return self.record(
+            ((course.get('course_id'), section.get('section', 'default'), section.get('location', ''))
+             for course in courses or [] for section in course.get('current_sections', [])),
+            IMPORT_RUN_ID, timestamp,
+        )
+
+    def stale(self, older_than_days: float = 0, now: Optional[datetime] = None) -> List[Dict]:
+        """Locations not seen in a scrape for more than older_than_days, oldest first, with their age."""
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=older_than_days)).isoformat(timespec='seconds')
+        rows = self.db.execute('''
+            SELECT course_id, section, location, updated_at, run_id FROM locations
+            WHERE updated_at < ? ORDER BY updated_at, course_id, section
+        ''', (cutoff,))
+        return [
+            {
+                'course_id': course_id,
+                'section': section,
+                'location': location,
+                'updated_at': updated_at,
+                'run_id': run_id,
+                'age_days': round((now - datetime.fromisoformat(updated_at)).total_seconds() / 86400, 1),
+            }
+            for course_id, section, location, updated_at, run_id in rows
+        ]
+
+    def close(self):
+        self.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect the last-known section location store')
+    parser.add_argument('--db', default=DEFAULT_LOCATION_DB, help=f'Store file (default: {DEFAULT_LOCATION_DB})')
+    parser.add_argument('--stale', type=float, default=7, metavar='DAYS',
+                        help='List locations not scraped for more than this many days (default: 7)')
+    parser.add_argument('--limit', type=int, default=50, help='Rows to show')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"{args.db} does not exist yet - run master_merge.py first")
+        return
+    store = LocationStore(args.db)
+    stale = store.stale(args.stale)
+    print(f"{len(store)} locations stored, {len(stale)} not scraped for more than {args.stale:g} days")
+    for row in stale[:args.limit]:
+        print(f"  {row['course_id']:>8} {row['section']:<8} {row['age_days']:>6.1f} days  "
+              f"(run {row['run_id']})  {row['location']}")
+    if len(stale) > args.limit:
+        print(f"  ... {len(stale) - args.limit} more")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
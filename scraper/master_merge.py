@@ -1,12 +1,63 @@
 #!/usr/bin/env python3
 """Master merge script to combine all_courses_cleaned.json and course_analytics.json"""
 
+import argparse
+import hashlib
 import json
+import os
+import shutil
+import time
 from collections import defaultdict
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Set, Tuple
 from datetime import datetime
 from glob import glob
 
+from catalog_deltas import DEFAULT_DELTA_DIR, record_version
+from catalog_encoding import encode_catalog, minified, print_size_report, size_report, verify_round_trip
+from catalog_shards import DEFAULT_CATALOG_DIR, SHARD_MODES, write_sharded_catalog
+from location_store import DEFAULT_LOCATION_DB, LocationStore, current_run_id
+from search_index import build_search_index
+from section_times import build_time_index, section_minutes
+
+MASTER_FILE = 'results/master_courses.json'
+MERGE_STATE_FILE = 'results/merge_state.json'
+MERGE_DELTA_FILE = 'results/merge_delta.json'
+
+# Bump whenever merge_course builds a different entry from the same inputs,
+# so per-course hashes saved by an older version are not trusted
+MERGE_LOGIC_VERSION = 1
+
+# Stored locations older than this are reported after each merge
+LOCATION_STALE_DAYS = 14
+
+# Optional outputs, by the option that writes them. Every run that writes MASTER_FILE removes
+# the ones it did not write, so nothing built from an older master is published next to it
+COLUMNAR_FILE = 'results/master_courses.columnar.json'
+SEARCH_INDEX_FILE = 'results/search_index.json'
+TIME_INDEX_FILE = 'results/section_times.json'
+OPTIONAL_OUTPUTS = {
+    'sharded': DEFAULT_CATALOG_DIR,
+    'columnar': COLUMNAR_FILE,
+    # Doc ids are positions in the master list, so an old index returns the wrong courses
+    'search_index': SEARCH_INDEX_FILE,
+    'time_index': TIME_INDEX_FILE,
+    # Deltas lead to the version they were written for; results/versions/ is history and stays
+    'deltas': DEFAULT_DELTA_DIR,
+}
+
+def remove_unwritten_outputs(written: Set[str]) -> List[str]:
+    """Delete the OPTIONAL_OUTPUTS whose option is not in written. Returns the removed paths."""
+    removed = []
+    for option, path in OPTIONAL_OUTPUTS.items():
+        if option in written or not os.path.exists(path):
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        removed.append(path)
+    return removed
+
 def load_json(filepath: str) -> Any:
     """Load JSON file safely."""
     try:
@@ -32,27 +83,135 @@ def group_current_courses(courses: List[Dict]) -> Dict[str, List[Dict]]:
     return courses_by_id
 
 
-def build_old_locations(old_master: List[Dict]) -> Dict[tuple, str]:
-    """Build a lookup of (course_id, section) -> location from existing data.
+def scraped_locations(all_courses: List[Dict]):
+    """(course_id, section, location) of every scraped section, for the location store."""
+    for section in all_courses:
+        yield section.get('course_id'), section.get('section', 'default'), section.get('location', '')
 
-    This allows preserving location data when new scrapes have empty locations
-    (e.g., due to expired authentication cookies).
+def open_location_store(path: str = DEFAULT_LOCATION_DB,
+                        old_master_file: str = '../public/data/master_courses.json') -> LocationStore:
+    """Open the location store, seeding it once from the published master if it is empty."""
+    store = LocationStore(path)
+    if not len(store) and os.path.exists(old_master_file):
+        imported = store.import_master(load_json(old_master_file))
+        print(f"Seeded {path} with {imported} locations from {old_master_file}")
+    return store
+
+def merge_course(course_id: str, sections: List[Dict], analytics: Dict,
+                 old_locations: Dict[Tuple[str, str], str]) -> Tuple[Dict, int]:
     """
-    old_locations = {}
-    if not old_master:
-        return old_locations
+    Build the merged entry of one currently offered course.
 
-    for course in old_master:
-        course_id = course.get('course_id')
-        if not course_id:
-            continue
-        for section in course.get('current_sections', []):
-            location = section.get('location', '')
-            if location:  # Only store non-empty locations
-                key = (course_id, section.get('section', 'default'))
-                old_locations[key] = location
+    Returns:
+        Tuple of (entry, number of section locations preserved from old data)
+    """
+    locations_preserved = 0
+
+    # Get first section for default values
+    first_section = sections[0]
+
+    # Start with base entry from current course data
+    entry = {
+        'course_id': course_id,
+        'course_code': first_section.get('subject_catalog', 'UNKNOWN'),
+        'course_title': first_section.get('course_title', ''),
+
+        # These will be populated from analytics if available
+        'latest_course_rating': 0,
+        'latest_hours_per_week': 0,
+        'latest_num_students': 0,
+        'latest_semester_with_data': 'N/A',
+
+        # Historical data (will be populated if available)
+        'historical_semesters': {},
+        'all_historical_codes': [],
+        'all_historical_titles': [],
+
+        # Current offering details
+        'current_term': first_section.get('year_term', ''),
+        'current_sections': []
+    }
+
+    # Add all current sections
+    for section in sections:
+        section_id = section.get('section', 'default')
+        location = section.get('location', '')
+
+        # If location is empty, try to preserve from old data
+        if not location:
+            key = (course_id, section_id)
+            old_location = old_locations.get(key, '')
+            if old_location:
+                location = old_location
+                locations_preserved += 1
+
+        section_info = {
+            'section': section_id,
+            'instructors': section.get('instructors', ''),
+            'enrollment': section.get('enrollment', ''),
+            'class_number': section.get('class_number', ''),
+            'instruction_mode': section.get('instruction_mode', ''),
+            'course_component': section.get('course_component', ''),
+            'start_time': section.get('start_time', ''),
+            'end_time': section.get('end_time', ''),
+            'start_minutes': None,
+            'end_minutes': None,
+            'weekdays': section.get('weekdays', ''),
+            'location': location,
+            'grading_basis': section.get('grading_basis', ''),
+        }
 
-    return old_locations
+        # Add weekday flags
+        for day in ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']:
+            key = f'lecture_{day}'
+            if key in section:
+                section_info[key] = section[key]
+
+        # Minutes since midnight, so clients never re-parse the time strings
+        section_info['start_minutes'], section_info['end_minutes'] = section_minutes(section_info)
+
+        entry['current_sections'].append(section_info)
+
+    # Add description and other course-level info from first section
+    entry['description'] = first_section.get('description', '')
+    entry['notes'] = first_section.get('notes', '')
+    entry['school'] = first_section.get('school', '')
+    entry['department'] = first_section.get('department', '')
+    entry['credits'] = first_section.get('credits', '')
+    entry['course_requirements'] = first_section.get('course_requirements', '')
+    entry['course_url'] = first_section.get('course_url', '')
+    entry['course_website'] = first_section.get('course_website', '')
+    entry['general_education'] = first_section.get('general_education', '')
+    entry['divisional_distribution'] = first_section.get('divisional_distribution', '')
+    entry['quantitative_reasoning'] = first_section.get('quantitative_reasoning', '')
+    entry['course_level'] = first_section.get('course_level', '')
+    entry['consent'] = first_section.get('consent', '')
+    entry['term_type'] = first_section.get('term_type', '')
+    entry['start_date'] = first_section.get('start_date', '')
+    entry['end_date'] = first_section.get('end_date', '')
+    entry['exam'] = first_section.get('exam', '')
+    entry['cross_registration'] = first_section.get('cross_registration', '')
+
+    # Check if we have analytics data for this course
+    if course_id in analytics:
+        analytics_data = analytics[course_id]
+
+        # Add historical analytics
+        entry['latest_course_rating'] = analytics_data.get('latest_course_rating', 0)
+        entry['latest_hours_per_week'] = analytics_data.get('latest_hours_per_week', 0)
+        entry['latest_num_students'] = analytics_data.get('latest_num_students', 0)
+        entry['latest_semester_with_data'] = analytics_data.get('latest_semester', 'N/A')
+
+        # Add historical data
+        entry['historical_semesters'] = analytics_data.get('semesters', {})
+        entry['all_historical_codes'] = analytics_data.get('all_course_codes', [])
+        entry['all_historical_titles'] = analytics_data.get('all_course_titles', [])
+
+        # Update course title from analytics if current one is empty
+        if not entry['course_title'] and analytics_data.get('latest_course_title'):
+            entry['course_title'] = analytics_data['latest_course_title']
+
+    return entry, locations_preserved
 
 def merge_data(all_courses: List[Dict], analytics: Dict, old_locations: Dict[Tuple[str, str], str] = None) -> Tuple[List[Dict], int]:
     """
@@ -80,106 +239,8 @@ def merge_data(all_courses: List[Dict], analytics: Dict, old_locations: Dict[Tup
     for course_id, sections in current_courses.items():
         if not course_id:
             continue
-            
-        # Get first section for default values
-        first_section = sections[0]
-        
-        # Start with base entry from current course data
-        entry = {
-            'course_id': course_id,
-            'course_code': first_section.get('subject_catalog', 'UNKNOWN'),
-            'course_title': first_section.get('course_title', ''),
-            
-            # These will be populated from analytics if available
-            'latest_course_rating': 0,
-            'latest_hours_per_week': 0,
-            'latest_num_students': 0,
-            'latest_semester_with_data': 'N/A',
-            
-            # Historical data (will be populated if available)
-            'historical_semesters': {},
-            'all_historical_codes': [],
-            'all_historical_titles': [],
-            
-            # Current offering details
-            'current_term': first_section.get('year_term', ''),
-            'current_sections': []
-        }
-        
-        # Add all current sections
-        for section in sections:
-            section_id = section.get('section', 'default')
-            location = section.get('location', '')
-
-            # If location is empty, try to preserve from old data
-            if not location:
-                key = (course_id, section_id)
-                old_location = old_locations.get(key, '')
-                if old_location:
-                    location = old_location
-                    locations_preserved += 1
-
-            section_info = {
-                'section': section_id,
-                'instructors': section.get('instructors', ''),
-                'enrollment': section.get('enrollment', ''),
-                'class_number': section.get('class_number', ''),
-                'instruction_mode': section.get('instruction_mode', ''),
-                'course_component': section.get('course_component', ''),
-                'start_time': section.get('start_time', ''),
-                'end_time': section.get('end_time', ''),
-                'weekdays': section.get('weekdays', ''),
-                'location': location,
-                'grading_basis': section.get('grading_basis', ''),
-            }
-            
-            # Add weekday flags
-            for day in ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']:
-                key = f'lecture_{day}'
-                if key in section:
-                    section_info[key] = section[key]
-            
-            entry['current_sections'].append(section_info)
-        
-        # Add description and other course-level info from first section
-        entry['description'] = first_section.get('description', '')
-        entry['notes'] = first_section.get('notes', '')
-        entry['school'] = first_section.get('school', '')
-        entry['department'] = first_section.get('department', '')
-        entry['credits'] = first_section.get('credits', '')
-        entry['course_requirements'] = first_section.get('course_requirements', '')
-        entry['course_url'] = first_section.get('course_url', '')
-        entry['course_website'] = first_section.get('course_website', '')
-        entry['general_education'] = first_section.get('general_education', '')
-        entry['divisional_distribution'] = first_section.get('divisional_distribution', '')
-        entry['quantitative_reasoning'] = first_section.get('quantitative_reasoning', '')
-        entry['course_level'] = first_section.get('course_level', '')
-        entry['consent'] = first_section.get('consent', '')
-        entry['term_type'] = first_section.get('term_type', '')
-        entry['start_date'] = first_section.get('start_date', '')
-        entry['end_date'] = first_section.get('end_date', '')
-        entry['exam'] = first_section.get('exam', '')
-        entry['cross_registration'] = first_section.get('cross_registration', '')
-        
-        # Check if we have analytics data for this course
-        if course_id in analytics:
-            analytics_data = analytics[course_id]
-            
-            # Add historical analytics
-            entry['latest_course_rating'] = analytics_data.get('latest_course_rating', 0)
-            entry['latest_hours_per_week'] = analytics_data.get('latest_hours_per_week', 0)
-            entry['latest_num_students'] = analytics_data.get('latest_num_students', 0)
-            entry['latest_semester_with_data'] = analytics_data.get('latest_semester', 'N/A')
-            
-            # Add historical data
-            entry['historical_semesters'] = analytics_data.get('semesters', {})
-            entry['all_historical_codes'] = analytics_data.get('all_course_codes', [])
-            entry['all_historical_titles'] = analytics_data.get('all_course_titles', [])
-            
-            # Update course title from analytics if current one is empty
-            if not entry['course_title'] and analytics_data.get('latest_course_title'):
-                entry['course_title'] = analytics_data['latest_course_title']
-        
+        entry, preserved = merge_course(course_id, sections, analytics, old_locations)
+        locations_preserved += preserved
         merged_data.append(entry)
     
     # Sort by course code for better readability
@@ -187,6 +248,145 @@ def merge_data(all_courses: List[Dict], analytics: Dict, old_locations: Dict[Tup
 
     return merged_data, locations_preserved
 
+def course_input_hash(course_id: str, sections: List[Dict], analytics_data: Any,
+                      old_locations: Dict[Tuple[str, str], str]) -> str:
+    """Hash of everything merge_course reads for one course."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(sections, separators=(',', ':')).encode('ascii'))
+    digest.update(b'\0')
+    digest.update(json.dumps(analytics_data, separators=(',', ':')).encode('ascii'))
+    # Old locations are only read for sections scraped without one
+    fallback = [
+        old_locations.get((course_id, section.get('section', 'default')), '')
+        for section in sections if not section.get('location', '')
+    ]
+    digest.update(b'\0')
+    digest.update(json.dumps(fallback).encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_previous_merge(master_file: str = MASTER_FILE, state_file: str = MERGE_STATE_FILE,
+                        fallback_master: str = '../public/data/master_courses.json') -> Tuple[List[Dict], Dict]:
+    """
+    Load the previous merged output and, if it is the output they describe, the per-course input hashes.
+
+    Falls back to the published copy when there is no local output; its
+    entries are still compared against, but without hashes every course is recomputed.
+
+    Returns:
+        Tuple of (previous merged courses, {course_id: {'hash', 'locations_preserved'}})
+    """
+    state = {}
+    if os.path.exists(state_file):
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+    if os.path.exists(master_file):
+        with open(master_file, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        if (state.get('version') == MERGE_LOGIC_VERSION
+                and state.get('master_sha256') == file_sha256(master_file)):
+            return previous, state.get('courses', {})
+        return previous, {}
+
+    if os.path.exists(fallback_master):
+        with open(fallback_master, 'r', encoding='utf-8') as f:
+            return json.load(f), {}
+    return [], {}
+
+
+def incremental_merge(all_courses: List[Dict], analytics: Dict, old_locations: Dict[Tuple[str, str], str],
+                      previous_master: List[Dict], previous_hashes: Dict[str, Dict]) -> Tuple[List[Dict], int, Dict, Dict]:
+    """
+    Same result as merge_data, but reuses previous entries whose inputs are unchanged.
+
+    Each course_id's input sections, analytics and fallback locations are hashed;
+    courses whose hash matches previous_hashes keep their previous entry and
+    only the rest go through merge_course.
+
+    Returns:
+        Tuple of (merged_data, locations_preserved_count, {course_id: hash info} for the next run, delta report)
+    """
+    timings = {}
+    start = time.time()
+    current_courses = group_current_courses(all_courses)
+    previous_entries = {course.get('course_id'): course for course in previous_master or []}
+
+    hashes = {}
+    for course_id, sections in current_courses.items():
+        hashes[course_id] = course_input_hash(course_id, sections, analytics.get(course_id), old_locations)
+    timings['hash'] = time.time() - start
+
+    start = time.time()
+    merged_data = []
+    course_state = {}
+    locations_preserved = 0
+    added, modified = [], []
+    reused = 0
+    for course_id, sections in current_courses.items():
+        previous = previous_hashes.get(course_id)
+        if previous and previous['hash'] == hashes[course_id] and course_id in previous_entries:
+            entry = previous_entries[course_id]
+            preserved = previous['locations_preserved']
+            reused += 1
+        else:
+            entry, preserved = merge_course(course_id, sections, analytics, old_locations)
+            if course_id not in previous_entries:
+                added.append(course_id)
+            elif entry != previous_entries[course_id]:
+                modified.append(course_id)
+        locations_preserved += preserved
+        course_state[course_id] = {'hash': hashes[course_id], 'locations_preserved': preserved}
+        merged_data.append(entry)
+    timings['merge'] = time.time() - start
+
+    start = time.time()
+    merged_data.sort(key=lambda x: x.get('course_code', 'ZZZ'))
+    timings['sort'] = time.time() - start
+
+    removed = [course_id for course_id in previous_entries if course_id not in current_courses]
+    delta = {
+        'generated': datetime.now().isoformat(),
+        'courses': len(merged_data),
+        'reused': reused,
+        'recomputed': len(merged_data) - reused,
+        'added': sorted(added),
+        'removed': sorted(removed),
+        'modified': sorted(modified),
+        'unchanged': not (added or removed or modified)
+                     and [c['course_id'] for c in merged_data] == [c.get('course_id') for c in previous_master or []],
+        'timings': {name: round(seconds, 3) for name, seconds in timings.items()},
+    }
+    return merged_data, locations_preserved, course_state, delta
+
+
+def save_merge_state(course_state: Dict, master_file: str = MASTER_FILE, state_file: str = MERGE_STATE_FILE):
+    state = {
+        'version': MERGE_LOGIC_VERSION,
+        'master_sha256': file_sha256(master_file),
+        'courses': course_state,
+    }
+    with open(state_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+
+
+def build_timestamp() -> Dict[str, str]:
+    """Contents of last_updated.json for data generated now."""
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'formatted': datetime.now().strftime('%b %d, %Y'),
+        'formatted_with_time': datetime.now().strftime('%b %d, %Y at %I:%M %p')
+    }
+
+
 def generate_summary_stats(merged_data: List[Dict]) -> Dict:
     """Generate summary statistics for the merged data."""
     stats = {
@@ -256,6 +456,28 @@ def generate_summary_stats(merged_data: List[Dict]) -> Dict:
 
 def main():
     """Main merge function. Reads all cleaned_*.json files and merges into one master_courses.json."""
+    parser = argparse.ArgumentParser(description='Merge scraped courses with Q guide analytics')
+    parser.add_argument('--sharded', action='store_true',
+                        help=f'Also write a slim index plus detail shards and a manifest to {DEFAULT_CATALOG_DIR}/')
+    parser.add_argument('--shard-by', choices=SHARD_MODES, default='department',
+                        help='With --sharded, one detail shard per department (default) or per course')
+    parser.add_argument('--columnar', action='store_true',
+                        help='Also write results/master_courses.columnar.json (see catalog_encoding.py)')
+    parser.add_argument('--search-index', action='store_true',
+                        help=f'Also write {SEARCH_INDEX_FILE} (see search_index.py)')
+    parser.add_argument('--time-index', action='store_true',
+                        help=f'Also write section week bitmasks and the interval index to {TIME_INDEX_FILE} (see section_times.py)')
+    parser.add_argument('--incremental', action='store_true',
+                        help=f'Only recompute courses whose inputs changed since the last run ({MERGE_STATE_FILE}) '
+                             f'and write a delta report to {MERGE_DELTA_FILE}')
+    parser.add_argument('--verify-incremental', action='store_true',
+                        help='With --incremental, check the result against a full merge')
+    parser.add_argument('--deltas', type=int, metavar='N',
+                        help=f'Keep the last N versions and write deltas from each to this one in {DEFAULT_DELTA_DIR}/ '
+                             '(see catalog_deltas.py)')
+    # run_both_terms.sh still passes --term/--year from when each term was merged separately
+    args, _ = parser.parse_known_args()
+
     print("Loading data files...")
 
     # Load all courses from all term-specific cleaned files
@@ -285,39 +507,106 @@ def main():
         print("Failed to load course_analytics.json")
         return
 
-    # Load existing master data to preserve locations when new data is empty
-    old_master = load_json('../public/data/master_courses.json')
-    old_locations = build_old_locations(old_master)
+    # Last known locations, to preserve them when new data is empty
+    old_locations = open_location_store()
 
     print(f"Loaded {len(all_courses)} total current course entries")
     print(f"Loaded {len(analytics)} courses with analytics data")
-    if old_locations:
-        print(f"Loaded {len(old_locations)} existing locations for preservation")
+    if len(old_locations):
+        print(f"Using {len(old_locations)} stored locations for preservation ({DEFAULT_LOCATION_DB})")
 
     # Perform merge
     print("\nMerging data (keeping only currently offered courses)...")
-    merged_data, locations_preserved = merge_data(all_courses, analytics, old_locations)
+    delta = None
+    if args.incremental:
+        previous_master, previous_hashes = load_previous_merge()
+        merged_data, locations_preserved, course_state, delta = incremental_merge(
+            all_courses, analytics, old_locations, previous_master, previous_hashes)
+        print(f"  Reused {delta['reused']} unchanged courses, recomputed {delta['recomputed']}: "
+              f"{len(delta['added'])} added, {len(delta['removed'])} removed, {len(delta['modified'])} modified "
+              f"(hash {delta['timings']['hash']:.2f}s, merge {delta['timings']['merge']:.2f}s)")
+        if args.verify_incremental:
+            full_data, _ = merge_data(all_courses, analytics, old_locations)
+            if minified(full_data) != minified(merged_data):
+                print("Error: incremental merge differs from a full merge")
+                raise SystemExit(1)
+            print("  Incremental merge matches a full merge")
+    else:
+        merged_data, locations_preserved = merge_data(all_courses, analytics, old_locations)
+
+    # Only after merging, so this run's sections fall back to what earlier runs saw
+    recorded = old_locations.record(scraped_locations(all_courses), current_run_id())
+    stale = old_locations.stale(LOCATION_STALE_DAYS)
+    old_locations.close()
+    print(f"Recorded {recorded} scraped locations in {DEFAULT_LOCATION_DB}"
+          + (f" ({len(stale)} stored locations not scraped for over {LOCATION_STALE_DAYS} days)" if stale else ''))
 
     # Generate statistics
     stats = generate_summary_stats(merged_data)
 
     # Always output single file
-    output_file = 'results/master_courses.json'
-
-    print(f"\nSaving merged data to {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(merged_data, f, indent=2, ensure_ascii=False)
+    output_file = MASTER_FILE
+
+    # Before any output is written, so a bad encoding fails the run instead of leaving it half-written
+    encoded = None
+    if args.columnar:
+        encoded = encode_catalog(merged_data)
+        if not verify_round_trip(merged_data, encoded):
+            print("Error: columnar encoding does not round-trip")
+            raise SystemExit(1)
+
+    for path in remove_unwritten_outputs({option for option in OPTIONAL_OUTPUTS if getattr(args, option)}):
+        print(f"Removing {path} (not written by this run)")
+
+    if delta is not None and delta['unchanged'] and os.path.exists(output_file):
+        print(f"\n{output_file} is unchanged, not rewriting it")
+    else:
+        print(f"\nSaving merged data to {output_file}...")
+        start = time.time()
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(merged_data, f, indent=2, ensure_ascii=False)
+        if delta is not None:
+            delta['timings']['write'] = round(time.time() - start, 3)
+
+    if delta is not None:
+        save_merge_state(course_state)
+        with open(MERGE_DELTA_FILE, 'w', encoding='utf-8') as f:
+            json.dump(delta, f, indent=2)
+        print(f"Saving delta report to {MERGE_DELTA_FILE}...")
+
+    if args.deltas:
+        # The published master is what returning clients have, so it is always a delta base
+        delta_manifest = record_version(merged_data, args.deltas, seed=load_json('../public/data/master_courses.json'))
+        sizes = ', '.join(f"{entry['bytes'] / 1e3:.1f} KB" for entry in delta_manifest['deltas'].values())
+        print(f"Saving {len(delta_manifest['deltas'])} deltas to version {delta_manifest['latest']} "
+              f"in {DEFAULT_DELTA_DIR}/" + (f" ({sizes})" if sizes else ''))
+
+    if args.columnar:
+        print(f"Saving columnar encoding to {COLUMNAR_FILE}...")
+        with open(COLUMNAR_FILE, 'wb') as f:
+            f.write(minified(encoded))
+        print_size_report(size_report(merged_data, encoded, with_brotli=False))
+
+    if args.search_index:
+        print(f"Saving search index to {SEARCH_INDEX_FILE}...")
+        with open(SEARCH_INDEX_FILE, 'wb') as f:
+            f.write(minified(build_search_index(merged_data)))
+
+    if args.time_index:
+        print(f"Saving section time index to {TIME_INDEX_FILE}...")
+        with open(TIME_INDEX_FILE, 'wb') as f:
+            f.write(minified(build_time_index(merged_data)))
+
+    if args.sharded:
+        manifest = write_sharded_catalog(merged_data, DEFAULT_CATALOG_DIR, args.shard_by)
+        print(f"Saving sharded catalog to {DEFAULT_CATALOG_DIR}/: index {manifest['index_bytes'] / 1e6:.2f} MB, "
+              f"{len(manifest['shards'])} detail shards {manifest['shard_bytes'] / 1e6:.2f} MB")
     
     # Save timestamp for when the data was generated
     timestamp_file = 'results/last_updated.json'
-    timestamp_data = {
-        'timestamp': datetime.now().isoformat(),
-        'formatted': datetime.now().strftime('%b %d, %Y'),
-        'formatted_with_time': datetime.now().strftime('%b %d, %Y at %I:%M %p')
-    }
     print(f"Saving timestamp to {timestamp_file}...")
     with open(timestamp_file, 'w', encoding='utf-8') as f:
-        json.dump(timestamp_data, f, indent=2)
+        json.dump(build_timestamp(), f, indent=2)
     
     # Print summary
     print("\n" + "="*60)
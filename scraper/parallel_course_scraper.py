@@ -16,6 +16,7 @@ import logging
 from datetime import datetime
 from bs4 import BeautifulSoup
 import re
+from adaptive_scheduler import AdaptiveScheduler, RetryableError
 
 # Configure logging
 logging.basicConfig(
@@ -37,7 +38,7 @@ class ParallelHarvardCourseScraper:
         Initialize the parallel course scraper.
         
         Args:
-            max_concurrent: Maximum number of concurrent requests
+            max_concurrent: Upper bound for the adaptive concurrency limit
             timeout: Request timeout in seconds
             max_retries: Maximum retries per page
             retry_delay: Base delay between retries (exponential backoff)
@@ -53,7 +54,11 @@ class ParallelHarvardCourseScraper:
         self.year = year
         self.term = term
         self.school = school
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.scheduler = AdaptiveScheduler(
+            max_concurrent=max_concurrent,
+            max_retries=max_retries,
+            retry_delay=retry_delay
+        )
         self.session = None
         self.all_course_urls = set()  # Use set to avoid duplicates
         self.failed_pages = []
@@ -171,89 +176,65 @@ class ParallelHarvardCourseScraper:
         
         return course_urls, course_count
     
-    async def fetch_page(self, page: int, retry_count: int = 0) -> Optional[Dict[str, Any]]:
+    async def _fetch_page_once(self, page: int) -> Dict[str, Any]:
+        """
+        Fetch and parse one search results page. Failures worth another attempt
+        raise RetryableError, whose message becomes the page's final status.
         """
-        Fetch a single page's data with retry logic.
+        # Build URL with filters
+        url = f"{self.base_url}?q=&sort=subject_catalog"
+        url += f"&school={self.school}&term={self.year}+{self.term}"
+        url += f"&page={page}"
+
+        try:
+            async with self.session.get(url) as response:
+                if response.status == 200:
+                    data = await response.json()
+
+                    if data and 'hits' in data:
+                        # Extract course info using async version
+                        course_urls, course_count = await self.extract_course_info_async(data['hits'])
+
+                        return {
+                            'page': page,
+                            'status': 'success',
+                            'urls': course_urls,
+                            'course_count': course_count,
+                            'total_hits': data.get('total_hits', 0)
+                        }
+                    logger.warning(f"Page {page}: No 'hits' in response")
+                    raise RetryableError('no_hits')
+
+                if response.status == 429:
+                    logger.warning(f"Page {page}: Rate limited (429)")
+                    raise RetryableError('rate_limited', throttled=True)
+                logger.warning(f"Page {page}: Unexpected status {response.status}")
+                raise RetryableError(f'status_{response.status}', throttled=response.status >= 500)
+
+        except asyncio.TimeoutError:
+            logger.warning(f"Page {page}: Timeout after {self.timeout}s")
+            raise RetryableError('timeout', throttled=True)
+
+        except (aiohttp.ClientError, ValueError) as e:
+            logger.error(f"Page {page}: Error - {e}")
+            raise RetryableError('error')
+
+    async def fetch_page(self, page: int) -> Dict[str, Any]:
+        """
+        Fetch a single page's data through the adaptive scheduler, which
+        retries failed pages with backoff and lowers concurrency when throttled.
         
         Args:
             page: Page number to fetch
-            retry_count: Current retry attempt
             
         Returns:
-            Page data dictionary or None if failed
+            Page data dictionary; status is 'success' or why the last attempt failed
         """
-        async with self.semaphore:
-            # Build URL with filters
-            url = f"{self.base_url}?q=&sort=subject_catalog"
-            url += f"&school={self.school}&term={self.year}+{self.term}"
-            url += f"&page={page}"
-            
-            try:
-                async with self.session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        if data and 'hits' in data:
-                            # Extract course info using async version
-                            course_urls, course_count = await self.extract_course_info_async(data['hits'])
-                            
-                            return {
-                                'page': page,
-                                'status': 'success',
-                                'urls': course_urls,
-                                'course_count': course_count,
-                                'total_hits': data.get('total_hits', 0)
-                            }
-                        else:
-                            logger.warning(f"Page {page}: No 'hits' in response")
-                            if retry_count < self.max_retries:
-                                delay = self.retry_delay * (2 ** retry_count)
-                                logger.info(f"Page {page}: Retry #{retry_count + 1}/{self.max_retries} in {delay:.1f}s (no hits)")
-                                await asyncio.sleep(delay)
-                                return await self.fetch_page(page, retry_count + 1)
-                            else:
-                                return {'page': page, 'status': 'no_hits', 'urls': [], 'course_count': 0}
-                    
-                    elif response.status == 429:  # Rate limited
-                        if retry_count < self.max_retries:
-                            delay = self.retry_delay * (2 ** retry_count)
-                            logger.warning(f"Page {page}: Rate limited (429)")
-                            logger.info(f"Page {page}: Retry #{retry_count + 1}/{self.max_retries} in {delay:.1f}s (rate limited)")
-                            await asyncio.sleep(delay)
-                            return await self.fetch_page(page, retry_count + 1)
-                        else:
-                            logger.error(f"Max retries exceeded for page {page} (rate limited)")
-                            return {'page': page, 'status': 'rate_limited', 'urls': [], 'course_count': 0}
-                    
-                    else:
-                        logger.warning(f"Page {page}: Unexpected status {response.status}")
-                        if retry_count < self.max_retries:
-                            delay = self.retry_delay * (2 ** retry_count)
-                            logger.info(f"Page {page}: Retry #{retry_count + 1}/{self.max_retries} in {delay:.1f}s (status {response.status})")
-                            await asyncio.sleep(delay)
-                            return await self.fetch_page(page, retry_count + 1)
-                        else:
-                            return {'page': page, 'status': f'status_{response.status}', 'urls': [], 'course_count': 0}
-                            
-            except asyncio.TimeoutError:
-                logger.warning(f"Page {page}: Timeout after {self.timeout}s")
-                if retry_count < self.max_retries:
-                    delay = self.retry_delay * (2 ** retry_count)
-                    logger.info(f"Page {page}: Retry #{retry_count + 1}/{self.max_retries} in {delay:.1f}s (timeout)")
-                    await asyncio.sleep(delay)
-                    return await self.fetch_page(page, retry_count + 1)
-                else:
-                    return {'page': page, 'status': 'timeout', 'urls': [], 'course_count': 0}
-                    
-            except Exception as e:
-                logger.error(f"Page {page}: Error - {e}")
-                if retry_count < self.max_retries:
-                    delay = self.retry_delay * (2 ** retry_count)
-                    logger.info(f"Page {page}: Retry #{retry_count + 1}/{self.max_retries} in {delay:.1f}s (error: {type(e).__name__})")
-                    await asyncio.sleep(delay)
-                    return await self.fetch_page(page, retry_count + 1)
-                else:
-                    return {'page': page, 'status': 'error', 'urls': [], 'course_count': 0}
+        try:
+            return await self.scheduler.run(self._fetch_page_once, page)
+        except RetryableError as e:
+            logger.error(f"Max retries exceeded for page {page} ({e})")
+            return {'page': page, 'status': str(e), 'urls': [], 'course_count': 0}
     
     async def get_initial_data(self) -> int:
         """Get initial data to determine total number of pages."""
@@ -339,6 +320,9 @@ class ParallelHarvardCourseScraper:
             'failed_pages': len(self.failed_pages),
             'elapsed_time': elapsed_time,
             'pages_per_second': total_pages / elapsed_time if elapsed_time > 0 else 0,
+            'retries': self.scheduler.retries,
+            'throttle_events': self.scheduler.throttle_events,
+            'peak_concurrency': self.scheduler.peak_limit,
             'timestamp': datetime.now().isoformat()
         }
         
@@ -348,6 +332,8 @@ class ParallelHarvardCourseScraper:
         logger.info(f"Total courses found: {stats['total_courses']}")
         logger.info(f"Total URLs collected: {stats['total_urls']}")
         logger.info(f"Speed: {stats['pages_per_second']:.2f} pages/second")
+        logger.info(f"Concurrency peak {stats['peak_concurrency']} ({stats['retries']} retries, "
+                    f"{stats['throttle_events']} throttle events)")
         
         return {
             'urls': sorted(list(self.all_course_urls)),
@@ -15,6 +15,7 @@ import logging
 from datetime import datetime
 import pandas as pd
 from get_course_myharvard import CourseScraper
+from adaptive_scheduler import AdaptiveScheduler, RetryableError
 import io
 
 # Configure logging
@@ -34,7 +35,7 @@ class ParallelCourseScraperWithReuse:
         Initialize the parallel scraper.
 
         Args:
-            max_concurrent: Maximum number of concurrent requests
+            max_concurrent: Upper bound for the adaptive concurrency limit
             timeout: Request timeout in seconds
             max_retries: Maximum retries per URL
             retry_delay: Base delay between retries (exponential backoff)
@@ -44,7 +45,11 @@ class ParallelCourseScraperWithReuse:
         self.timeout = timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.scheduler = AdaptiveScheduler(
+            max_concurrent=max_concurrent,
+            max_retries=max_retries,
+            retry_delay=retry_delay
+        )
         self.session = None
         self.failed_urls = []
         self.course_data = []
@@ -152,89 +157,63 @@ class ParallelCourseScraperWithReuse:
             logger.debug(f"Error parsing {course_url}: {e}")
             return None
     
-    async def fetch_course(self, course_url: str, retry_count: int = 0) -> Optional[Dict[str, Any]]:
+    async def _fetch_html(self, full_url: str) -> Optional[str]:
+        """Fetch a course page (None for a 404), translating transient failures into RetryableError."""
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        }
+
+        # Add cookies if available
+        if self.cookies:
+            headers['Cookie'] = self.cookies
+
+        try:
+            async with self.session.get(full_url, headers=headers) as response:
+                if response.status == 200:
+                    return await response.text()
+                if response.status == 404:
+                    return None
+                if response.status == 429 or response.status >= 500:
+                    raise RetryableError(f"status {response.status}", throttled=True)
+                raise RetryableError(f"status {response.status}")
+        except asyncio.TimeoutError:
+            raise RetryableError("timeout", throttled=True)
+        except aiohttp.ClientError as e:
+            raise RetryableError(f"{type(e).__name__}: {e}")
+
+    async def fetch_course(self, course_url: str) -> Optional[Dict[str, Any]]:
         """
-        Fetch a single course's data with retry logic.
+        Fetch a single course's data through the adaptive scheduler, which
+        retries rate limiting, server errors and timeouts with backoff.
         
         Args:
             course_url: Relative course URL (e.g., 'course/COMPSCI50/2025-Fall/001')
-            retry_count: Current retry attempt
             
         Returns:
             Course data dictionary or None if failed
         """
-        async with self.semaphore:
-            full_url = f"{self.base_url}{course_url}"
-            
-            try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                }
+        try:
+            html = await self.scheduler.run(self._fetch_html, f"{self.base_url}{course_url}")
+        except RetryableError as e:
+            logger.error(f"Max retries exceeded for {course_url} ({e})")
+            self.failed_urls.append(course_url)
+            return None
 
-                # Add cookies if available
-                if self.cookies:
-                    headers['Cookie'] = self.cookies
+        if html is None:
+            logger.warning(f"Course not found (404): {course_url}")
+            return {'url': course_url, 'status': 'not_found'}
 
-                async with self.session.get(full_url, headers=headers) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        
-                        # Parse course data using CourseScraper logic
-                        course_data = self.parse_course_html(html, course_url)
-                        
-                        if course_data:
-                            course_data['status'] = 'success'
-                            course_data['timestamp'] = datetime.now().isoformat()
-                            return course_data
-                        else:
-                            logger.warning(f"Failed to parse data for {course_url}")
-                            return {'url': course_url, 'status': 'parse_failed'}
-                    
-                    elif response.status == 404:
-                        logger.warning(f"Course not found (404): {course_url}")
-                        return {'url': course_url, 'status': 'not_found'}
-                    
-                    elif response.status == 429:  # Rate limited
-                        if retry_count < self.max_retries:
-                            delay = self.retry_delay * (2 ** retry_count)
-                            logger.warning(f"Rate limited on {course_url}, retrying in {delay}s...")
-                            await asyncio.sleep(delay)
-                            return await self.fetch_course(course_url, retry_count + 1)
-                        else:
-                            logger.error(f"Max retries exceeded for {course_url} (rate limited)")
-                            self.failed_urls.append(course_url)
-                            return None
-                    
-                    else:
-                        logger.warning(f"Unexpected status {response.status} for {course_url}")
-                        if retry_count < self.max_retries:
-                            delay = self.retry_delay * (2 ** retry_count)
-                            await asyncio.sleep(delay)
-                            return await self.fetch_course(course_url, retry_count + 1)
-                        else:
-                            self.failed_urls.append(course_url)
-                            return None
-                            
-            except asyncio.TimeoutError:
-                logger.warning(f"Timeout fetching {course_url}")
-                if retry_count < self.max_retries:
-                    delay = self.retry_delay * (2 ** retry_count)
-                    await asyncio.sleep(delay)
-                    return await self.fetch_course(course_url, retry_count + 1)
-                else:
-                    self.failed_urls.append(course_url)
-                    return None
-                    
-            except Exception as e:
-                logger.error(f"Error fetching {course_url}: {e}")
-                if retry_count < self.max_retries:
-                    delay = self.retry_delay * (2 ** retry_count)
-                    await asyncio.sleep(delay)
-                    return await self.fetch_course(course_url, retry_count + 1)
-                else:
-                    self.failed_urls.append(course_url)
-                    return None
+        # Parse course data using CourseScraper logic
+        course_data = self.parse_course_html(html, course_url)
+
+        if course_data:
+            course_data['status'] = 'success'
+            course_data['timestamp'] = datetime.now().isoformat()
+            return course_data
+        else:
+            logger.warning(f"Failed to parse data for {course_url}")
+            return {'url': course_url, 'status': 'parse_failed'}
     
     async def fetch_batch(self, course_urls: List[str], batch_name: str = "batch") -> List[Dict[str, Any]]:
         """
@@ -301,6 +280,7 @@ class ParallelCourseScraperWithReuse:
         successful = len([r for r in all_results if r.get('status') == 'success'])
         parse_failed = len([r for r in all_results if r.get('status') == 'parse_failed'])
         not_found = len([r for r in all_results if r.get('status') == 'not_found'])
+        scheduler_stats = self.scheduler.stats()
         
         stats = {
             'total_requested': total_courses,
@@ -310,6 +290,11 @@ class ParallelCourseScraperWithReuse:
             'failed': len(self.failed_urls),
             'elapsed_time': elapsed_time,
             'courses_per_second': total_courses / elapsed_time if elapsed_time > 0 else 0,
+            'retries': scheduler_stats['retries'],
+            'throttle_events': scheduler_stats['throttle_events'],
+            'latency_p50': scheduler_stats['latency_p50'],
+            'latency_p95': scheduler_stats['latency_p95'],
+            'peak_concurrency': scheduler_stats['peak_concurrency'],
             'timestamp': datetime.now().isoformat()
         }
         
@@ -319,6 +304,9 @@ class ParallelCourseScraperWithReuse:
         logger.info(f"Not found: {stats['not_found']}")
         logger.info(f"Network failed: {stats['failed']}")
         logger.info(f"Speed: {stats['courses_per_second']:.2f} courses/second")
+        logger.info(f"Latency: p50 {stats['latency_p50']*1000:.0f}ms, p95 {stats['latency_p95']*1000:.0f}ms; "
+                    f"concurrency peak {stats['peak_concurrency']} ({stats['retries']} retries, "
+                    f"{stats['throttle_events']} throttle events)")
         
         return {
             'courses': all_results,
@@ -340,6 +328,21 @@ def load_course_urls(filepath: str) -> List[str]:
         logger.error(f"Error loading URLs: {e}")
         return []
 
+def successful_unique_courses(courses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep only successful courses and drop duplicates (same title, subject_catalog and term)."""
+    seen = set()
+    unique_courses = []
+    for course in courses:
+        if course.get('status') != 'success':
+            continue
+        key = (course.get('course_title', ''), 
+               course.get('subject_catalog', ''), 
+               course.get('year_term', ''))
+        if key not in seen:
+            seen.add(key)
+            unique_courses.append(course)
+    return unique_courses
+
 def save_results(results: Dict[str, Any], output_file: str = "results/all_courses.json"):
     """Save results to JSON file in results/ folder."""
     
@@ -350,17 +353,7 @@ def save_results(results: Dict[str, Any], output_file: str = "results/all_course
     
     if results['courses']:
         # Filter only successful courses and drop duplicates
-        seen = set()
-        unique_courses = []
-        for course in results['courses']:
-            if course.get('status') != 'success':
-                continue
-            key = (course.get('course_title', ''), 
-                   course.get('subject_catalog', ''), 
-                   course.get('year_term', ''))
-            if key not in seen:
-                seen.add(key)
-                unique_courses.append(course)
+        unique_courses = successful_unique_courses(results['courses'])
         
         # Save to JSON
         import json
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Run discovery, scrape, clean, merge and publish for one term in a single process.
+
+The shell pipelines (run_single_term.sh, quick_update.sh) start a Python
+process per step, and each step re-reads the pretty-printed JSON the previous
+one wrote (all_courses.json -> all_courses_cleaned.json -> master_courses.json).
+Here the records are passed from stage to stage in memory. The intermediates
+(course links, all_courses.json, all_courses_cleaned.json) are only written
+with --write-intermediates.
+
+What later runs read is always written: the term's cleaned_<term><year>.json
+(merged with the other terms' files), the location store, the catalog
+versions and deltas, results/last_updated.json and the published files. So is
+everything a later publish.py reads: master_courses.json and the indexes built
+by this run. Optional merge outputs this run did not build are removed, as
+master_merge.py does.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from contextlib import contextmanager
+from glob import glob
+from typing import Dict, List
+
+from catalog_deltas import record_version
+from catalog_encoding import minified
+from clean_subject_catalog import clean_courses
+from location_store import DEFAULT_LOCATION_DB, current_run_id
+from master_merge import (MASTER_FILE, SEARCH_INDEX_FILE, TIME_INDEX_FILE, build_timestamp, generate_summary_stats,
+                          load_json, merge_data, open_location_store, remove_unwritten_outputs, scraped_locations)
+from parallel_course_scraper import ParallelHarvardCourseScraper
+from parallel_course_scraper import save_results as save_course_links
+from parallel_scraper_with_reuse import ParallelCourseScraperWithReuse, successful_unique_courses
+from parallel_scraper_with_reuse import save_results as save_scraped_courses
+from publish import publish
+from search_index import build_search_index
+from section_times import build_time_index
+
+
+class StageTimer:
+    """Wall-clock time of each pipeline stage, in run order."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        print(f"\n=== {name} ===")
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0) + time.time() - start
+
+    def print_report(self):
+        total = sum(self.timings.values())
+        print("\n" + "=" * 60)
+        print("STAGE TIMINGS:")
+        print("=" * 60)
+        for name, seconds in self.timings.items():
+            print(f"{name:<16} {seconds:8.2f}s")
+        print(f"{'total':<16} {total:8.2f}s")
+
+
+def write_json(path: str, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+async def discover_and_scrape(args) -> List[Dict]:
+    """Course links for the term, then every course page; returns the successful, de-duplicated records."""
+    async with ParallelHarvardCourseScraper(
+        max_concurrent=args.discover_concurrent,
+        timeout=args.timeout,
+        year=args.year,
+        term=args.term,
+        school=args.school
+    ) as scraper:
+        links = await scraper.fetch_all_pages()
+    if args.write_intermediates:
+        save_course_links(links, args.school, args.year, args.term)
+    urls = links['urls'][:args.sample] if args.sample else links['urls']
+    print(f"Found {len(urls)} course URLs")
+
+    async with ParallelCourseScraperWithReuse(
+        max_concurrent=args.scrape_concurrent,
+        timeout=args.timeout
+    ) as scraper:
+        results = await scraper.fetch_all_courses(urls)
+    if args.write_intermediates:
+        save_scraped_courses(results)
+    return successful_unique_courses(results['courses'])
+
+
+def merge_inputs(term_file: str, cleaned: List[Dict]) -> List[Dict]:
+    """This term's cleaned records plus every other term's cleaned file, in master_merge's file order."""
+    all_courses = []
+    for path in sorted(set(glob('results/cleaned_*.json')) | {term_file}):
+        data = cleaned if path == term_file else load_json(path)
+        if data:
+            print(f"  {len(data)} courses from {path}" + (" (in memory)" if path == term_file else ''))
+            all_courses.extend(data)
+    return all_courses
+
+
+def main():
+    # Run from scraper/, like the other scripts
+    parser = argparse.ArgumentParser(description='Discover, scrape, clean, merge and publish one term in one process')
+    parser.add_argument('--term', required=True, help='Term: Fall or Spring')
+    parser.add_argument('--year', required=True, help='Academic year, e.g. 2026')
+    parser.add_argument('--school', default='All', help='School code for discovery (default: All)')
+    parser.add_argument('--from-file', metavar='ALL_COURSES_JSON',
+                        help='Skip discovery and scraping and start from a saved all_courses.json')
+    parser.add_argument('--sample', type=int, help='Only scrape the first N course URLs (for testing)')
+    parser.add_argument('--discover-concurrent', type=int, default=20,
+                        help='Concurrent requests while discovering course links (default: 20)')
+    parser.add_argument('--scrape-concurrent', type=int, default=50,
+                        help='Concurrent requests while scraping courses (default: 50)')
+    parser.add_argument('--timeout', type=int, default=30, help='Request timeout in seconds (default: 30)')
+    parser.add_argument('--deltas', type=int, metavar='N',
+                        help='Keep the last N catalog versions and write deltas to this one (see catalog_deltas.py)')
+    parser.add_argument('--search-index', action='store_true', help='Build and publish the search index')
+    parser.add_argument('--time-index', action='store_true', help='Build and publish the section time index')
+    parser.add_argument('--write-intermediates', action='store_true',
+                        help='Also write the files the step-by-step scripts would (course links, all_courses.json, '
+                             'all_courses_cleaned.json)')
+    parser.add_argument('--no-publish', action='store_true', help='Stop after merging')
+    parser.add_argument('--public-dir', default='../public/data', help='Publish directory (default: ../public/data)')
+    parser.add_argument('--force-publish', action='store_true', help='Publish even if the data is unchanged')
+    args = parser.parse_args()
+
+    os.makedirs('results', exist_ok=True)
+    timer = StageTimer()
+    term_file = f"results/cleaned_{args.term.lower()}{args.year}.json"
+
+    # Before scraping, so a missing analytics file fails fast
+    with timer.stage('load analytics'):
+        analytics = load_json('qguide/results/course_analytics.json')
+        if not analytics:
+            print("Failed to load course_analytics.json")
+            raise SystemExit(1)
+
+    if args.from_file:
+        with timer.stage('load'):
+            scraped = load_json(args.from_file)
+            if not scraped:
+                raise SystemExit(1)
+            print(f"Loaded {len(scraped)} courses from {args.from_file}")
+    else:
+        with timer.stage('discover+scrape'):
+            scraped = asyncio.run(discover_and_scrape(args))
+            print(f"Scraped {len(scraped)} unique courses")
+    if not scraped:
+        print("No courses scraped")
+        raise SystemExit(1)
+
+    with timer.stage('clean'):
+        cleaned, report = clean_courses(scraped)
+        print(f"Cleaned {report['stats']['total']} courses: {report['stats']['sections_extracted']} sections extracted, "
+              f"{report['stats']['subject_catalog_cleaned']} subject catalogs cleaned")
+        del scraped
+        if args.write_intermediates:
+            write_json('results/all_courses_cleaned.json', cleaned)
+
+    with timer.stage('merge'):
+        all_courses = merge_inputs(term_file, cleaned)
+        old_locations = open_location_store()
+        merged_data, locations_preserved = merge_data(all_courses, analytics, old_locations)
+        recorded = old_locations.record(scraped_locations(all_courses), current_run_id())
+        old_locations.close()
+        stats = generate_summary_stats(merged_data)
+        print(f"Merged {stats['total_courses']} courses, {stats['total_sections']} sections "
+              f"({stats['courses_with_analytics']} with Q guide analytics)")
+        print(f"Recorded {recorded} scraped locations in {DEFAULT_LOCATION_DB}")
+        if locations_preserved > 0:
+            print(f"⚠️  Locations preserved from old data: {locations_preserved}")
+            print(f"   (This may indicate expired cookies - consider updating MY_HARVARD_COOKIE)")
+        del all_courses
+
+    outputs = {'master_courses': merged_data, 'search_index': None, 'section_times': None,
+               'master_courses_columnar': None, 'master_courses_deltas': None, 'catalog': None}
+    with timer.stage('indexes'):
+        if args.search_index:
+            outputs['search_index'] = build_search_index(merged_data)
+        if args.time_index:
+            outputs['section_times'] = build_time_index(merged_data)
+        if args.deltas:
+            # The published master is what returning clients have, so it is always a delta base
+            outputs['master_courses_deltas'] = record_version(
+                merged_data, args.deltas, seed=load_json(os.path.join(args.public_dir, 'master_courses.json')))
+
+    with timer.stage('save'):
+        # Later runs of the other terms merge this file, so it is not an intermediate
+        write_json(term_file, cleaned)
+        outputs['last_updated'] = build_timestamp()
+        with open('results/last_updated.json', 'w', encoding='utf-8') as f:
+            json.dump(outputs['last_updated'], f, indent=2)
+        # A later publish.py publishes what is in results/, so it must match this run (columnar
+        # and sharded outputs are never built here, and deltas were written with the versions)
+        for path in remove_unwritten_outputs({option for option in ('search_index', 'time_index', 'deltas')
+                                              if getattr(args, option)}):
+            print(f"Removing {path} (not written by this run)")
+        write_json(MASTER_FILE, merged_data)
+        for name, path in (('search_index', SEARCH_INDEX_FILE), ('section_times', TIME_INDEX_FILE)):
+            if outputs[name] is not None:
+                with open(path, 'wb') as f:
+                    f.write(minified(outputs[name]))
+
+    if not args.no_publish:
+        with timer.stage('publish'):
+            publish(args.public_dir, args.force_publish, data=outputs)
+
+    timer.print_report()
+
+
+if __name__ == "__main__":
+    main()
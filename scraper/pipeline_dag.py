@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""Cached DAG runner over the scraper pipeline stages.
+
+    discover -> scrape -> clean --\\
+                                   +--> merge -> publish
+              qguide-analyze -----/
+
+Each stage is the same command the shell scripts run. After a stage runs,
+the content hashes of its input and output files are saved in
+results/dag_state.json. A later run skips the stage when its command, its
+input hashes and its output hashes are all unchanged. Inputs include the
+stage's own scripts, so a logic change re-runs it.
+
+discover and scrape read the live site, so they always run (with --offline
+they are skipped if their outputs exist). Everything after them is keyed on
+content: when a scrape returns the same courses, clean, merge and publish
+are skipped. The per-record 'timestamp' the scraper adds is ignored when
+fingerprinting its output.
+
+Stages whose dependencies are done run in parallel, so Q guide analysis runs
+alongside the my.harvard scrape. Input hashes are taken after a stage
+finishes, since some stages update their own inputs (analyzer.py caches
+results inside QGuides.db).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from glob import glob
+from typing import Dict, List, Optional, Sequence
+
+DAG_STATE_FILE = 'results/dag_state.json'
+DAG_STATE_VERSION = 1
+
+_print_lock = threading.Lock()
+_state_lock = threading.Lock()
+
+
+class Stage:
+    """One pipeline step: a command plus the files it reads and writes (paths relative to scraper/)."""
+
+    def __init__(self, name: str, commands: List[List[str]], deps: Sequence[str] = (),
+                 inputs: Sequence[str] = (), outputs: Sequence[str] = (), optional_outputs: Sequence[str] = (),
+                 cwd: str = '.', volatile: bool = False, ignore_keys: Dict[str, Sequence[str]] = None):
+        self.name = name
+        self.commands = commands
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.optional_outputs = list(optional_outputs)
+        self.cwd = cwd
+        # Reads external sources that cannot be hashed
+        self.volatile = volatile
+        # path -> record keys left out of its fingerprint (see file_fingerprint)
+        self.ignore_keys = ignore_keys or {}
+
+
+def build_stages(term: Optional[str] = None, year: Optional[str] = None, school: str = 'All') -> Dict[str, Stage]:
+    """The stages of run_single_term.sh (with a term) or run_full_pipeline.sh, plus Q guide analysis."""
+    discover = ['python3', 'parallel_course_scraper.py', '--school', school]
+    clean = [['python3', 'clean_subject_catalog.py']]
+    clean_outputs = ['results/all_courses_cleaned.json']
+    if term and year:
+        discover += ['--term', term, '--year', year]
+        term_file = f"results/cleaned_{term.lower()}{year}.json"
+        clean.append(['cp', 'results/all_courses_cleaned.json', term_file])
+        clean_outputs.append(term_file)
+
+    stages = [
+        Stage('discover', [discover],
+              outputs=[f'results/{school}_course_lines.txt'], volatile=True),
+        Stage('scrape', [['python3', 'parallel_scraper_with_reuse.py', f'results/{school}_course_lines.txt']],
+              deps=['discover'], outputs=['results/all_courses.json'], volatile=True,
+              ignore_keys={'results/all_courses.json': ['timestamp']}),
+        Stage('clean', clean, deps=['scrape'],
+              inputs=['results/all_courses.json', 'clean_subject_catalog.py'], outputs=clean_outputs,
+              ignore_keys={'results/all_courses.json': ['timestamp']}),
+        Stage('qguide-analyze', [['python3', 'analyzer.py', '--split-sections']], cwd='qguide',
+              inputs=['qguide/QGuides.db', 'qguide/courses_by_fas_id.json', 'qguide/analyzer.py',
+                      'qguide/analysis_cache.py', 'qguide/distributions.py', 'qguide/report_store.py',
+                      'qguide/semester.py'],
+              outputs=['qguide/results/course_analytics.json'],
+              optional_outputs=['qguide/results/course_sections.json', 'qguide/results/rating_distributions.npz']),
+        Stage('merge', [['python3', 'master_merge.py', '--incremental', '--deltas', '5', '--search-index', '--time-index']],
+              deps=['clean', 'qguide-analyze'],
+              inputs=['results/cleaned_*.json', 'results/all_courses_cleaned.json',
+                      'qguide/results/course_analytics.json', 'master_merge.py', 'catalog_deltas.py',
+                      'catalog_encoding.py', 'catalog_shards.py', 'location_store.py', 'search_index.py',
+                      'section_times.py'],
+              outputs=['results/master_courses.json', 'results/last_updated.json'],
+              optional_outputs=['results/search_index.json', 'results/section_times.json',
+                                'results/deltas/manifest.json']),
+        Stage('publish', [['python3', 'publish.py']], deps=['merge'],
+              inputs=['results/master_courses.json', 'results/last_updated.json', 'results/search_index.json',
+                      'results/section_times.json', 'results/deltas/manifest.json',
+                      'results/master_courses.columnar.json', 'results/catalog/manifest.json',
+                      'qguide/results/course_sections.json', 'publish.py'],
+              outputs=['../public/data/config.json', '../public/data/master_courses.json']),
+    ]
+    return {stage.name: stage for stage in stages}
+
+
+def file_fingerprint(path: str, ignore_keys: Sequence[str] = ()) -> str:
+    """
+    sha256 of a file's contents. With ignore_keys, the file is a JSON list of
+    records and those keys are dropped from each record before hashing.
+    """
+    if ignore_keys:
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        digest = hashlib.sha256()
+        for record in records:
+            if isinstance(record, dict):
+                record = {key: value for key, value in record.items() if key not in ignore_keys}
+            digest.update(json.dumps(record, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+            digest.update(b'\n')
+        return 'json:' + digest.hexdigest()
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_files(patterns: Sequence[str], ignore_keys: Dict[str, Sequence[str]]) -> Dict[str, Optional[str]]:
+    """{path: hash} for every file matching the patterns; plain paths that do not exist map to None."""
+    hashes = {}
+    for pattern in patterns:
+        paths = sorted(glob(pattern)) if any(char in pattern for char in '*?[') else [pattern]
+        for path in paths:
+            hashes[path] = file_fingerprint(path, ignore_keys.get(path, ())) if os.path.exists(path) else None
+    return hashes
+
+
+def load_state(path: str = DAG_STATE_FILE) -> Dict:
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') == DAG_STATE_VERSION:
+            return state
+    return {'version': DAG_STATE_VERSION, 'stages': {}}
+
+
+def save_state(state: Dict, path: str = DAG_STATE_FILE):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def up_to_date(stage: Stage, record: Optional[Dict], offline: bool = False) -> Optional[str]:
+    """Why the stage can be skipped, or None if it has to run."""
+    if any(not os.path.exists(path) for path in stage.outputs):
+        return None
+    if stage.volatile:
+        return 'offline, reusing outputs' if offline else None
+    if not record or record.get('commands') != stage.commands:
+        return None
+    if fingerprint_files(stage.inputs, stage.ignore_keys) != record.get('inputs'):
+        return None
+    if fingerprint_files(stage.outputs + stage.optional_outputs, stage.ignore_keys) != record.get('outputs'):
+        return None
+    return 'inputs and outputs unchanged'
+
+
+def run_stage(stage: Stage) -> bool:
+    """Run the stage's commands in order, prefixing their output with the stage name."""
+    for command in stage.commands:
+        process = subprocess.Popen(command, cwd=stage.cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   text=True, errors='replace')
+        for line in process.stdout:
+            with _print_lock:
+                print(f"[{stage.name}] {line}", end='', flush=True)
+        if process.wait() != 0:
+            with _print_lock:
+                print(f"[{stage.name}] {' '.join(command)} exited with {process.returncode}")
+            return False
+    missing = [path for path in stage.outputs if not os.path.exists(path)]
+    if missing:
+        with _print_lock:
+            print(f"[{stage.name}] did not write {', '.join(missing)}")
+        return False
+    return True
+
+
+def run_dag(stages: Dict[str, Stage], targets: Sequence[str] = None, force: Sequence[str] = (),
+            offline: bool = False, jobs: int = 4, dry_run: bool = False, state_file: str = DAG_STATE_FILE) -> bool:
+    """
+    Run the targets (default: every stage) and their dependencies, skipping up-to-date stages.
+
+    Returns:
+        Whether every stage succeeded or was skipped
+    """
+    needed = set()
+    pending_targets = list(targets or stages)
+    while pending_targets:
+        name = pending_targets.pop()
+        if name not in needed:
+            needed.add(name)
+            pending_targets.extend(stages[name].deps)
+    order = [name for name in stages if name in needed]
+
+    state = load_state(state_file)
+    force = set(stages) if 'all' in force else set(force)
+    status = {}
+    timings = {}
+
+    if dry_run:
+        for name in order:
+            stage = stages[name]
+            if any(status.get(dep) in ('run', 'maybe') for dep in stage.deps):
+                status[name] = 'maybe'
+                print(f"{name:<16} runs if its inputs change")
+                continue
+            reason = None if name in force else up_to_date(stage, state['stages'].get(name), offline)
+            status[name] = 'skip' if reason else 'run'
+            print(f"{name:<16} {'skip (' + reason + ')' if reason else 'run'}")
+        return True
+
+    def start(name):
+        stage = stages[name]
+        reason = None if name in force else up_to_date(stage, state['stages'].get(name), offline)
+        if reason:
+            return name, 'skipped', reason, 0.0
+        with _print_lock:
+            print(f"=== {name}: running {' && '.join(' '.join(command) for command in stage.commands)}")
+        began = time.time()
+        ok = run_stage(stage)
+        seconds = time.time() - began
+        if ok and not stage.volatile:
+            # Hashed after the run, so inputs the stage updates itself do not count as changes next time
+            record = {
+                'commands': stage.commands,
+                'inputs': fingerprint_files(stage.inputs, stage.ignore_keys),
+                'outputs': fingerprint_files(stage.outputs + stage.optional_outputs, stage.ignore_keys),
+                'finished': datetime.now().isoformat(timespec='seconds'),
+                'seconds': round(seconds, 2),
+            }
+            with _state_lock:
+                state['stages'][name] = record
+        return name, 'ran' if ok else 'failed', None, seconds
+
+    remaining = list(order)
+    running = {}
+    failed = False
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while remaining or running:
+            if not failed:
+                for name in list(remaining):
+                    if len(running) >= jobs:
+                        break
+                    if all(status.get(dep) in ('ran', 'skipped') for dep in stages[name].deps):
+                        remaining.remove(name)
+                        running[pool.submit(start, name)] = name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                name, result, reason, seconds = future.result()
+                status[name] = result
+                timings[name] = seconds
+                with _print_lock:
+                    print(f"=== {name}: {result}" + (f" ({reason})" if reason else f" in {seconds:.2f}s"))
+                if result == 'ran':
+                    with _state_lock:
+                        save_state(state, state_file)
+                elif result == 'failed':
+                    failed = True
+
+    print("\n" + "=" * 60)
+    print("PIPELINE STAGES:")
+    print("=" * 60)
+    for name in order:
+        result = status.get(name, 'not run')
+        print(f"{name:<16} {result:<8} {timings[name]:8.2f}s" if result in ('ran', 'failed') else f"{name:<16} {result}")
+    return not failed
+
+
+def main():
+    # Run from scraper/, like the other scripts
+    parser = argparse.ArgumentParser(description='Run the scraper pipeline stages, skipping the ones that are up to date')
+    parser.add_argument('targets', nargs='*',
+                        help='Stages to bring up to date, with their dependencies (default: all, '
+                             'e.g. "merge" to stop before publishing)')
+    parser.add_argument('--term', help='Term to scrape (Fall or Spring); keeps a per-term cleaned file like run_single_term.sh')
+    parser.add_argument('--year', help='Year to scrape, e.g. 2026')
+    parser.add_argument('--school', default='All', help='School code for discovery (default: All)')
+    parser.add_argument('--offline', action='store_true',
+                        help='Do not discover or scrape if their outputs exist (like quick_update.sh)')
+    parser.add_argument('--force', action='append', default=[], metavar='STAGE',
+                        help='Run this stage even if it is up to date ("all" for every stage); repeatable')
+    parser.add_argument('--jobs', type=int, default=4, help='Stages run at the same time (default: 4)')
+    parser.add_argument('--dry-run', action='store_true', help='Only print which stages would run')
+    parser.add_argument('--state-file', default=DAG_STATE_FILE, help=f'Stage hash record (default: {DAG_STATE_FILE})')
+    args = parser.parse_args()
+
+    if bool(args.term) != bool(args.year):
+        parser.error('--term and --year go together')
+    stages = build_stages(args.term, args.year, args.school)
+    unknown = [name for name in args.targets + args.force if name not in stages and name != 'all']
+    if unknown:
+        parser.error(f"unknown stage(s) {', '.join(unknown)}; stages are {', '.join(stages)}")
+
+    ok = run_dag(stages, args.targets or None, args.force, args.offline, args.jobs, args.dry_run, args.state_file)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Publish merged course data to public/data as precompressed, content-hashed files.
+
+Each artifact is minified and written as <name>.<hash>.json plus .gz and .br
+variants at maximum compression. A manifest listing them is written as
+manifest.<hash>.json and referenced from config.json as "dataManifest". When
+the data is byte-for-byte what is already published, nothing is written, so
+no-op runs leave every cached file valid.
+
+The sharded catalog (master_merge.py --sharded) is published with the set: its
+content-hashed index and shards are copied into catalog/ and its manifest is
+listed in the data manifest, so a reader never mixes files of two versions.
+
+The plain master_courses.json and last_updated.json are still written (minified)
+for readers that use the fixed paths.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from glob import glob
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_VERSION = 1
+
+# (name, source file, required, also written to the plain <name>.json path)
+ARTIFACTS = [
+    ('master_courses', 'results/master_courses.json', True, True),
+    ('course_sections', 'qguide/results/course_sections.json', False, True),
+    ('master_courses_columnar', 'results/master_courses.columnar.json', False, False),
+    ('search_index', 'results/search_index.json', False, False),
+    ('section_times', 'results/section_times.json', False, False),
+    ('master_courses_deltas', 'results/deltas/manifest.json', False, False),
+    ('catalog', 'results/catalog/manifest.json', False, False),
+]
+
+# Delta files listed by the master_courses_deltas manifest (see catalog_deltas.py),
+# published unhashed under public/data/deltas: their names already identify their content
+DELTA_SOURCE_DIR = 'results/deltas'
+DELTA_PUBLIC_DIR = 'deltas'
+
+# Index and detail shards listed by the catalog manifest (see catalog_shards.py), published
+# under public/data/catalog; their names hold their content hash, so files in use are never replaced
+CATALOG_SOURCE_DIR = 'results/catalog'
+CATALOG_PUBLIC_DIR = 'catalog'
+
+# Published, but not part of the content hash: it changes on every run
+TIMESTAMP_ARTIFACT = ('last_updated', 'results/last_updated.json')
+
+
+def minify(data) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def minify_file(path: str) -> bytes:
+    with open(path, 'r', encoding='utf-8') as f:
+        return minify(json.load(f))
+
+
+def load_artifacts(data: Optional[Dict[str, object]] = None) -> List[Tuple[str, bytes, bool]]:
+    """
+    Return (name, minified body, write plain copy) for every artifact that exists.
+
+    data maps artifact names to values already in memory, which are used instead
+    of their source files; a None value means the artifact is not published.
+    """
+    data = data or {}
+    artifacts = []
+    for name, path, required, plain in ARTIFACTS:
+        if name in data:
+            if data[name] is not None:
+                artifacts.append((name, minify(data[name]), plain))
+            elif required:
+                raise ValueError(f"{name} is required")
+            continue
+        if not os.path.exists(path):
+            if required:
+                raise FileNotFoundError(f"{path} not found - run master_merge.py first")
+            continue
+        artifacts.append((name, minify_file(path), plain))
+    return artifacts
+
+
+def content_hash(artifacts: List[Tuple[str, bytes, bool]]) -> str:
+    digest = hashlib.sha256()
+    for name, body, _ in artifacts:
+        digest.update(name.encode('utf-8') + b'\0' + hashlib.sha256(body).digest())
+    return digest.hexdigest()
+
+
+def write_bytes(path: str, data: bytes):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_variants(public_dir: str, name: str, body: bytes) -> Dict[str, object]:
+    """Write <name>.<hash>.json and its .gz/.br variants; return the manifest entry."""
+    file_hash = hashlib.sha256(body).hexdigest()
+    path = f"{name}.{file_hash[:10]}.json"
+    entry = {'path': path, 'sha256': file_hash, 'bytes': len(body)}
+
+    write_bytes(os.path.join(public_dir, path), body)
+
+    gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+    write_bytes(os.path.join(public_dir, path + '.gz'), gzipped)
+    entry['gzip'] = path + '.gz'
+    entry['gzip_bytes'] = len(gzipped)
+
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=11)
+        write_bytes(os.path.join(public_dir, path + '.br'), compressed)
+        entry['brotli'] = path + '.br'
+        entry['brotli_bytes'] = len(compressed)
+    return entry
+
+
+def publish_deltas(public_dir: str, delta_manifest_body: bytes) -> int:
+    """Mirror the current delta files (with .gz/.br variants) into public_dir/deltas. Returns how many were written."""
+    delta_manifest = json.loads(delta_manifest_body)
+    target_dir = os.path.join(public_dir, DELTA_PUBLIC_DIR)
+    os.makedirs(target_dir, exist_ok=True)
+
+    current = set()
+    written = 0
+    for entry in delta_manifest.get('deltas', {}).values():
+        name = entry['path']
+        current.update((name, name + '.gz', name + '.br'))
+        target = os.path.join(target_dir, name)
+        if os.path.exists(target):
+            continue
+        with open(os.path.join(DELTA_SOURCE_DIR, name), 'rb') as f:
+            body = f.read()
+        write_bytes(target, body)
+        write_bytes(target + '.gz', gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli is not None:
+            write_bytes(target + '.br', brotli.compress(body, quality=11))
+        written += 1
+
+    for name in os.listdir(target_dir):
+        if name not in current:
+            os.remove(os.path.join(target_dir, name))
+    return written
+
+
+def catalog_files(catalog_manifest: Dict) -> List[str]:
+    """Paths of the index and detail shards a catalog manifest lists, relative to the catalog directory."""
+    return [catalog_manifest['index'], *catalog_manifest['shards'].values()]
+
+
+def publish_catalog(public_dir: str, catalog_manifest_body: bytes) -> int:
+    """Copy the catalog files that are not published yet into public_dir/catalog. Returns how many were written."""
+    written = 0
+    for name in catalog_files(json.loads(catalog_manifest_body)):
+        target = os.path.join(public_dir, CATALOG_PUBLIC_DIR, name)
+        if os.path.exists(target):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(os.path.join(CATALOG_SOURCE_DIR, name), 'rb') as f:
+            write_bytes(target, f.read())
+        written += 1
+    return written
+
+
+def published_catalog_files(public_dir: str, manifest_name: str) -> Set[str]:
+    """Catalog files used by a published data manifest (none if it has no catalog)."""
+    path = os.path.join(public_dir, manifest_name)
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        entry = json.load(f).get('files', {}).get('catalog')
+    if not entry or not os.path.exists(os.path.join(public_dir, entry['path'])):
+        return set()
+    with open(os.path.join(public_dir, entry['path']), 'r', encoding='utf-8') as f:
+        return set(catalog_files(json.load(f)))
+
+
+def remove_stale_catalog(public_dir: str, keep_manifests: List[str]) -> int:
+    """Delete files under public_dir/catalog that none of keep_manifests uses. Returns the number removed."""
+    catalog_dir = os.path.join(public_dir, CATALOG_PUBLIC_DIR)
+    if not os.path.isdir(catalog_dir):
+        return 0
+    keep = set()
+    for manifest_name in keep_manifests:
+        keep.update(published_catalog_files(public_dir, manifest_name))
+
+    removed = 0
+    for root, _, names in os.walk(catalog_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            if os.path.relpath(path, catalog_dir).replace(os.sep, '/') not in keep:
+                os.remove(path)
+                removed += 1
+    for root, _, _ in os.walk(catalog_dir, topdown=False):
+        if not os.listdir(root):
+            os.rmdir(root)
+    return removed
+
+
+def manifest_files(public_dir: str, manifest_name: str) -> List[str]:
+    """Every file a published manifest refers to, including the manifest itself."""
+    path = os.path.join(public_dir, manifest_name)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    files = [manifest_name]
+    for entry in manifest.get('files', {}).values():
+        files.extend(entry[key] for key in ('path', 'gzip', 'brotli') if key in entry)
+    return files
+
+
+def remove_stale(public_dir: str, keep_manifests: List[str]) -> int:
+    """Delete files of manifests other than keep_manifests. Returns the number removed."""
+    keep = set()
+    for manifest_name in keep_manifests:
+        keep.update(manifest_files(public_dir, manifest_name))
+
+    removed = 0
+    for manifest_path in glob(os.path.join(public_dir, 'manifest.*.json')):
+        manifest_name = os.path.basename(manifest_path)
+        if manifest_name in keep_manifests:
+            continue
+        for name in manifest_files(public_dir, manifest_name):
+            path = os.path.join(public_dir, name)
+            if name not in keep and os.path.exists(path):
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def publish(public_dir: str = '../public/data', force: bool = False,
+            data: Optional[Dict[str, object]] = None) -> Optional[Dict]:
+    """
+    Publish the merged data to public_dir.
+
+    data optionally holds in-memory artifacts, keyed by artifact name or
+    'last_updated' (see load_artifacts); the rest are read from results/.
+
+    Returns:
+        The new manifest, or None if the published data was already current
+    """
+    data = data or {}
+    artifacts = load_artifacts(data)
+    data_hash = content_hash(artifacts)
+    manifest_name = f"manifest.{data_hash[:10]}.json"
+
+    config_path = os.path.join(public_dir, 'config.json')
+    config = {}
+    if os.path.exists(config_path):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    previous_manifest = config.get('dataManifest')
+
+    if (not force and previous_manifest == manifest_name
+            and os.path.exists(os.path.join(public_dir, manifest_name))):
+        print(f"Published data is unchanged ({data_hash[:10]}), skipping publish")
+        return None
+
+    os.makedirs(public_dir, exist_ok=True)
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'content_hash': data_hash,
+        'published': datetime.now().isoformat(),
+        'files': {},
+    }
+
+    for name, body, plain in artifacts:
+        if name == 'master_courses_deltas':
+            written = publish_deltas(public_dir, body)
+            manifest['delta_dir'] = DELTA_PUBLIC_DIR + '/'
+            print(f"  {DELTA_PUBLIC_DIR}/: {written} new delta files")
+        if name == 'catalog':
+            written = publish_catalog(public_dir, body)
+            manifest['catalog_dir'] = CATALOG_PUBLIC_DIR + '/'
+            print(f"  {CATALOG_PUBLIC_DIR}/: {written} new index and shard files")
+        entry = write_variants(public_dir, name, body)
+        manifest['files'][name] = entry
+        if plain:
+            write_bytes(os.path.join(public_dir, f"{name}.json"), body)
+        print(f"  {entry['path']}: {entry['bytes'] / 1e6:.2f} MB, gzip {entry['gzip_bytes'] / 1e6:.2f} MB"
+              + (f", brotli {entry['brotli_bytes'] / 1e6:.2f} MB" if 'brotli_bytes' in entry else ''))
+
+    timestamp_name, timestamp_path = TIMESTAMP_ARTIFACT
+    body = None
+    if data.get(timestamp_name) is not None:
+        body = minify(data[timestamp_name])
+    elif os.path.exists(timestamp_path):
+        body = minify_file(timestamp_path)
+    if body is not None:
+        manifest['files'][timestamp_name] = write_variants(public_dir, timestamp_name, body)
+        write_bytes(os.path.join(public_dir, f"{timestamp_name}.json"), body)
+
+    # Manifest before config.json, so config never references a missing manifest
+    write_bytes(os.path.join(public_dir, manifest_name), json.dumps(manifest, indent=2).encode('utf-8'))
+    config['dataManifest'] = manifest_name
+    write_bytes(config_path, (json.dumps(config, indent=2) + '\n').encode('utf-8'))
+
+    # Keep the previous generation for clients that loaded the old config.json
+    keep = [manifest_name] + ([previous_manifest] if previous_manifest else [])
+    removed = remove_stale(public_dir, keep)
+    # Also withdraws a catalog this run did not publish, so no stale shards sit next to the new master
+    removed += remove_stale_catalog(public_dir, keep)
+
+    print(f"Published {len(manifest['files'])} files as {manifest_name}"
+          + (f", removed {removed} stale files" if removed else ''))
+    if brotli is None:
+        print("Warning: brotli is not installed, no .br files were written")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Publish merged course data to public/data')
+    parser.add_argument('--public-dir', default='../public/data', help='Output directory (default: ../public/data)')
+    parser.add_argument('--force', action='store_true', help='Publish even if the data is unchanged')
+    args = parser.parse_args()
+
+    publish(args.public_dir, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# persistent per-report analysis results, so only new or changed reports get parsed again
+
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from report_store import ReportKey, ReportStore
+
+
+class AnalysisCache:
+    def __init__(self, store: ReportStore, version: int):
+        """
+        Attach the analysis cache to a report store.
+
+        Entries hold the metrics extracted from one report together with the
+        size, stored_at timestamp and sha256 of the report they came from.
+        Entries written with a different extractor version are ignored.
+
+        Args:
+            store: Report store (shares its SQLite connection)
+            version: Extractor version; bump it when extraction logic changes
+        """
+        self.conn = store.conn
+        self.version = version
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                fas_id TEXT NOT NULL,
+                semester_year TEXT NOT NULL,
+                professor TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at TEXT,
+                sha256 TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                metrics TEXT,
+                PRIMARY KEY (fas_id, semester_year, professor)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def entries(self) -> Dict[ReportKey, Tuple[int, str, str, Optional[Dict[str, Any]]]]:
+        """Return key -> (size, stored_at, sha256, metrics) for current-version entries.
+
+        metrics is None for reports that were analyzed but could not be parsed.
+        """
+        rows = self.conn.execute(
+            'SELECT fas_id, semester_year, professor, size, stored_at, sha256, metrics '
+            'FROM analysis_cache WHERE version = ?', (self.version,))
+        return {
+            (fas_id, semester_year, professor): (size, stored_at, sha256, json.loads(metrics) if metrics else None)
+            for fas_id, semester_year, professor, size, stored_at, sha256, metrics in rows
+        }
+
+    def split(self, index: Dict[ReportKey, Tuple[int, str, str]]):
+        """
+        Split stored reports into cached metrics and keys that need parsing.
+
+        A report is a hit when size and stored_at match (the cheap check) or,
+        failing that, when its content hash matches. Cache entries for reports
+        that are not in the store at all (e.g. streamed without keeping HTML)
+        are kept as hits.
+
+        Args:
+            index: key -> (size, stored_at, sha256) from ReportStore.index()
+
+        Returns:
+            Tuple of (key -> metrics for hits, list of keys to parse)
+        """
+        entries = self.entries()
+        hits = {}
+        stale = []
+
+        for key, (size, stored_at, sha256) in index.items():
+            entry = entries.get(key)
+            if entry is None:
+                stale.append(key)
+            elif entry[0] == size and entry[1] == stored_at:
+                hits[key] = entry[3]
+            elif entry[2] == sha256:
+                hits[key] = entry[3]
+                # Re-stored with identical content: refresh the cheap check
+                self.conn.execute(
+                    'UPDATE analysis_cache SET size = ?, stored_at = ? '
+                    'WHERE fas_id = ? AND semester_year = ? AND professor = ?',
+                    (size, stored_at, *key))
+            else:
+                stale.append(key)
+
+        for key, entry in entries.items():
+            if key not in index:
+                hits[key] = entry[3]
+
+        return hits, stale
+
+    def put(self, key: ReportKey, size: int, stored_at: Optional[str], sha256: str,
+            metrics: Optional[Dict[str, Any]]):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO analysis_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (*key, size, stored_at or datetime.now().isoformat(), sha256, self.version,
+             json.dumps(metrics) if metrics is not None else None))
+
+    def commit(self):
+        self.conn.commit()
+
+    def clear(self, index: Dict[ReportKey, Tuple[int, str, str]]) -> int:
+        """
+        Drop the entries of the given stored reports, so they are parsed again.
+
+        Entries for reports that are not in the store (streamed without keeping
+        HTML) are the only copy of those metrics, so they are never dropped.
+
+        Args:
+            index: key -> (size, stored_at, sha256) from ReportStore.index()
+
+        Returns:
+            Number of current-version entries kept because their report has no stored HTML
+        """
+        self.conn.executemany(
+            'DELETE FROM analysis_cache WHERE fas_id = ? AND semester_year = ? AND professor = ?', index.keys())
+        self.conn.commit()
+        return self.conn.execute(
+            'SELECT COUNT(*) FROM analysis_cache WHERE version = ?', (self.version,)).fetchone()[0]
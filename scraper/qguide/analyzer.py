@@ -1,14 +1,35 @@
+import argparse
 import json
 import os
 import statistics
+import sys
+import time
 from collections import defaultdict
 from concurrent.futures import ProcessPoolExecutor, as_completed
-from glob import glob
 import multiprocessing
 
 from bs4 import BeautifulSoup
+import numpy as np
+from lxml import etree
 from tqdm import tqdm
 
+from analysis_cache import AnalysisCache
+from distributions import DEFAULT_DISTRIBUTIONS_PATH, RatingDistributions
+from report_store import DEFAULT_STORE_PATH, ReportStore, parse_report_filename
+from semester import latest_semester, sort_semesters
+
+# Bump when extraction logic changes so cached per-report results are recomputed
+EXTRACTOR_VERSION = 2
+
+# Fields of an analyze_report result that come from the report HTML itself
+METRIC_FIELDS = ('num_students', 'course_rating', 'hours_per_week')
+
+# Per-question response distributions, also cached (see distributions.py)
+DISTRIBUTION_FIELDS = ('rating_responses', 'rating_histogram', 'workload_responses', 'workload_summary')
+
+# Per-section detail, keyed by FAS ID then semester, when written separately (--split-sections)
+SECTIONS_FILE = 'results/course_sections.json'
+
 
 def process_rows(raw_rows):
     """Extract text from table rows."""
@@ -17,7 +38,11 @@ def process_rows(raw_rows):
 
 def get_stats(raw_rows):
     """Calculate statistics from rating distribution."""
-    rows = process_rows(raw_rows)
+    return stats_from_text(process_rows(raw_rows))
+
+
+def stats_from_text(rows):
+    """Calculate statistics from the text of the rating distribution cells."""
     try:
         if int(rows[0]) == 0:
             # no one answered this question
@@ -42,6 +67,25 @@ def get_stats(raw_rows):
         return None
 
 
+def distribution_from_text(rows):
+    """
+    Return (responses, histogram) from the text of the rating distribution cells.
+
+    histogram is the percentage of respondents giving each score from 1 to 5,
+    or None if the row has no usable distribution.
+    """
+    try:
+        responses = int(rows[0])
+        freqs = [int(x[:-1]) for x in rows[1:-2]]
+    except (ValueError, IndexError):
+        return 0, None
+    if responses == 0 or len(freqs) != 5:
+        return responses, None
+    # Cells run from the best score down
+    freqs.reverse()
+    return responses, freqs
+
+
 def get_table_with(tables, th_text):
     """Find table with specific header text."""
     for table in tables:
@@ -53,26 +97,125 @@ def get_table_with(tables, th_text):
     return None
 
 
-def analyze_file_batch(file_batch, courses_data):
-    """Analyze a batch of files - used by worker processes."""
+# Course mapping index built once per worker process by init_worker
+_worker_offering_index = None
+
+
+def init_worker(courses_file='courses_by_fas_id.json'):
+    """Process pool initializer: load and index the course mapping once per worker."""
+    global _worker_offering_index
+    _worker_offering_index = OfferingIndex.from_file(courses_file)
+
+
+def analyze_report_in_worker(page_text, key):
+    """Analyze one report using the course mapping loaded by init_worker."""
+    return analyze_report(page_text, key, _worker_offering_index)
+
+
+def analyze_file_batch(key_batch, store_path=DEFAULT_STORE_PATH):
+    """Analyze a batch of stored reports - used by worker processes set up with init_worker.
+
+    Returns (key, result) pairs; result is None for reports that could not be parsed.
+    """
     results = []
     
-    for filepath in file_batch:
-        result = analyze_single_file(filepath, courses_data)
-        if result:
-            results.append(result)
+    with ReportStore(store_path, readonly=True) as store:
+        for key, page_text in store.iter_reports(key_batch):
+            results.append((key, analyze_report(page_text, key, _worker_offering_index)))
     
     return results
 
 
-def analyze_single_file(filepath, courses_data):
+def analyze_single_file(filepath, offering_index):
     """Analyze a single Q guide HTML file."""
+    key = parse_report_filename(filepath)
+    if key is None:
+        return None
+
     try:
         with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
             page_text = f.read()
     except Exception:
         return None
-    
+
+    return analyze_report(page_text, key, offering_index)
+
+
+class OfferingIndex:
+    def __init__(self, courses_data):
+        """
+        Hashed lookup of course code/title per report, built once from courses_by_fas_id data.
+
+        Offerings are keyed by (fas_id, semester_year, professor) with the
+        professor in its spaced form; the first offering wins, as the old
+        linear scan did. Each FAS ID also keeps its first code/title as the
+        fallback for reports without an exact offering match.
+        """
+        self.by_offering = {}
+        self.fallback = {}
+        for fas_id, course_info in courses_data.items():
+            for offering in course_info.get('offerings', []):
+                offering_key = (fas_id, offering.get('semester_year'), offering.get('professor'))
+                if offering_key not in self.by_offering:
+                    self.by_offering[offering_key] = (offering.get('course_code', 'UNKNOWN'),
+                                                      offering.get('course_title', ''))
+            course_codes = course_info.get('course_codes', [])
+            course_titles = course_info.get('course_titles', [])
+            self.fallback[fas_id] = (course_codes[0] if course_codes else 'UNKNOWN',
+                                     course_titles[0] if course_titles else '')
+
+    @classmethod
+    def from_file(cls, courses_file='courses_by_fas_id.json'):
+        with open(courses_file, 'r') as f:
+            return cls(json.load(f))
+
+    def lookup(self, key):
+        """Return (course_code, course_title) for a report key."""
+        fas_id, semester_year, professor = key
+        match = self.by_offering.get((fas_id, semester_year, professor.replace('_', ' ')))
+        if match is not None:
+            return match
+        return self.fallback.get(fas_id, ('UNKNOWN', ''))
+
+
+def workload_from_text(workload_text):
+    """Pick the mean hours per week out of the workload table cells."""
+    # Look for the mean value in the last 4 elements
+    for val in workload_text[-4:]:
+        try:
+            if val and val != 'N/A':
+                return float(val.split(',')[0])
+        except (ValueError, AttributeError):
+            continue
+    return 0
+
+
+def workload_summary_from_text(workload_text):
+    """
+    Return (responses, summary) from the workload table cells.
+
+    summary holds the last four cells as numbers (mean first, as read by
+    workload_from_text), with None for cells that are not numeric.
+    """
+    try:
+        responses = int(workload_text[0])
+    except (ValueError, IndexError):
+        responses = 0
+    summary = []
+    for val in workload_text[-4:]:
+        try:
+            summary.append(float(val.split(',')[0]))
+        except (ValueError, AttributeError):
+            summary.append(None)
+    return responses, summary
+
+
+def extract_metrics(page_text):
+    """Reference extractor: parse the whole report with BeautifulSoup.
+
+    Returns a dict with num_students, course_rating and hours_per_week, or
+    None if the page does not look like a report.
+    """
     # Parse HTML
     try:
         soup = BeautifulSoup(page_text, 'html.parser')
@@ -85,42 +228,6 @@ def analyze_single_file(filepath, courses_data):
     
     result = {}
     
-    # Extract filename info
-    filename = os.path.basename(filepath)
-    parts = filename.replace('.html', '').split('_')
-    if len(parts) < 3:
-        return None
-    
-    fas_id = parts[0]
-    semester_year = parts[1]
-    professor = '_'.join(parts[2:])
-    
-    result['fas_id'] = fas_id
-    result['semester_year'] = semester_year
-    result['professor'] = professor
-    
-    # Get course code and title from pre-loaded data
-    if fas_id in courses_data:
-        # Find the course code and title for this specific semester/professor
-        found = False
-        for offering in courses_data[fas_id].get('offerings', []):
-            if (offering.get('semester_year') == semester_year and 
-                offering.get('professor') == professor.replace('_', ' ')):
-                result['course_code'] = offering.get('course_code', 'UNKNOWN')
-                result['course_title'] = offering.get('course_title', '')
-                found = True
-                break
-        
-        if not found:
-            # Use the first course code/title if no exact match
-            course_codes = courses_data[fas_id].get('course_codes', [])
-            course_titles = courses_data[fas_id].get('course_titles', [])
-            result['course_code'] = course_codes[0] if course_codes else 'UNKNOWN'
-            result['course_title'] = course_titles[0] if course_titles else ''
-    else:
-        result['course_code'] = 'UNKNOWN'
-        result['course_title'] = ''
-    
     # Number of students (invited count) - optimized parsing
     result['num_students'] = 0
     response_rate_table = get_table_with(tables, 'Invited')
@@ -160,84 +267,200 @@ def analyze_single_file(filepath, courses_data):
         workload_table = get_table_with(tables, 'Response Count')
     
     if workload_table:
+        workload_rows = workload_table.find_all('td')
+        if workload_rows:
+            result['hours_per_week'] = workload_from_text(process_rows(workload_rows))
+    
+    return result
+
+
+# Table headers the fast extractor looks for
+REPORT_TABLE_HEADERS = {'Invited', 'Responded', 'Evaluate the course overall.', 'Hours per week', 'Response Count'}
+
+_html_parser = etree.HTMLParser(encoding='utf-8')
+
+
+def _element_text(element):
+    # XPath string value, i.e. all descendant text without comments - same as bs4's .text
+    return element.xpath('string()').strip()
+
+
+def extract_metrics_fast(page_text):
+    """Extract the same metrics as extract_metrics using lxml.
+
+    The report is parsed by libxml2 and only the first row header of each
+    tbody is read, in a single pass, to find the few tables we need. The
+    result also carries the DISTRIBUTION_FIELDS.
+    """
+    try:
+        root = etree.HTML(page_text.encode('utf-8'), _html_parser)
+    except (etree.ParserError, ValueError):
+        return None
+    if root is None:
+        return None
+
+    tbodies = list(root.iter('tbody'))
+    if len(tbodies) < 3:
+        return None
+
+    # Map header text -> (tbody, first row), keeping the first match like get_table_with
+    tables = {}
+    for tbody in tbodies:
+        first_row = next(tbody.iter('tr'), None)
+        if first_row is None:
+            continue
+        header_cell = next(first_row.iter('th'), None)
+        if header_cell is None:
+            continue
+        header = _element_text(header_cell)
+        if header in REPORT_TABLE_HEADERS and header not in tables:
+            tables[header] = (tbody, first_row)
+
+    result = {'num_students': 0, 'course_rating': 0, 'hours_per_week': 0,
+              'rating_responses': 0, 'rating_histogram': None, 'workload_responses': 0, 'workload_summary': None}
+
+    if 'Invited' in tables:
+        tds = [_element_text(td) for td in tables['Invited'][0].iter('td')]
         try:
-            workload_rows = workload_table.find_all('td')
-            if workload_rows:
-                workload_text = process_rows(workload_rows)
-                # Look for the mean value in the last 4 elements
-                for val in workload_text[-4:]:
-                    try:
-                        if val and val != 'N/A':
-                            result['hours_per_week'] = float(val.split(',')[0])
-                            break
-                    except (ValueError, AttributeError):
-                        continue
-        except AttributeError:
+            if tds:
+                result['num_students'] = int(tds[0])
+        except ValueError:
             pass
-    
+    elif 'Responded' in tables:
+        tds = [_element_text(td) for td in tables['Responded'][0].iter('td')]
+        try:
+            if len(tds) > 1:
+                result['num_students'] = int(tds[1])
+        except ValueError:
+            pass
+
+    if 'Evaluate the course overall.' in tables:
+        first_row = tables['Evaluate the course overall.'][1]
+        rating_text = [_element_text(td) for td in first_row.iter('td')]
+        course_rating = stats_from_text(rating_text)
+        result['course_rating'] = course_rating if course_rating else 0
+        result['rating_responses'], result['rating_histogram'] = distribution_from_text(rating_text)
+
+    workload_table = tables.get('Hours per week') or tables.get('Response Count')
+    if workload_table:
+        workload_text = [_element_text(td) for td in workload_table[0].iter('td')]
+        if workload_text:
+            result['hours_per_week'] = workload_from_text(workload_text)
+            result['workload_responses'], result['workload_summary'] = workload_summary_from_text(workload_text)
+
     return result
 
 
-def get_semester_order():
-    """Return the ordered list of semesters from oldest to newest."""
-    semesters = []
-    for year in range(2021, 2026):
-        semesters.append(f"{year}Spring")
-        semesters.append(f"{year}Fall")
-    return semesters
+def analyze_report(page_text, key, offering_index, extractor=extract_metrics_fast):
+    """Analyze the HTML of a single Q guide report identified by (fas_id, semester, professor)."""
+    metrics = extractor(page_text)
+    if metrics is None:
+        return None
+    return build_result(key, metrics, offering_index)
+
+
+def build_result(key, metrics, offering_index):
+    """Combine extracted report metrics with the course code/title for the report key."""
+    fas_id, semester_year, professor = key
+    course_code, course_title = offering_index.lookup(key)
+
+    result = {
+        'fas_id': fas_id,
+        'semester_year': semester_year,
+        'professor': professor,
+        'course_code': course_code,
+        'course_title': course_title,
+    }
+    result.update(metrics)
+    return result
 
 
 def get_latest_semester(available_semesters):
     """Get the latest semester from a list of available semesters."""
-    semester_order = get_semester_order()
-    
-    # Find the latest semester that exists in available_semesters
-    for semester in reversed(semester_order):
-        if semester in available_semesters:
-            return semester
-    
-    # If no match found in our ordered list, return the last one alphabetically
-    if available_semesters:
-        return sorted(available_semesters)[-1]
-    return None
+    return latest_semester(available_semesters)
 
 
-def aggregate_by_course_and_semester_parallel():
+def metrics_of(result):
+    """The cacheable part of an analyze_report result."""
+    return {field: result[field] for field in METRIC_FIELDS + DISTRIBUTION_FIELDS if field in result}
+
+
+def aggregate_by_course_and_semester_parallel(store_path=DEFAULT_STORE_PATH, courses_file='courses_by_fas_id.json',
+                                              use_cache=True):
     """Aggregate data by FAS ID and semester using parallel processing."""
-    # Find all HTML files in QGuides directory
-    html_files = glob('QGuides/**/*.html', recursive=True)
-    
-    if not html_files:
-        print("No HTML files found in QGuides directory")
-        return {}
-    
-    print(f"Found {len(html_files)} Q guide files to analyze")
-    
-    # Load courses data once
-    print("Loading course mapping data...")
-    with open('courses_by_fas_id.json', 'r') as f:
-        courses_data = json.load(f)
+    return aggregate_results(collect_results(store_path, courses_file, use_cache))
+
+
+def collect_results(store_path=DEFAULT_STORE_PATH, courses_file='courses_by_fas_id.json', use_cache=True):
+    """Return per-report results for every stored report.
+
+    Only reports that are new or changed since the last run are parsed; the
+    rest come from the analysis cache. With use_cache=False every stored report
+    is parsed again, but cached results of reports without stored HTML are kept.
+    """
+    with ReportStore(store_path) as store:
+        cache = AnalysisCache(store, EXTRACTOR_VERSION)
+        index = store.index()
+        if not use_cache:
+            kept = cache.clear(index)
+            if kept:
+                print(f"Re-parsing every stored report; keeping {kept} cached results whose HTML is not stored "
+                      "(streamed without --keep-html, so they cannot be re-parsed)")
+        cached, report_keys = cache.split(index)
+        report_keys.sort()
+
+        if not index and not cached:
+            print(f"No reports found in {store_path}")
+            return []
+
+        print(f"Found {len(index)} stored Q guide reports ({len(report_keys)} new or changed) "
+              f"and {len(cached)} cached results")
+
+        fresh_results = analyze_reports_parallel(report_keys, store_path, courses_file)
+        for key, result in fresh_results:
+            size, stored_at, sha256 = index[key]
+            cache.put(key, size, stored_at, sha256, metrics_of(result) if result else None)
+        cache.commit()
+
+    all_results = [result for _, result in fresh_results if result]
+
+    offering_index = OfferingIndex.from_file(courses_file)
+    for key, metrics in cached.items():
+        if metrics:
+            all_results.append(build_result(key, metrics, offering_index))
+
+    print(f"Successfully analyzed {len(all_results)} files")
     
+    return all_results
+
+
+def analyze_reports_parallel(report_keys, store_path=DEFAULT_STORE_PATH, courses_file='courses_by_fas_id.json'):
+    """Analyze stored reports in a process pool, returning (key, result) pairs."""
+    if not report_keys:
+        return []
+
     # Determine number of workers (use CPU count but cap at 8 for stability)
     num_workers = min(multiprocessing.cpu_count(), 8)
     print(f"Using {num_workers} parallel workers")
     
     # Split files into batches for parallel processing
-    batch_size = max(1, len(html_files) // (num_workers * 4))  # Create more batches than workers
-    file_batches = [html_files[i:i + batch_size] for i in range(0, len(html_files), batch_size)]
+    batch_size = max(1, len(report_keys) // (num_workers * 4))  # Create more batches than workers
+    file_batches = [report_keys[i:i + batch_size] for i in range(0, len(report_keys), batch_size)]
     
     # Process files in parallel
     all_results = []
     
-    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+    # Each worker loads the course mapping once instead of receiving a pickled copy per batch
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=init_worker,
+                             initargs=(courses_file,)) as executor:
         # Submit all batch jobs
         future_to_batch = {
-            executor.submit(analyze_file_batch, batch, courses_data): batch 
+            executor.submit(analyze_file_batch, batch, store_path): batch 
             for batch in file_batches
         }
         
         # Process completed batches with progress bar
-        with tqdm(total=len(html_files), desc="Analyzing files") as pbar:
+        with tqdm(total=len(report_keys), desc="Analyzing reports") as pbar:
             for future in as_completed(future_to_batch):
                 try:
                     batch_results = future.result()
@@ -247,8 +470,146 @@ def aggregate_by_course_and_semester_parallel():
                     print(f"Error processing batch: {e}")
                     pbar.update(len(future_to_batch[future]))
     
-    print(f"Successfully analyzed {len(all_results)} files")
-    
+    return all_results
+
+
+def _grouped_mean(values, group_idx, num_groups, ndigits):
+    """
+    Per-group mean of the positive values, rounded like round(statistics.mean(...), ndigits).
+
+    Returns a list with 0 for groups that have no positive values.
+    """
+    positive = values > 0
+    groups = group_idx[positive]
+    counts = np.bincount(groups, minlength=num_groups)
+    sums = np.bincount(groups, weights=values[positive], minlength=num_groups)
+    means = np.divide(sums, counts, out=np.zeros(num_groups), where=counts > 0)
+
+    if values.dtype.kind == 'i':
+        # statistics.mean of ints is an int when it divides evenly; sums of ints are exact in float64
+        exact = (counts > 0) & (np.fmod(sums, np.maximum(counts, 1)) == 0)
+    else:
+        exact = np.zeros(num_groups, dtype=bool)
+        # A float sum accumulated left to right can be a few ulps off statistics.mean's exact
+        # one; that only matters when the mean sits on a rounding boundary, so redo those exactly
+        scaled = means * 10 ** ndigits
+        near_half = (counts > 2) & (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+        for group in np.flatnonzero(near_half):
+            means[group] = statistics.mean(values[positive][groups == group].tolist())
+
+    return [
+        (int(mean) if is_exact else round(float(mean), ndigits)) if count else 0
+        for mean, count, is_exact in zip(means.tolist(), counts.tolist(), exact.tolist())
+    ]
+
+
+def semester_ranks(semesters):
+    """Return the chronological rank of each name in an array of distinct semester names."""
+    rank = {semester: i for i, semester in enumerate(sort_semesters(semesters.tolist()))}
+    return np.array([rank[s] for s in semesters.tolist()], dtype=np.int64)
+
+
+def aggregate_results(all_results):
+    """Aggregate per-report results by FAS ID and semester.
+
+    Results are laid out as columns and grouped with NumPy: one group per
+    (FAS ID, semester), with means, section counts and the latest semester of
+    each course computed over whole arrays. Output matches
+    aggregate_results_reference.
+    """
+    if not all_results:
+        return {}
+
+    fas_ids = np.array([r['fas_id'] for r in all_results])
+    semesters = np.array([r['semester_year'] for r in all_results])
+    ratings = np.array([r['course_rating'] for r in all_results], dtype=np.float64)
+    hours = np.array([r['hours_per_week'] for r in all_results], dtype=np.float64)
+    students = np.array([r['num_students'] for r in all_results], dtype=np.int64)
+
+    # np.unique sorts, so FAS IDs come out in the same order as sorted()
+    fas_values, fas_idx = np.unique(fas_ids, return_inverse=True)
+    sem_values, sem_idx = np.unique(semesters, return_inverse=True)
+    group_keys, group_idx = np.unique(fas_idx * len(sem_values) + sem_idx, return_inverse=True)
+    num_groups = len(group_keys)
+    group_fas = group_keys // len(sem_values)
+    group_sem = group_keys % len(sem_values)
+    fas_names = fas_values.tolist()
+    sem_names = sem_values.tolist()
+
+    avg_ratings = _grouped_mean(ratings, group_idx, num_groups, 2)
+    avg_hours = _grouped_mean(hours, group_idx, num_groups, 2)
+    avg_students = _grouped_mean(students, group_idx, num_groups, 0)
+    num_sections = np.bincount(group_idx, minlength=num_groups)
+
+    # Row numbers of each group, in input order
+    rows_by_group = np.argsort(group_idx, kind='stable').tolist()
+    group_starts = np.r_[0, np.cumsum(num_sections)].tolist()
+
+    # Groups ordered by course then semester; the last group of each course is its latest semester
+    by_semester = np.lexsort((semester_ranks(sem_values)[group_sem], group_fas))
+    course_ends = np.flatnonzero(np.r_[group_fas[by_semester][1:] != group_fas[by_semester][:-1], True])
+    latest_group = dict(zip(group_fas[by_semester][course_ends].tolist(), by_semester[course_ends].tolist()))
+
+    # Plain lists from here on: indexing NumPy arrays one element at a time is slow
+    group_fas = group_fas.tolist()
+    group_sem = group_sem.tolist()
+    num_sections = num_sections.tolist()
+
+    final_data = {}
+    all_course_codes = defaultdict(set)
+    all_course_titles = defaultdict(set)
+    for group in by_semester.tolist():
+        fas_id = fas_names[group_fas[group]]
+        offerings = [{
+            'professor': all_results[row]['professor'],
+            'course_code': all_results[row]['course_code'],
+            'course_title': all_results[row]['course_title'],
+            'course_rating': all_results[row]['course_rating'],
+            'hours_per_week': all_results[row]['hours_per_week'],
+            'num_students': all_results[row]['num_students']
+        } for row in rows_by_group[group_starts[group]:group_starts[group + 1]]]
+
+        semester_course_codes = list(set(o['course_code'] for o in offerings if o['course_code']))
+        semester_course_titles = list(set(o['course_title'] for o in offerings if o['course_title']))
+        all_course_codes[fas_id].update(semester_course_codes)
+        all_course_titles[fas_id].update(semester_course_titles)
+
+        course = final_data.setdefault(fas_id, {'semesters': {}})
+        course['semesters'][sem_names[group_sem[group]]] = {
+            'course_code': semester_course_codes[0] if semester_course_codes else 'UNKNOWN',
+            'course_codes': semester_course_codes,
+            'course_title': semester_course_titles[0] if semester_course_titles else '',
+            'course_titles': semester_course_titles,
+            'avg_course_rating': avg_ratings[group],
+            'avg_hours_per_week': avg_hours[group],
+            'avg_num_students': avg_students[group],
+            'num_sections': num_sections[group],
+            'professors': list(set(o['professor'] for o in offerings)),
+            'individual_sections': offerings
+        }
+
+    for fas_position, fas_id in enumerate(fas_names):
+        course = final_data[fas_id]
+        course['all_course_codes'] = sorted(all_course_codes[fas_id])
+        course['all_course_titles'] = sorted(all_course_titles[fas_id])
+
+        latest_semester = sem_names[group_sem[latest_group[fas_position]]]
+        latest_data = course['semesters'][latest_semester]
+        course['latest_semester'] = latest_semester
+        course['latest_course_code'] = latest_data['course_code']
+        course['latest_course_title'] = latest_data['course_title']
+        course['latest_course_rating'] = latest_data['avg_course_rating']
+        course['latest_hours_per_week'] = latest_data['avg_hours_per_week']
+        course['latest_num_students'] = latest_data['avg_num_students']
+
+    return final_data
+
+
+def aggregate_results_reference(all_results):
+    """Reference aggregation: nested dicts of per-report results and statistics.mean.
+
+    Kept to check aggregate_results against (see --verify-aggregate).
+    """
     # Aggregate by FAS ID and semester
     aggregated = defaultdict(lambda: defaultdict(list))
     
@@ -336,17 +697,8 @@ def aggregate_by_course_and_semester_parallel():
         sorted_data[fas_id] = final_data[fas_id]
         # Sort semesters within each course
         sorted_semesters = {}
-        semester_order = get_semester_order()
-        
-        # First add semesters in our defined order
-        for semester in semester_order:
-            if semester in final_data[fas_id]['semesters']:
-                sorted_semesters[semester] = final_data[fas_id]['semesters'][semester]
-        
-        # Then add any remaining semesters not in our order (edge cases)
-        for semester in sorted(final_data[fas_id]['semesters'].keys()):
-            if semester not in sorted_semesters:
-                sorted_semesters[semester] = final_data[fas_id]['semesters'][semester]
+        for semester in sort_semesters(final_data[fas_id]['semesters'].keys()):
+            sorted_semesters[semester] = final_data[fas_id]['semesters'][semester]
         
         sorted_data[fas_id]['semesters'] = sorted_semesters
     
@@ -367,17 +719,18 @@ def merge_analytics(existing, new_data):
             old['semesters'][sem_key] = sem_data
 
         # Update all_course_codes and all_course_titles
-        for code in new_entry.get('all_course_codes', []):
-            if code not in old.get('all_course_codes', []):
-                old.setdefault('all_course_codes', []).append(code)
-        for title in new_entry.get('all_course_titles', []):
-            if title not in old.get('all_course_titles', []):
-                old.setdefault('all_course_titles', []).append(title)
-
-        # Recalculate latest_* fields from all semesters
-        all_sems = sorted(old['semesters'].keys())
-        if all_sems:
-            latest = all_sems[-1]
+        for field in ('all_course_codes', 'all_course_titles'):
+            values = old.setdefault(field, [])
+            seen = set(values)
+            for value in new_entry.get(field, []):
+                if value not in seen:
+                    seen.add(value)
+                    values.append(value)
+
+        # Keep semesters in chronological order and recalculate latest_* fields from all of them
+        old['semesters'] = {sem: old['semesters'][sem] for sem in sort_semesters(old['semesters'])}
+        latest = latest_semester(old['semesters'])
+        if latest:
             latest_data = old['semesters'][latest]
             old['latest_semester'] = latest
             old['latest_course_code'] = latest_data.get('course_code', old.get('latest_course_code', ''))
@@ -389,10 +742,122 @@ def merge_analytics(existing, new_data):
     return existing
 
 
+def split_sections(analytics):
+    """Move individual_sections out of every semester entry of analytics (in place).
+
+    Returns fas_id -> semester -> individual sections, for writing to a
+    separate file that the app only loads when it needs section detail.
+    """
+    sections = {}
+    for fas_id, course in analytics.items():
+        for semester, semester_data in course.get('semesters', {}).items():
+            if 'individual_sections' in semester_data:
+                sections.setdefault(fas_id, {})[semester] = semester_data.pop('individual_sections')
+    return sections
+
+
+def write_analytics(aggregated_data, output_file='results/course_analytics.json', split=False, merge=False):
+    """Write course analytics, optionally with per-section detail split out to SECTIONS_FILE.
+
+    With merge, newly split sections are merged into the existing SECTIONS_FILE.
+    """
+    if split:
+        sections = split_sections(aggregated_data)
+        if merge and os.path.exists(SECTIONS_FILE):
+            with open(SECTIONS_FILE, 'r', encoding='utf-8') as f:
+                existing_sections = json.load(f)
+            for fas_id, semesters in sections.items():
+                existing_sections.setdefault(fas_id, {}).update(semesters)
+            sections = existing_sections
+        with open(SECTIONS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(sections, f, separators=(',', ':'), ensure_ascii=False)
+        print(f"Section detail for {len(sections)} courses saved to {SECTIONS_FILE}")
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(aggregated_data, f, indent=2, ensure_ascii=False)
+
+
+def verify_fast_extractor(store_path=DEFAULT_STORE_PATH, sample=None):
+    """Compare extract_metrics_fast against the BeautifulSoup extractor on stored reports."""
+    with ReportStore(store_path, readonly=True) as store:
+        keys = sorted(store.keys())[:sample] if sample else sorted(store.keys())
+        pages = [(key, page_text) for key, page_text in store.iter_reports(keys)]
+
+    timings = {}
+    outputs = {}
+    for name, extractor in (('BeautifulSoup', extract_metrics), ('lxml', extract_metrics_fast)):
+        start = time.perf_counter()
+        outputs[name] = [extractor(page_text) for _, page_text in pages]
+        timings[name] = time.perf_counter() - start
+
+    # The reference extractor predates the distribution fields, so compare the metrics only
+    outputs['lxml'] = [
+        {field: fast[field] for field in METRIC_FIELDS} if fast else fast for fast in outputs['lxml']
+    ]
+    mismatches = [
+        (key, slow, fast)
+        for (key, _), slow, fast in zip(pages, outputs['BeautifulSoup'], outputs['lxml'])
+        if slow != fast
+    ]
+
+    print(f"Compared {len(pages)} reports")
+    for name, elapsed in timings.items():
+        print(f"  {name:>13}: {elapsed:.2f}s ({len(pages) / elapsed if elapsed > 0 else 0:.0f} files/sec)")
+    if timings['lxml'] > 0:
+        print(f"  Speedup: {timings['BeautifulSoup'] / timings['lxml']:.1f}x")
+    print(f"Mismatches: {len(mismatches)}")
+    for key, slow, fast in mismatches[:10]:
+        print(f"  {'_'.join(key)}: BeautifulSoup={slow} lxml={fast}")
+    return not mismatches
+
+
+def verify_aggregation(all_results):
+    """Compare aggregate_results against aggregate_results_reference on the same results."""
+    timings = {}
+    outputs = {}
+    for name, aggregate in (('reference', aggregate_results_reference), ('numpy', aggregate_results)):
+        start = time.perf_counter()
+        outputs[name] = aggregate(all_results)
+        timings[name] = time.perf_counter() - start
+
+    # Compare the serialized output, so key order and int/float types count too
+    same = json.dumps(outputs['reference'], ensure_ascii=False) == json.dumps(outputs['numpy'], ensure_ascii=False)
+    print(f"Aggregated {len(all_results)} results into {len(outputs['numpy'])} courses")
+    for name, elapsed in timings.items():
+        print(f"  {name:>9}: {elapsed:.3f}s")
+    print(f"Output {'identical' if same else 'DIFFERS'}")
+    if not same:
+        for fas_id in outputs['reference']:
+            if outputs['reference'][fas_id] != outputs['numpy'].get(fas_id):
+                print(f"  first difference at FAS ID {fas_id}")
+                break
+    return same
+
+
 def main():
     """Main function to run the analysis."""
-    import sys
-    incremental = '--merge' in sys.argv
+    parser = argparse.ArgumentParser(description='Analyze downloaded Q guide reports')
+    parser.add_argument('--merge', action='store_true',
+                        help='Merge results into the existing results/course_analytics.json')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH,
+                        help=f'Report store file (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Re-parse every stored report instead of using the analysis cache '
+                             '(results of reports streamed without their HTML are kept)')
+    parser.add_argument('--verify-fast', action='store_true',
+                        help='Check the lxml extractor against the BeautifulSoup one and exit')
+    parser.add_argument('--sample', type=int,
+                        help='With --verify-fast, only compare the first N reports')
+    parser.add_argument('--verify-aggregate', action='store_true',
+                        help='Check the NumPy aggregation against the reference one and exit')
+    parser.add_argument('--split-sections', action='store_true',
+                        help=f'Write individual_sections to {SECTIONS_FILE} instead of inline')
+    args = parser.parse_args()
+    incremental = args.merge
+    store_path = args.store
+
+    if args.verify_fast:
+        sys.exit(0 if verify_fast_extractor(store_path, args.sample) else 1)
 
     print("Starting Q guide analysis with parallel processing...")
     if incremental:
@@ -403,12 +868,22 @@ def main():
         print("ERROR: courses_by_fas_id.json not found. Please run scraper.py first.")
         return
 
-    if not os.path.exists('QGuides'):
-        print("ERROR: QGuides directory not found. Please run downloader.py first.")
-        return
+    if not os.path.exists(store_path):
+        if os.path.exists('QGuides'):
+            # One-time migration from the old one-file-per-report layout
+            print("Importing legacy QGuides directory into the report store...")
+            with ReportStore(store_path) as store:
+                print(f"Imported {store.import_directory('QGuides')} reports into {store_path}")
+        else:
+            print(f"ERROR: {store_path} not found. Please run downloader.py first.")
+            return
+
+    if args.verify_aggregate:
+        sys.exit(0 if verify_aggregation(collect_results(store_path, use_cache=not args.no_cache)) else 1)
 
     # Run parallel analysis
-    aggregated_data = aggregate_by_course_and_semester_parallel()
+    all_results = collect_results(store_path, use_cache=not args.no_cache)
+    aggregated_data = aggregate_results(all_results)
 
     if not aggregated_data:
         print("No data was successfully analyzed")
@@ -424,8 +899,10 @@ def main():
         aggregated_data = merge_analytics(existing_data, aggregated_data)
 
     # Save to JSON
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(aggregated_data, f, indent=2, ensure_ascii=False)
+    write_analytics(aggregated_data, output_file, split=args.split_sections, merge=incremental)
+
+    RatingDistributions.from_results(all_results).save(DEFAULT_DISTRIBUTIONS_PATH)
+    print(f"Rating distributions for {len(all_results)} reports saved to {DEFAULT_DISTRIBUTIONS_PATH}")
     
     # Print summary statistics
     print(f"\nAnalysis complete!")
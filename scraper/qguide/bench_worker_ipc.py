@@ -0,0 +1,100 @@
+# benchmark: cost of shipping the course mapping to analyzer workers per batch
+# versus loading it once per worker with init_worker, as the number of semesters grows
+
+import argparse
+import json
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from analyzer import init_worker
+
+
+def synthetic_courses(num_courses, num_semesters):
+    """Build a courses_by_fas_id-shaped mapping with one offering per course per semester."""
+    semesters = [f"{2000 + i // 2}{'Spring' if i % 2 == 0 else 'Fall'}" for i in range(num_semesters)]
+    courses = {}
+    for n in range(num_courses):
+        fas_id = str(100000 + n)
+        offerings = [{
+            'semester_year': semester,
+            'course_code': f"DEPT {n}",
+            'course_title': f"Course title number {n}",
+            'professor': f"Professor Name{n % 997}",
+            'link': f"https://my-harvard-bc.bluera.com/rpv-eng.aspx?lang=eng&redi=1&SelectedIDforPrint={'%064x' % (n * 7919 + i)}&ReportType=2&regl=en-US",
+            'element_id': f"FAS-{fas_id}-{semester}",
+        } for i, semester in enumerate(semesters)]
+        courses[fas_id] = {
+            'fas_id': fas_id,
+            'course_codes': [f"DEPT {n}"],
+            'course_titles': [f"Course title number {n}"],
+            'professors': [f"Professor Name{n % 997}"],
+            'offerings': offerings,
+        }
+    return courses
+
+
+def noop_batch(batch, *args):
+    return len(batch)
+
+
+def time_pool(num_workers, batches, extra_args, initializer=None, initargs=()):
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=initializer, initargs=initargs) as executor:
+        for future in [executor.submit(noop_batch, batch, *extra_args) for batch in batches]:
+            future.result()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark course-mapping IPC in the Q guide analyzer')
+    parser.add_argument('--courses', type=int, default=6000, help='Courses in the synthetic mapping (default: 6000)')
+    parser.add_argument('--semesters', default='2,4,8,16,24', help='Comma-separated semester counts')
+    parser.add_argument('--workers', type=int, default=8, help='Worker processes (default: 8)')
+    args = parser.parse_args()
+
+    num_batches = args.workers * 4  # same batching as aggregate_by_course_and_semester_parallel
+    print(f"{args.courses} courses, {args.workers} workers, {num_batches} batches\n")
+    print(f"{'semesters':>9} | {'per-batch pickled':>17} | {'pickle+unpickle':>15} | {'pool wall':>9} || "
+          f"{'initializer load':>16} | {'pool wall':>9}")
+
+    for num_semesters in [int(x) for x in args.semesters.split(',')]:
+        courses = synthetic_courses(args.courses, num_semesters)
+        keys = [(fas_id, 'x', 'y') for fas_id in courses for _ in range(num_semesters)]
+        batch_size = max(1, len(keys) // num_batches)
+        batches = [keys[i:i + batch_size] for i in range(0, len(keys), batch_size)]
+
+        # Old: the mapping rides along with every batch
+        start = time.perf_counter()
+        pickled_bytes = 0
+        for batch in batches:
+            payload = pickle.dumps((batch, courses, 'QGuides.db'))
+            pickled_bytes += len(payload)
+            pickle.loads(payload)
+        old_serialize = time.perf_counter() - start
+        old_wall = time_pool(args.workers, batches, (courses, 'QGuides.db'))
+
+        # New: each worker reads the mapping file once
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(courses, f)
+            courses_file = f.name
+        try:
+            start = time.perf_counter()
+            init_worker(courses_file)
+            new_load = (time.perf_counter() - start) * args.workers
+            new_wall = time_pool(args.workers, batches, ('QGuides.db',),
+                                 initializer=init_worker, initargs=(courses_file,))
+        finally:
+            os.unlink(courses_file)
+
+        print(f"{num_semesters:>9} | {pickled_bytes / 1e6:>14.1f} MB | {old_serialize:>14.2f}s | {old_wall:>8.2f}s || "
+              f"{new_load:>15.2f}s | {new_wall:>8.2f}s")
+
+    print("\nper-batch pickled: total bytes serialized for the mapping across all batches (old)")
+    print("initializer load: summed json.load time across workers (new, CPU time not wall time)")
+
+
+if __name__ == "__main__":
+    main()
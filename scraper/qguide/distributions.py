@@ -0,0 +1,176 @@
+# per-report response distributions kept as NumPy arrays in one .npz file,
+# so medians, spreads and response counts can be computed without re-parsing reports
+
+import argparse
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+DEFAULT_DISTRIBUTIONS_PATH = 'results/rating_distributions.npz'
+
+SCORES = np.arange(1, 6, dtype=np.float64)
+
+GROUPINGS = {
+    'report': ('fas_id', 'semester_year', 'professor'),
+    'course': ('fas_id',),
+    'course-semester': ('fas_id', 'semester_year'),
+    'semester': ('semester_year',),
+}
+
+
+class RatingDistributions:
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """
+        Columnar per-report distributions, one row per report.
+
+        Columns:
+            fas_id, semester_year, professor: report key (unicode arrays)
+            num_students: students invited
+            course_rating: mean overall rating as printed on the report (0 if missing)
+            rating_responses: respondents to "Evaluate the course overall."
+            rating_pct: (n, 5) uint8 percentage giving each score 1-5 (all 0 if missing)
+            workload_responses: respondents to the workload question
+            workload_summary: (n, 4) float32 last four workload cells, mean first (NaN if missing)
+        """
+        self.arrays = arrays
+
+    @classmethod
+    def from_results(cls, results: List[dict]) -> 'RatingDistributions':
+        """Build from analyze_report results (the analyzer's per-report dicts)."""
+        def column(field, dtype, default=0):
+            return np.array([r.get(field) or default for r in results], dtype=dtype)
+
+        rating_pct = np.zeros((len(results), 5), dtype=np.uint8)
+        workload_summary = np.full((len(results), 4), np.nan, dtype=np.float32)
+        for row, result in enumerate(results):
+            if result.get('rating_histogram'):
+                rating_pct[row] = result['rating_histogram']
+            summary = result.get('workload_summary')
+            if summary:
+                workload_summary[row, -len(summary):] = [np.nan if v is None else v for v in summary]
+
+        return cls({
+            'fas_id': np.array([r['fas_id'] for r in results], dtype=str),
+            'semester_year': np.array([r['semester_year'] for r in results], dtype=str),
+            'professor': np.array([r['professor'] for r in results], dtype=str),
+            'num_students': column('num_students', np.int32),
+            'course_rating': column('course_rating', np.float32),
+            'rating_responses': column('rating_responses', np.int32),
+            'rating_pct': rating_pct,
+            'workload_responses': column('workload_responses', np.int32),
+            'workload_summary': workload_summary,
+        })
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_DISTRIBUTIONS_PATH) -> 'RatingDistributions':
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def save(self, path: str = DEFAULT_DISTRIBUTIONS_PATH):
+        np.savez_compressed(path, **self.arrays)
+
+    def __len__(self) -> int:
+        return len(self.arrays['fas_id'])
+
+    def rating_counts(self) -> np.ndarray:
+        """(n, 5) estimated number of respondents giving each score, from the percentages."""
+        return self.arrays['rating_pct'] / 100.0 * self.arrays['rating_responses'][:, None]
+
+    def group_stats(self, by: Sequence[str] = ('fas_id',)) -> Dict[str, np.ndarray]:
+        """
+        Pool the rating histograms of every report in each group and compute
+        statistics for all groups at once.
+
+        Args:
+            by: Key columns to group on (see GROUPINGS)
+
+        Returns:
+            Dictionary of equal-length arrays: the key columns, reports,
+            responses, mean, median, std, top_two_box (share rating 4 or 5)
+            and hours (response-weighted mean workload)
+        """
+        group_idx, first_rows = _group_index([self.arrays[column] for column in by])
+        num_groups = len(first_rows)
+
+        counts = np.zeros((num_groups, 5))
+        np.add.at(counts, group_idx, self.rating_counts())
+        stats = histogram_stats(counts)
+
+        hours = self.arrays['workload_summary'][:, 0].astype(np.float64)
+        weights = np.where(np.isnan(hours), 0, self.arrays['workload_responses'])
+        hours_weight = np.bincount(group_idx, weights=weights, minlength=num_groups)
+        hours_sum = np.bincount(group_idx, weights=np.nan_to_num(hours) * weights, minlength=num_groups)
+
+        result = {column: self.arrays[column][first_rows] for column in by}
+        result.update(stats)
+        result['reports'] = np.bincount(group_idx, minlength=num_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result['hours'] = np.where(hours_weight > 0, hours_sum / hours_weight, np.nan)
+        return result
+
+
+def _group_index(columns: List[np.ndarray]):
+    """Return (group number per row, first row of each group) for the combined key columns."""
+    codes = np.zeros(len(columns[0]), dtype=np.int64)
+    for column in columns:
+        values, inverse = np.unique(column, return_inverse=True)
+        codes = codes * len(values) + inverse
+    _, first_rows, group_idx = np.unique(codes, return_index=True, return_inverse=True)
+    return group_idx.reshape(-1), first_rows
+
+
+def histogram_stats(counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """Responses, mean, median, standard deviation and top-two-box share of (n, 5) score histograms."""
+    responses = counts.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = counts @ SCORES / responses
+        variance = counts @ (SCORES ** 2) / responses - mean ** 2
+        top_two_box = counts[:, 3:].sum(axis=1) / responses
+    cumulative = np.cumsum(counts, axis=1)
+    median = (np.argmax(cumulative >= responses[:, None] / 2, axis=1) + 1).astype(np.float64)
+    median[responses == 0] = np.nan
+    return {
+        'responses': np.rint(responses).astype(np.int64),
+        'mean': mean,
+        'median': median,
+        'std': np.sqrt(np.maximum(variance, 0)),
+        'top_two_box': top_two_box,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rank courses by their Q guide rating distributions')
+    parser.add_argument('--input', default=DEFAULT_DISTRIBUTIONS_PATH,
+                        help=f'Distributions file written by analyzer.py (default: {DEFAULT_DISTRIBUTIONS_PATH})')
+    parser.add_argument('--by', choices=sorted(GROUPINGS), default='course', help='How to group reports')
+    parser.add_argument('--semester', help='Only include reports from this semester (e.g. 2025Fall)')
+    parser.add_argument('--min-responses', type=int, default=10,
+                        help='Skip groups with fewer rating responses (default: 10)')
+    parser.add_argument('--top', type=int, default=20, help='Number of groups to print (default: 20)')
+    args = parser.parse_args()
+
+    distributions = RatingDistributions.load(args.input)
+    if args.semester:
+        keep = distributions.arrays['semester_year'] == args.semester
+        distributions = RatingDistributions({name: array[keep] for name, array in distributions.arrays.items()})
+    print(f"{len(distributions)} reports in {args.input}")
+    if not len(distributions):
+        return
+
+    by = GROUPINGS[args.by]
+    stats = distributions.group_stats(by)
+    eligible = np.flatnonzero(stats['responses'] >= args.min_responses)
+    # Rank by median, then mean, then the share of 4s and 5s
+    order = eligible[np.lexsort((-stats['top_two_box'][eligible], -stats['mean'][eligible],
+                                 -stats['median'][eligible]))]
+
+    print(f"{len(eligible)} groups with at least {args.min_responses} responses\n")
+    print(f"{' '.join(by):<40} {'resp':>6} {'median':>6} {'mean':>5} {'std':>5} {'top2':>5} {'hours':>5}")
+    for i in order[:args.top]:
+        key = ' '.join(str(stats[column][i]) for column in by)
+        print(f"{key:<40} {stats['responses'][i]:>6} {stats['median'][i]:>6.0f} {stats['mean'][i]:>5.2f} "
+              f"{stats['std'][i]:>5.2f} {stats['top_two_box'][i]:>5.0%} {stats['hours'][i]:>5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# persistent record of every Q guide download attempt, kept next to the reports in QGuides.db
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from report_store import ReportStore, parse_report_filename
+
+
+class DownloadManifest:
+    def __init__(self, store: ReportStore):
+        """
+        Attach a download manifest to a report store.
+
+        The manifest shares the store's SQLite connection, so a report body and
+        its manifest row are committed together.
+        """
+        self.conn = store.conn
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS download_manifest (
+                filename TEXT PRIMARY KEY,
+                fas_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                size INTEGER,
+                sha256 TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def record_success(self, package: List[str], html: str):
+        data = html.encode('utf-8')
+        self.conn.execute("""
+            INSERT INTO download_manifest (filename, fas_id, url, status, size, sha256, attempts, error, updated_at)
+            VALUES (?, ?, ?, 'ok', ?, ?, 1, NULL, ?)
+            ON CONFLICT(filename) DO UPDATE SET
+                url = excluded.url, status = 'ok', size = excluded.size, sha256 = excluded.sha256,
+                attempts = attempts + 1, error = NULL, updated_at = excluded.updated_at
+        """, (package[1], package[2], package[0], len(data), hashlib.sha256(data).hexdigest(),
+              datetime.now().isoformat()))
+
+    def record_failure(self, package: List[str], error: str):
+        self.conn.execute("""
+            INSERT INTO download_manifest (filename, fas_id, url, status, attempts, error, updated_at)
+            VALUES (?, ?, ?, 'failed', 1, ?, ?)
+            ON CONFLICT(filename) DO UPDATE SET
+                url = excluded.url, status = 'failed', attempts = attempts + 1,
+                error = excluded.error, updated_at = excluded.updated_at
+        """, (package[1], package[2], package[0], error, datetime.now().isoformat()))
+
+    def commit(self):
+        self.conn.commit()
+
+    def urls(self) -> Dict[str, str]:
+        """Return filename -> URL for every package that downloaded successfully."""
+        return dict(self.conn.execute(
+            "SELECT filename, url FROM download_manifest WHERE status = 'ok'"))
+
+    def failed_packages(self, semester_filter: Optional[str] = None) -> List[List[str]]:
+        """Return [link, filename, fas_id] packages whose last attempt failed."""
+        rows = self.conn.execute(
+            "SELECT url, filename, fas_id FROM download_manifest WHERE status = 'failed' ORDER BY filename")
+        return [list(row) for row in rows if not semester_filter or semester_filter in row[1]]
+
+    def summary(self) -> Dict[str, int]:
+        return dict(self.conn.execute(
+            'SELECT status, COUNT(*) FROM download_manifest GROUP BY status'))
+
+
+def load_legacy_failed(path: str = 'failed_downloads.json') -> List[List[str]]:
+    """Read packages from the failed_downloads.json written by older downloader runs."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def missing_packages(packages: List[List[str]], stored: Set[tuple], manifest_urls: Dict[str, str]) -> List[List[str]]:
+    """
+    Filter packages down to those that actually need downloading: not in the
+    store yet, or stored from a different URL than the one now listed.
+    """
+    missing = []
+    for package in packages:
+        if parse_report_filename(package[1]) not in stored:
+            missing.append(package)
+        elif manifest_urls.get(package[1], package[0]) != package[0]:
+            missing.append(package)
+    return missing
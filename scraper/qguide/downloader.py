@@ -1,26 +1,25 @@
-# downloads q guides and put them in the folder QGuides
+# downloads q guides and packs them into the QGuides.db report store
 
-import concurrent.futures
+import argparse
+import asyncio
+import contextlib
 import json
-import os
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-import time
-from threading import Lock
-
 import sys
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-PACKAGES = []
+import aiohttp
+from tqdm.asyncio import tqdm
 
-# Optional semester filter: e.g. "2025Fall" — only download reports matching this semester
-SEMESTER_FILTER = sys.argv[1] if len(sys.argv) > 1 else None
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from adaptive_scheduler import AdaptiveScheduler, RetryableError
+from download_manifest import DownloadManifest, load_legacy_failed, missing_packages
+from report_store import DEFAULT_STORE_PATH, ReportStore, parse_report_filename
 
 
-def preprocess_qlinks():
-    # Load the JSON file with courses grouped by FAS ID
-    with open('courses_by_fas_id.json', 'r') as f:
-        courses_data = json.load(f)
+def build_packages(courses_data: Dict[str, Any], semester_filter: Optional[str] = None) -> List[List[str]]:
+    """Build [link, filename, fas_id] download packages from courses_by_fas_id data."""
+    packages = []
 
     # Extract all unique links with their identifiers
     for fas_id, course_info in courses_data.items():
@@ -31,35 +30,20 @@ def preprocess_qlinks():
             filename = f"{fas_id}_{offering['semester_year']}_{professor_clean}"
 
             # Skip if semester filter is set and doesn't match
-            if SEMESTER_FILTER and SEMESTER_FILTER not in offering['semester_year']:
+            if semester_filter and semester_filter not in offering['semester_year']:
                 continue
 
-            # Add to packages list
-            PACKAGES.append([offering['link'], filename, fas_id])
-
-    if SEMESTER_FILTER:
-        print(f"Found {len(PACKAGES)} Q guide links for semester {SEMESTER_FILTER}")
-    else:
-        print(f"Found {len(PACKAGES)} total Q guide links to download")
-
+            packages.append([offering['link'], filename, fas_id])
 
-preprocess_qlinks()
-# Uncomment line below to test code with smaller sample
-# PACKAGES = PACKAGES[:10]
+    return packages
 
-# Thread-safe counter
-counter_lock = Lock()
-global_count = 0
-last_print_time = 0
 
-# Create the QGuide folder if not exist
-if not os.path.exists('QGuides'):
-    os.makedirs('QGuides')
+def load_packages(courses_file: str = 'courses_by_fas_id.json', semester_filter: Optional[str] = None) -> List[List[str]]:
+    """Load the course mapping and build the download packages."""
+    with open(courses_file, 'r') as f:
+        courses_data = json.load(f)
+    return build_packages(courses_data, semester_filter)
 
-# Pre-create all subdirectories to avoid filesystem contention
-unique_fas_ids = set(package[2] for package in PACKAGES)
-for fas_id in unique_fas_ids:
-    os.makedirs(f'QGuides/{fas_id}', exist_ok=True)
 
 # Choose any QGuide link, visit it on your browser, then open DevTools (Applications pane)
 # to copy everything in the cookie field
@@ -68,53 +52,9 @@ for fas_id in unique_fas_ids:
 # You should create the secret cookie file
 # the file should looke like
 # "ASP.NET_SessionId=value; CookieName=value2; session_token=value3"
-with open('secret_cookie.txt', 'r') as f:
-    cookie = f.read().strip()
-
-
-def create_session():
-    """Create a requests session with connection pooling and retry logic."""
-    session = requests.Session()
-    
-    # Configure retry strategy
-    retry_strategy = Retry(
-        total=3,
-        backoff_factor=0.3,
-        status_forcelist=[429, 500, 502, 503, 504],
-    )
-    
-    # Configure connection pooling
-    adapter = HTTPAdapter(
-        max_retries=retry_strategy,
-        pool_connections=50,  # Number of connection pools
-        pool_maxsize=50,      # Max connections per pool
-    )
-    
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    
-    # Set default headers
-    session.headers.update({
-        'Cookie': cookie,
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive',
-    })
-    
-    return session
-
-
-# Thread-local storage for sessions
-from threading import local
-thread_local = local()
-
-def get_session():
-    """Get or create a session for the current thread."""
-    if not hasattr(thread_local, "session"):
-        thread_local.session = create_session()
-    return thread_local.session
+def load_cookie(cookie_file: str = 'secret_cookie.txt') -> str:
+    with open(cookie_file, 'r') as f:
+        return f.read().strip()
 
 
 # Rewrite new-format URLs to old domain that returns static HTML with tables
@@ -122,96 +62,267 @@ def normalize_url(url):
     return url.replace('my-harvard-bc.bluera.com', 'harvard.bluera.com/harvard')
 
 
-# Retrieve a single page and report the URL and contents
-def load_url(package):
-    global global_count, last_print_time
-    url = normalize_url(package[0])
-    filename = package[1]
-    fas_id = package[2]
-    
-    # Check if file already exists (skip if already downloaded)
-    filepath = f'QGuides/{fas_id}/{filename}.html'
-    if os.path.exists(filepath):
-        with counter_lock:
-            global_count += 1
-            current_time = time.time()
-            # Print progress every 0.5 seconds to reduce console spam
-            if current_time - last_print_time > 0.5:
-                print(f"Progress: {global_count/len(PACKAGES)*100:.2f}% ({global_count}/{len(PACKAGES)}) - Skipped existing: {filename}")
-                last_print_time = current_time
-        return True
-    
-    try:
-        session = get_session()
-        
-        # Shorter timeout since we have retries
-        response = session.get(url, timeout=30)
-        response.raise_for_status()
-        
-        # Write file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(response.text)
-        
-        with counter_lock:
-            global_count += 1
-            current_time = time.time()
-            # Print progress every 0.5 seconds to reduce console spam
-            if current_time - last_print_time > 0.5:
-                print(f"Progress: {global_count/len(PACKAGES)*100:.2f}% ({global_count}/{len(PACKAGES)}) - Downloaded: {filename}")
-                last_print_time = current_time
-        
-        return True
-        
-    except requests.exceptions.RequestException as e:
-        print(f"Error downloading {filename}: {e}")
-        return False
-    except Exception as e:
-        print(f"Unexpected error with {filename}: {e}")
-        return False
-
-
-# Track failed downloads
-failed_downloads = []
-
-print(f"\nStarting parallel download with optimized settings...")
-print(f"Using 25 concurrent workers with connection pooling\n")
-
-start_time = time.time()
-
-# Use more workers for faster downloads
-with concurrent.futures.ThreadPoolExecutor(max_workers=25) as executor:
-    # Submit all tasks
-    future_to_package = {executor.submit(load_url, package): package for package in PACKAGES}
-    
-    # Process completed futures
-    for future in concurrent.futures.as_completed(future_to_package):
-        package = future_to_package[future]
+class DownloadError(Exception):
+    """A report request that will not succeed on retry (e.g. 401/403 from an expired cookie, or 404)."""
+
+
+class QGuideDownloader:
+    def __init__(self,
+                 cookie: str,
+                 store: ReportStore,
+                 max_concurrent: int = 50,
+                 min_concurrent: int = 4,
+                 timeout: int = 30,
+                 max_retries: int = 3,
+                 retry_delay: float = 0.5,
+                 retry_passes: int = 2,
+                 retry_pass_delay: float = 10.0,
+                 on_report: Optional[Callable[[List[str], str], Awaitable[None]]] = None,
+                 keep_html: bool = True,
+                 max_pending_reports: Optional[int] = None):
+        """
+        Initialize the Q Guide downloader.
+
+        Args:
+            cookie: Cookie header for the bluera report site
+            store: Report store the downloaded reports are written to
+            max_concurrent: Upper bound for the adaptive concurrency limit
+            min_concurrent: Lower bound for the adaptive concurrency limit
+            timeout: Request timeout in seconds
+            max_retries: Maximum retries per report
+            retry_delay: Base delay between retries (exponential backoff)
+            retry_passes: Extra passes over packages that still failed after their retries
+            retry_pass_delay: Base delay before each retry pass (exponential backoff)
+            on_report: Optional coroutine called with (package, html) for each downloaded report
+            keep_html: Write report bodies to the store (the manifest is always updated)
+            max_pending_reports: Cap on reports downloaded but not yet handled by on_report
+        """
+        self.cookie = cookie
+        self.store = store
+        self.manifest = DownloadManifest(store)
+        self.retry_passes = retry_passes
+        self.retry_pass_delay = retry_pass_delay
+        self.on_report = on_report
+        self.keep_html = keep_html
+        self.max_pending_reports = max_pending_reports
+        self._pending_slots = None
+        self._uncommitted = 0
+        self.timeout = timeout
+        self.scheduler = AdaptiveScheduler(
+            max_concurrent=max_concurrent,
+            min_concurrent=min_concurrent,
+            max_retries=max_retries,
+            retry_delay=retry_delay
+        )
+        self.session = None
+        self.bytes_downloaded = 0
+        # Failed with a DownloadError: recorded, but not retried in later passes
+        self.permanent_failures = []
+
+    async def __aenter__(self):
+        """Async context manager entry."""
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.scheduler.max_concurrent * 2),
+            headers={
+                'Cookie': self.cookie,
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.5',
+            }
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        if self.session:
+            await self.session.close()
+            # Small delay to allow connections to close properly
+            await asyncio.sleep(0.25)
+
+    def save_report(self, package: List[str], html: str):
+        if self.keep_html:
+            self.store.put(parse_report_filename(package[1]), html, commit=False)
+        self.manifest.record_success(package, html)
+        # Commit in chunks so an interrupted run keeps most of its progress
+        self._uncommitted += 1
+        if self._uncommitted >= 200:
+            self.store.commit()
+            self._uncommitted = 0
+
+    async def _fetch(self, url: str) -> str:
+        """Fetch a single report, translating transient failures into RetryableError and other 4xx into DownloadError."""
         try:
-            success = future.result()
-            if not success:
-                failed_downloads.append(package)
-        except Exception as exc:
-            print(f'{package[1]} generated an exception: {exc}')
-            failed_downloads.append(package)
-
-end_time = time.time()
-elapsed_time = end_time - start_time
-
-print("\n" + "="*50)
-print("Download complete!")
-print(f"Time elapsed: {elapsed_time:.2f} seconds")
-print(f"Average speed: {len(PACKAGES)/elapsed_time:.2f} files/second")
-print(f"Successfully processed: {global_count}/{len(PACKAGES)} files")
-
-if failed_downloads:
-    print(f"\nFailed downloads: {len(failed_downloads)}")
-    print("Failed files (first 10):")
-    for package in failed_downloads[:10]:
-        print(f"  - {package[1]}")
-    
-    # Save failed downloads to a file for retry
-    with open('failed_downloads.json', 'w') as f:
-        json.dump(failed_downloads, f, indent=2)
-    print("\nFailed downloads saved to failed_downloads.json for retry")
-else:
-    print("\nAll files downloaded successfully!")
\ No newline at end of file
+            async with self.session.get(url) as response:
+                if response.status == 200:
+                    return await response.text()
+                if response.status == 429 or response.status >= 500:
+                    raise RetryableError(f"status {response.status}", throttled=True)
+                raise DownloadError(f"status {response.status}")
+        except asyncio.TimeoutError:
+            raise RetryableError("timeout", throttled=True)
+        except aiohttp.ClientError as e:
+            raise RetryableError(f"{type(e).__name__}: {e}")
+
+    async def download_one(self, package: List[str]) -> Dict[str, Any]:
+        """Download and save a single report package."""
+        filename = package[1]
+        # Bound how many downloaded bodies can wait on a slow on_report consumer
+        async with self._pending_slots or contextlib.nullcontext():
+            try:
+                html = await self.scheduler.run(self._fetch, normalize_url(package[0]))
+            except RetryableError as e:
+                self.manifest.record_failure(package, str(e))
+                return {'package': package, 'status': 'failed', 'error': str(e)}
+            except DownloadError as e:
+                self.manifest.record_failure(package, str(e))
+                return {'package': package, 'status': 'failed', 'error': str(e), 'permanent': True}
+
+            self.bytes_downloaded += len(html)
+            self.save_report(package, html)
+            if self.on_report:
+                await self.on_report(package, html)
+        return {'package': package, 'status': 'downloaded', 'filename': filename}
+
+    async def _download_pass(self, packages: List[List[str]], desc: str) -> List[List[str]]:
+        """Download a list of packages once, returning the ones that failed and are worth retrying."""
+        failed = []
+        with tqdm(total=len(packages), desc=desc) as pbar:
+            for coro in asyncio.as_completed([self.download_one(p) for p in packages]):
+                result = await coro
+                if result.get('permanent'):
+                    self.permanent_failures.append(result['package'])
+                elif result['status'] == 'failed':
+                    failed.append(result['package'])
+                pbar.update(1)
+        self.store.commit()
+        return failed
+
+    async def download(self, packages: List[List[str]]) -> Dict[str, Any]:
+        """
+        Download all packages that are missing from the store, then retry
+        whatever failed in up to retry_passes further passes.
+
+        Args:
+            packages: List of [link, filename, fas_id] packages
+
+        Returns:
+            Dictionary with failed packages and statistics
+        """
+        if self.max_pending_reports and self._pending_slots is None:
+            self._pending_slots = asyncio.Semaphore(self.max_pending_reports)
+
+        pending = missing_packages(packages, self.store.keys(), self.manifest.urls())
+        skipped = len(packages) - len(pending)
+        self.permanent_failures = []
+
+        failed = await self._download_pass(pending, "Downloading Q guides")
+        first_pass_failed = len(failed)
+
+        for retry_pass in range(self.retry_passes):
+            if not failed:
+                break
+            delay = self.retry_pass_delay * (2 ** retry_pass)
+            print(f"\n{len(failed)} downloads failed, retry pass {retry_pass + 1}/{self.retry_passes} in {delay:.0f}s...")
+            await asyncio.sleep(delay)
+            failed = await self._download_pass(failed, f"Retry pass {retry_pass + 1}")
+
+        recovered = first_pass_failed - len(failed)
+        if self.permanent_failures:
+            print(f"\n{len(self.permanent_failures)} downloads were refused (4xx) and not retried - "
+                  "check that the cookie is still valid")
+        failed = failed + self.permanent_failures
+
+        stats = self.scheduler.stats()
+        stats.update({
+            'total_requested': len(packages),
+            'skipped_existing': skipped,
+            'downloaded': len(pending) - len(failed),
+            'failed': len(failed),
+            'refused': len(self.permanent_failures),
+            'recovered_on_retry': recovered,
+            'bytes_downloaded': self.bytes_downloaded,
+            'megabytes_per_second': (self.bytes_downloaded / 1e6 / stats['elapsed_time']
+                                     if stats['elapsed_time'] > 0 else 0),
+        })
+
+        return {'failed': failed, 'statistics': stats}
+
+
+def print_statistics(stats: Dict[str, Any]):
+    print("\n" + "="*50)
+    print("Download complete!")
+    print(f"Time elapsed: {stats['elapsed_time']:.2f} seconds")
+    print(f"Downloaded: {stats['downloaded']} (skipped existing: {stats['skipped_existing']}, "
+          f"failed: {stats['failed']}, recovered on retry: {stats['recovered_on_retry']})")
+    print(f"Throughput: {stats['jobs_per_second']:.2f} files/second, {stats['megabytes_per_second']:.2f} MB/second")
+    print(f"Latency: mean {stats['latency_mean']*1000:.0f}ms, p50 {stats['latency_p50']*1000:.0f}ms, "
+          f"p95 {stats['latency_p95']*1000:.0f}ms, max {stats['latency_max']*1000:.0f}ms")
+    print(f"Concurrency: final {stats['final_concurrency']}, peak {stats['peak_concurrency']} "
+          f"({stats['retries']} retries, {stats['throttle_events']} throttle events)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Download Q guide reports into the report store')
+    # Optional semester filter: e.g. "2025Fall" — only download reports matching this semester
+    parser.add_argument('semester', nargs='?', help='Only download reports for this semester (e.g. 2025Fall)')
+    parser.add_argument('--max-concurrent', type=int, default=50,
+                        help='Maximum concurrent requests (default: 50)')
+    parser.add_argument('--timeout', type=int, default=30,
+                        help='Request timeout in seconds (default: 30)')
+    parser.add_argument('--max-retries', type=int, default=3,
+                        help='Maximum retries per report (default: 3)')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='Only retry packages whose last download failed (per the manifest)')
+    parser.add_argument('--retry-passes', type=int, default=2,
+                        help='Extra passes over failed downloads (default: 2)')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH,
+                        help=f'Report store file (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--sample', type=int,
+                        help='Only download the first N reports (for testing)')
+    args = parser.parse_args()
+
+    with ReportStore(args.store) as store:
+        if args.retry_failed:
+            packages = DownloadManifest(store).failed_packages(args.semester)
+            known = {p[1] for p in packages}
+            packages += [p for p in load_legacy_failed()
+                         if p[1] not in known and (not args.semester or args.semester in p[1])]
+            print(f"Retrying {len(packages)} previously failed Q guide downloads")
+        else:
+            packages = load_packages(semester_filter=args.semester)
+            if args.semester:
+                print(f"Found {len(packages)} Q guide links for semester {args.semester}")
+            else:
+                print(f"Found {len(packages)} total Q guide links to download")
+
+        if args.sample:
+            packages = packages[:args.sample]
+
+        async with QGuideDownloader(
+            load_cookie(),
+            store,
+            max_concurrent=args.max_concurrent,
+            timeout=args.timeout,
+            max_retries=args.max_retries,
+            retry_passes=args.retry_passes
+        ) as downloader:
+            results = await downloader.download(packages)
+            manifest_summary = downloader.manifest.summary()
+
+    print_statistics(results['statistics'])
+    print(f"Manifest: {manifest_summary.get('ok', 0)} downloaded, {manifest_summary.get('failed', 0)} failed")
+
+    failed_downloads = results['failed']
+    if failed_downloads:
+        print(f"\nFailed downloads: {len(failed_downloads)}")
+        print("Failed files (first 10):")
+        for package in failed_downloads[:10]:
+            print(f"  - {package[1]}")
+        print("\nFailures are recorded in the download manifest; rerun with --retry-failed to retry them")
+    else:
+        print("\nAll files downloaded successfully!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+# single-file store for downloaded Q guide reports (replaces the QGuides/<fas_id>/*.html tree)
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import zlib
+from datetime import datetime
+from glob import glob
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+DEFAULT_STORE_PATH = 'QGuides.db'
+
+ReportKey = Tuple[str, str, str]  # (fas_id, semester_year, professor)
+
+
+def parse_report_filename(filename: str) -> Optional[ReportKey]:
+    """Split a FAS_ID_SEMESTER_YEAR_PROFESSOR report name into its key parts."""
+    parts = os.path.basename(filename).replace('.html', '').split('_')
+    if len(parts) < 3:
+        return None
+    return parts[0], parts[1], '_'.join(parts[2:])
+
+
+class ReportStore:
+    def __init__(self, path: str = DEFAULT_STORE_PATH, readonly: bool = False):
+        """
+        Open (or create) the report store.
+
+        Reports are zlib-compressed HTML bodies in a SQLite table keyed by
+        (fas_id, semester_year, professor). Professor uses the underscored
+        form from the report filename.
+
+        Args:
+            path: SQLite database file
+            readonly: Open without write access (used by analyzer workers)
+        """
+        self.path = path
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        else:
+            self.conn = sqlite3.connect(path)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    fas_id TEXT NOT NULL,
+                    semester_year TEXT NOT NULL,
+                    professor TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    body BLOB NOT NULL,
+                    sha256 TEXT,
+                    stored_at TEXT,
+                    PRIMARY KEY (fas_id, semester_year, professor)
+                ) WITHOUT ROWID
+            """)
+            self._add_content_hashes()
+            self.conn.commit()
+
+    def _add_content_hashes(self):
+        # Stores created before sha256/stored_at existed get the columns and a backfill
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(reports)')}
+        if 'sha256' in columns:
+            return
+        self.conn.execute('ALTER TABLE reports ADD COLUMN sha256 TEXT')
+        self.conn.execute('ALTER TABLE reports ADD COLUMN stored_at TEXT')
+        now = datetime.now().isoformat()
+        rows = self.conn.execute('SELECT fas_id, semester_year, professor, body FROM reports').fetchall()
+        for fas_id, semester_year, professor, body in rows:
+            self.conn.execute(
+                'UPDATE reports SET sha256 = ?, stored_at = ? WHERE fas_id = ? AND semester_year = ? AND professor = ?',
+                (hashlib.sha256(zlib.decompress(body)).hexdigest(), now, fas_id, semester_year, professor))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self.conn:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+    def commit(self):
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+
+    def keys(self, semester_filter: Optional[str] = None) -> Set[ReportKey]:
+        """Return the set of stored report keys, optionally for one semester."""
+        if semester_filter:
+            rows = self.conn.execute(
+                'SELECT fas_id, semester_year, professor FROM reports WHERE semester_year LIKE ?',
+                (f'%{semester_filter}%',))
+        else:
+            rows = self.conn.execute('SELECT fas_id, semester_year, professor FROM reports')
+        return set(rows)
+
+    def index(self) -> Dict[ReportKey, Tuple[int, str, str]]:
+        """Return key -> (size, stored_at, sha256) for every report, without reading bodies."""
+        return {
+            (fas_id, semester_year, professor): (size, stored_at, sha256)
+            for fas_id, semester_year, professor, size, stored_at, sha256 in self.conn.execute(
+                'SELECT fas_id, semester_year, professor, size, stored_at, sha256 FROM reports')
+        }
+
+    def put(self, key: ReportKey, html: str, commit: bool = True):
+        """Insert or replace a report. Pass commit=False when writing in bulk."""
+        data = html.encode('utf-8')
+        self.conn.execute(
+            'INSERT OR REPLACE INTO reports (fas_id, semester_year, professor, size, body, sha256, stored_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (*key, len(data), zlib.compress(data, 6), hashlib.sha256(data).hexdigest(),
+             datetime.now().isoformat()))
+        if commit:
+            self.conn.commit()
+
+    def get(self, key: ReportKey) -> Optional[str]:
+        row = self.conn.execute(
+            'SELECT body FROM reports WHERE fas_id = ? AND semester_year = ? AND professor = ?',
+            key).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode('utf-8', errors='ignore')
+
+    def iter_reports(self, keys: Iterable[ReportKey]) -> Iterator[Tuple[ReportKey, str]]:
+        """Yield (key, html) for each requested key that is in the store."""
+        for key in keys:
+            html = self.get(tuple(key))
+            if html is not None:
+                yield tuple(key), html
+
+    def import_directory(self, directory: str = 'QGuides') -> int:
+        """Import a legacy QGuides/<fas_id>/<file>.html tree. Returns the number imported."""
+        count = 0
+        for filepath in glob(os.path.join(directory, '**', '*.html'), recursive=True):
+            key = parse_report_filename(filepath)
+            if key is None:
+                continue
+            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                self.put(key, f.read(), commit=False)
+            count += 1
+        self.commit()
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the Q guide report store')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH,
+                        help=f'Report store file (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--import-dir', metavar='DIR',
+                        help='Import a legacy QGuides/ directory of HTML reports')
+    args = parser.parse_args()
+
+    with ReportStore(args.store) as store:
+        if args.import_dir:
+            imported = store.import_directory(args.import_dir)
+            print(f"Imported {imported} reports from {args.import_dir}")
+        total_size = sum(row[0] for row in store.conn.execute('SELECT size FROM reports'))
+        print(f"{len(store)} reports in {args.store} "
+              f"({total_size / 1e6:.1f} MB uncompressed, {os.path.getsize(args.store) / 1e6:.1f} MB on disk)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,20 @@
+import argparse
+import hashlib
 import json
+import multiprocessing
 import os
 import re
-from bs4 import BeautifulSoup
+import time
+from concurrent.futures import ProcessPoolExecutor
 from glob import glob
+from lxml import etree
 
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
+INDEX_CACHE_FILE = 'browse_index_cache.json'
+
+_html_parser = etree.HTMLParser(encoding='utf-8')
+
 def extract_fas_id(element_id):
     """Extract the FAS ID from the element id attribute."""
     if element_id and element_id.startswith('FAS-'):
@@ -16,8 +25,8 @@ def extract_fas_id(element_id):
 
 def parse_html_file(filepath):
     """Parse a single HTML file and extract course information."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f, 'html.parser')
+    with open(filepath, 'rb') as f:
+        root = etree.fromstring(f.read(), _html_parser)
     
     # Extract semester/year from filename
     filename = os.path.basename(filepath)
@@ -25,17 +34,15 @@ def parse_html_file(filepath):
     
     courses = []
     
-    for link in soup.find_all('a'):
-        if 'bluera' not in link.get('href', ''):
-            continue
-        
+    # Only the report anchors: FAS-<id>-... element ids linking to bluera
+    for link in root.xpath("//a[starts-with(@id, 'FAS-')][contains(@href, 'bluera')]"):
         element_id = link.get('id', '')
         fas_id = extract_fas_id(element_id)
         
         if not fas_id:
             continue
         
-        text = link.get_text().strip()
+        text = link.xpath('string()').strip()
         lines = [line.strip() for line in text.split('\n') if line.strip()]
         
         if not lines:
@@ -76,6 +83,42 @@ def parse_html_file(filepath):
     
     return courses
 
+def file_sha256(filepath):
+    with open(filepath, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_index_cache(path=INDEX_CACHE_FILE):
+    """Load filepath -> {'sha256', 'courses'} from the previous build, or {} if there is none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_index_cache(cache, path=INDEX_CACHE_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+def parse_html_files(html_files, cache, workers=None):
+    """
+    Parse browse pages in a process pool, reusing cached courses for files whose
+    content hash matches the last build. Updates cache in place.
+
+    Returns (courses per file in html_files order, list of files that were parsed).
+    """
+    hashes = {filepath: file_sha256(filepath) for filepath in html_files}
+    changed = [fp for fp in html_files if cache.get(fp, {}).get('sha256') != hashes[fp]]
+
+    if len(changed) > 1:
+        workers = workers or min(multiprocessing.cpu_count(), len(changed))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = list(executor.map(parse_html_file, changed))
+    else:
+        parsed = [parse_html_file(fp) for fp in changed]
+
+    for filepath, courses in zip(changed, parsed):
+        cache[filepath] = {'sha256': hashes[filepath], 'courses': courses}
+    return [cache[fp]['courses'] for fp in html_files], changed
+
 def merge_courses_by_fas_id(all_courses):
     """Merge courses by FAS ID, grouping links by semester/year."""
     merged = {}
@@ -120,57 +163,81 @@ def merge_courses_by_fas_id(all_courses):
     
     return merged
 
+def append_missing(target, values, seen):
+    """Append values not yet in target, using the set `seen` mirroring target for O(1) membership."""
+    for value in values:
+        if value not in seen:
+            seen.add(value)
+            target.append(value)
+
+def merge_into_existing(existing, new_courses):
+    """Merge new courses into existing courses_by_fas_id data: add new offerings to
+    existing FAS IDs, or add new FAS IDs. List order of existing entries is kept."""
+    for fas_id, data in new_courses.items():
+        if fas_id not in existing:
+            existing[fas_id] = data
+            continue
+
+        entry = existing[fas_id]
+        existing_links = {o['link'] for o in entry['offerings']}
+        for offering in data['offerings']:
+            if offering['link'] not in existing_links:
+                entry['offerings'].append(offering)
+        append_missing(entry['course_codes'], data['course_codes'], set(entry['course_codes']))
+        append_missing(entry['course_titles'], data['course_titles'], set(entry['course_titles']))
+        append_missing(entry['professors'], data['professors'], set(entry['professors']))
+    return existing
+
 def main():
-    import sys
+    parser = argparse.ArgumentParser(description='Build courses_by_fas_id.json from saved Q guide browse pages')
+    parser.add_argument('html_file', nargs='?',
+                        help='Only process this file and merge it into the existing courses_by_fas_id.json')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-parse every file even if its content hash is unchanged')
+    args = parser.parse_args()
 
     # If a specific file is passed as argument, only process that one
     # and merge into the existing courses_by_fas_id.json
-    if len(sys.argv) > 1:
-        html_files = [sys.argv[1]]
+    if args.html_file:
+        html_files = [args.html_file]
         incremental = True
     else:
-        html_files = glob('old_html/QReports_*.htm*')
+        html_files = sorted(glob('old_html/QReports_*.htm*'))
         if not html_files:
             html_files = glob('QReports.htm*')
         incremental = False
 
-    all_courses = []
+    output_file = 'courses_by_fas_id.json'
+    cache = {} if args.force else load_index_cache()
+    previous_files = set(cache)
 
     print(f"Processing {len(html_files)} HTML files...")
+    start = time.time()
+    per_file, changed = parse_html_files(html_files, cache, args.workers)
+    for filepath, courses in zip(html_files, per_file):
+        status = 'parsed' if filepath in changed else 'unchanged'
+        print(f"  {filepath}: {len(courses)} courses ({status})")
+    print(f"Parsed {len(changed)} of {len(html_files)} files in {time.time() - start:.2f}s")
 
-    for filepath in html_files:
-        print(f"Processing {filepath}...")
-        courses = parse_html_file(filepath)
-        all_courses.extend(courses)
-        print(f"  Found {len(courses)} courses")
+    # A full build also has to notice removed files, not just changed ones
+    if not incremental:
+        for filepath in previous_files - set(html_files):
+            del cache[filepath]
+    if not changed and os.path.exists(output_file) and (incremental or previous_files == set(html_files)):
+        print(f"\nNo browse pages changed since the last build; {output_file} is up to date")
+        return
+
+    all_courses = [course for courses in per_file for course in courses]
 
     # Merge new courses by FAS ID
     new_courses = merge_courses_by_fas_id(all_courses)
 
     # If incremental, merge into existing data
-    output_file = 'courses_by_fas_id.json'
     if incremental and os.path.exists(output_file):
         with open(output_file, 'r', encoding='utf-8') as f:
             existing = json.load(f)
-        # Merge: add new offerings to existing FAS IDs, or add new FAS IDs
-        for fas_id, data in new_courses.items():
-            if fas_id in existing:
-                existing_links = {o['link'] for o in existing[fas_id]['offerings']}
-                for offering in data['offerings']:
-                    if offering['link'] not in existing_links:
-                        existing[fas_id]['offerings'].append(offering)
-                for code in data['course_codes']:
-                    if code not in existing[fas_id]['course_codes']:
-                        existing[fas_id]['course_codes'].append(code)
-                for title in data['course_titles']:
-                    if title not in existing[fas_id]['course_titles']:
-                        existing[fas_id]['course_titles'].append(title)
-                for prof in data['professors']:
-                    if prof not in existing[fas_id]['professors']:
-                        existing[fas_id]['professors'].append(prof)
-            else:
-                existing[fas_id] = data
-        merged_courses = existing
+        merged_courses = merge_into_existing(existing, new_courses)
         print(f"\nMerged into existing data")
     else:
         merged_courses = new_courses
@@ -192,6 +259,7 @@ def main():
         print(f"  Semesters: {', '.join(set(o['semester_year'] for o in data['offerings']))}")
         print(f"  Number of offerings: {len(data['offerings'])}")
 
+    save_index_cache(cache)
     print(f"\nData saved to {output_file}")
 
 if __name__ == "__main__":
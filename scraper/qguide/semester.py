@@ -0,0 +1,86 @@
+# semester names like "2025Fall" as keys that order chronologically for any year
+
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+# Order of terms within a calendar year
+TERMS = ('Spring', 'Summer', 'Fall')
+
+_TERM_INDEX = {term.lower(): i for i, term in enumerate(TERMS)}
+_SEMESTER_RE = re.compile(r'^(\d{4})[ _-]?(' + '|'.join(TERMS) + r')$', re.IGNORECASE)
+
+
+class Semester:
+    __slots__ = ('name', 'year', 'term', 'ordinal')
+
+    def __init__(self, name: str):
+        """
+        Parse a semester name such as "2025Fall" (also "2025 Fall" or "2025-Fall").
+
+        ordinal is year * len(TERMS) + term position, so comparing two semesters
+        is one integer comparison. Names that do not parse get ordinal -1 and
+        sort before every real semester, alphabetically among themselves.
+        """
+        self.name = name
+        match = _SEMESTER_RE.match(name.strip())
+        if match:
+            self.year = int(match.group(1))
+            self.term = TERMS[_TERM_INDEX[match.group(2).lower()]]
+            self.ordinal = self.year * len(TERMS) + _TERM_INDEX[match.group(2).lower()]
+        else:
+            self.year = None
+            self.term = None
+            self.ordinal = -1
+
+    @property
+    def valid(self) -> bool:
+        return self.ordinal >= 0
+
+    def _key(self):
+        return self.ordinal, self.name
+
+    def __lt__(self, other: 'Semester') -> bool:
+        return self._key() < other._key()
+
+    def __le__(self, other: 'Semester') -> bool:
+        return self._key() <= other._key()
+
+    def __gt__(self, other: 'Semester') -> bool:
+        return self._key() > other._key()
+
+    def __ge__(self, other: 'Semester') -> bool:
+        return self._key() >= other._key()
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Semester) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return f"Semester({self.name!r})"
+
+    def __str__(self) -> str:
+        return self.name
+
+
+@lru_cache(maxsize=None)
+def parse_semester(name: str) -> Semester:
+    """Cached Semester for a name; the same few names are looked up for every course."""
+    return Semester(name)
+
+
+def semester_sort_key(name: str) -> Semester:
+    """Key function for sorting semester names chronologically."""
+    return parse_semester(name)
+
+
+def sort_semesters(names: Iterable[str]) -> List[str]:
+    """Return semester names from oldest to newest."""
+    return sorted(names, key=semester_sort_key)
+
+
+def latest_semester(names: Iterable[str]) -> Optional[str]:
+    """Return the newest semester name, or None if there are none."""
+    return max(names, key=semester_sort_key, default=None)
@@ -0,0 +1,154 @@
+# downloads q guides and analyzes each report as soon as it arrives,
+# so the parse work overlaps the network work instead of following it
+
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+from analysis_cache import AnalysisCache
+from analyzer import (EXTRACTOR_VERSION, OfferingIndex, aggregate_results, analyze_report_in_worker, build_result,
+                      init_worker, metrics_of, write_analytics)
+from distributions import DEFAULT_DISTRIBUTIONS_PATH, RatingDistributions
+from download_manifest import DownloadManifest, missing_packages
+from downloader import QGuideDownloader, load_cookie, load_packages, print_statistics
+from report_store import DEFAULT_STORE_PATH, ReportStore, parse_report_filename
+
+class StreamingAnalyzer:
+    def __init__(self, pool: ProcessPoolExecutor, cache: AnalysisCache):
+        """
+        Feed report bodies into a process pool as they arrive.
+
+        Args:
+            pool: Process pool initialized with analyzer.init_worker
+            cache: Analysis cache the extracted metrics are written to
+        """
+        self.pool = pool
+        self.cache = cache
+        self.parsed = 0
+        self.unparseable = 0
+        self.parse_time = 0.0
+
+    async def on_report(self, package: List[str], html: str):
+        loop = asyncio.get_running_loop()
+        key = parse_report_filename(package[1])
+        start = time.perf_counter()
+        result = await loop.run_in_executor(self.pool, analyze_report_in_worker, html, key)
+        self.parse_time += time.perf_counter() - start
+
+        data = html.encode('utf-8')
+        self.cache.put(key, len(data), None, hashlib.sha256(data).hexdigest(),
+                       metrics_of(result) if result else None)
+        if result:
+            self.parsed += 1
+        else:
+            self.unparseable += 1
+
+
+async def run_streaming(packages: List[List[str]],
+                        store: ReportStore,
+                        keep_html: bool = False,
+                        workers: int = None,
+                        max_concurrent: int = 50,
+                        courses_file: str = 'courses_by_fas_id.json') -> Dict[str, Any]:
+    """
+    Download and analyze every package that is not in the analysis cache yet.
+
+    Reports already in the store are analyzed from there; the rest are
+    downloaded and handed straight to the parser pool. Only the extracted
+    metrics are persisted (in the analysis cache) unless keep_html is set.
+
+    Returns:
+        Dictionary with per-report results for everything cached and statistics
+    """
+    cache = AnalysisCache(store, EXTRACTOR_VERSION)
+    analyzed = cache.entries()
+    todo = [p for p in packages if parse_report_filename(p[1]) not in analyzed]
+    to_download = missing_packages(todo, store.keys(), DownloadManifest(store).urls())
+    download_names = {p[1] for p in to_download}
+    from_store = [p for p in todo if p[1] not in download_names]
+
+    workers = workers or min(multiprocessing.cpu_count(), 8)
+    print(f"{len(packages) - len(todo)} reports already analyzed, "
+          f"{len(from_store)} to analyze from the store, {len(to_download)} to download")
+
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(courses_file,)) as pool:
+        analyzer = StreamingAnalyzer(pool, cache)
+
+        # Stored reports need no network; feed them in chunks to bound memory
+        chunk_size = workers * 4
+        for i in range(0, len(from_store), chunk_size):
+            await asyncio.gather(*[
+                analyzer.on_report(package, store.get(parse_report_filename(package[1])))
+                for package in from_store[i:i + chunk_size]
+            ])
+
+        async with QGuideDownloader(
+            load_cookie(),
+            store,
+            max_concurrent=max_concurrent,
+            on_report=analyzer.on_report,
+            keep_html=keep_html,
+            max_pending_reports=workers * 4
+        ) as downloader:
+            results = await downloader.download(to_download)
+
+    cache.commit()
+
+    # Rebuild results from every cached report, not just this run's
+    offering_index = OfferingIndex.from_file(courses_file)
+    all_results = [
+        build_result(key, entry[3], offering_index)
+        for key, entry in cache.entries().items() if entry[3]
+    ]
+
+    stats = results['statistics']
+    stats.update({
+        'wall_time': time.time() - start_time,
+        'reports_parsed': analyzer.parsed,
+        'reports_unparseable': analyzer.unparseable,
+        'parse_time': analyzer.parse_time,
+    })
+    return {'results': all_results, 'failed': results['failed'], 'statistics': stats}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Download and analyze Q guide reports in one streaming pass')
+    parser.add_argument('semester', nargs='?', help='Only process reports for this semester (e.g. 2025Fall)')
+    parser.add_argument('--keep-html', action='store_true',
+                        help='Also write the raw report HTML to the report store')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: CPU count, max 8)')
+    parser.add_argument('--max-concurrent', type=int, default=50,
+                        help='Maximum concurrent requests (default: 50)')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH,
+                        help=f'Report store file (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--split-sections', action='store_true',
+                        help='Write individual_sections to a separate file instead of inline')
+    args = parser.parse_args()
+
+    packages = load_packages(semester_filter=args.semester)
+    print(f"Found {len(packages)} Q guide links")
+
+    with ReportStore(args.store) as store:
+        results = await run_streaming(packages, store, keep_html=args.keep_html,
+                                      workers=args.workers, max_concurrent=args.max_concurrent)
+
+    stats = results['statistics']
+    print_statistics(stats)
+    print(f"Parsed {stats['reports_parsed']} reports ({stats['reports_unparseable']} unparseable) "
+          f"in {stats['wall_time']:.2f}s wall time")
+
+    aggregated_data = aggregate_results(results['results'])
+    output_file = 'results/course_analytics.json'
+    write_analytics(aggregated_data, output_file, split=args.split_sections)
+    print(f"\nAnalytics for {len(aggregated_data)} courses saved to {output_file}")
+    RatingDistributions.from_results(results['results']).save(DEFAULT_DISTRIBUTIONS_PATH)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -71,9 +71,9 @@ echo ""
 echo "Step 3: Analyzing Q-Guide data..."
 echo "----------------------------------------"
 if [ -n "$HTML_FILE" ]; then
-    python3 analyzer.py --merge
+    python3 analyzer.py --merge --split-sections
 else
-    python3 analyzer.py
+    python3 analyzer.py --split-sections
 fi
 if [ $? -ne 0 ]; then
     echo "Error: Failed to analyze Q-Guide data"
@@ -68,7 +68,7 @@ echo ""
 # Step 3: Merge all data sources (all terms into one master_courses.json)
 echo "Step 3: Merging all data sources..."
 echo "----------------------------------------"
-python3 master_merge.py
+python3 master_merge.py --incremental --deltas 5 --search-index --time-index
 if [ $? -ne 0 ]; then
     echo "Error: Failed to merge data for $TERM $YEAR"
     exit 1
@@ -82,18 +82,17 @@ echo "----------------------------------------"
 mkdir -p ../public/data
 
 if [ -f "results/master_courses.json" ]; then
-    cp results/master_courses.json ../public/data/
-    echo "✓ Copied master_courses.json"
+    python3 publish.py
+    if [ $? -ne 0 ]; then
+        echo "Error: Failed to publish data for $TERM $YEAR"
+        exit 1
+    fi
+    echo "✓ Published master_courses.json and timestamp file"
 else
     echo "Error: results/master_courses.json not found"
     exit 1
 fi
 
-if [ -f "results/last_updated.json" ]; then
-    cp results/last_updated.json ../public/data/
-    echo "✓ Copied timestamp file"
-fi
-
 echo ""
 echo "✓ Files copied to public directory"
 echo ""
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""Enumerate conflict-free schedules for a wishlist of courses.
+
+Every course needs one section of each component it offers (lecture plus
+section, lab, ...). A section's meeting time is a week bitmask of 5-minute slots
+(section_times.week_mask), so two sections conflict exactly when their masks
+share a bit.
+
+Sections of the same course component with the same mask are interchangeable
+for conflicts, so they are collapsed into one "class" and only expanded when
+results are printed. Search runs over classes:
+- Pairwise compatibility is computed once, as one bitset per class over all
+  classes.
+- Backtracking keeps the bitset of classes still compatible with everything
+  chosen, and prunes as soon as a later component has no compatible class
+  left (forward checking).
+- Schedule counts are memoized on (depth, remaining compatible classes).
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import random
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from section_times import DAYS, SLOT_MINUTES, SLOTS_PER_DAY, section_days, section_minutes, week_mask
+
+DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+
+# Ranking criteria: name -> description; every score is "lower is better".
+# All but gaps can only get worse as sections are added, which bounds partial schedules.
+CRITERIA = {
+    'workload': 'total latest_hours_per_week',
+    'rating': 'average latest_course_rating (higher first)',
+    'days': 'number of days with class',
+    'gaps': 'minutes of gaps between classes',
+    'start': 'earliest class start (later first)',
+    'end': 'latest class end (earlier first)',
+}
+DEFAULT_CRITERIA = ('workload', 'days', 'gaps')
+
+
+class Option:
+    """Sections of one course component that meet at exactly the same times."""
+    __slots__ = ('group', 'course', 'mask', 'sections')
+
+    def __init__(self, group: int, course: Dict, mask: int):
+        self.group = group
+        self.course = course
+        self.mask = mask
+        self.sections = []
+
+
+class Group:
+    """One component of one course (e.g. the labs of LIFESCI 1A); a schedule picks one option."""
+    __slots__ = ('course', 'component', 'options')
+
+    def __init__(self, course: Dict, component: str):
+        self.course = course
+        self.component = component
+        self.options = []
+
+
+def section_mask(section: Dict) -> int:
+    """Week bitmask of a section; 0 for sections without a meeting time (they never conflict)."""
+    start, end = section_minutes(section)
+    days = section_days(section)
+    if start is None or not days:
+        return 0
+    return week_mask(days, start, end)
+
+
+def build_groups(courses: Sequence[Dict]) -> List[Group]:
+    """One group per (course, component), each with its sections collapsed into options by mask."""
+    groups = []
+    for course in courses:
+        by_component = {}
+        for section in course.get('current_sections') or []:
+            component = section.get('course_component') or ''
+            if component not in by_component:
+                by_component[component] = Group(course, component)
+                groups.append(by_component[component])
+            group = by_component[component]
+            mask = section_mask(section)
+            for option in group.options:
+                if option.mask == mask:
+                    break
+            else:
+                option = Option(len(groups) - 1, course, mask)
+                group.options.append(option)
+            option.sections.append(section)
+    # Fewest options first: small branching near the root prunes the most
+    groups.sort(key=lambda g: len(g.options))
+    for index, group in enumerate(groups):
+        for option in group.options:
+            option.group = index
+    return groups
+
+
+class ScheduleSearch:
+    """Bitset backtracking over the options of a fixed set of groups."""
+
+    def __init__(self, groups: List[Group]):
+        self.groups = groups
+        self.options = [option for group in groups for option in group.options]
+        self.group_bits = []
+        position = 0
+        for group in groups:
+            self.group_bits.append(((1 << len(group.options)) - 1) << position)
+            position += len(group.options)
+        # Options of every group after depth d, for memo keys and forward checking
+        self.later_bits = [0] * (len(groups) + 1)
+        for depth in range(len(groups) - 1, -1, -1):
+            self.later_bits[depth] = self.later_bits[depth + 1] | self.group_bits[depth]
+
+        # compatible[i]: options of other groups that do not conflict with option i
+        self.compatible = []
+        for option in self.options:
+            bits = 0
+            for j, other in enumerate(self.options):
+                if other.group != option.group and not (option.mask & other.mask):
+                    bits |= 1 << j
+            self.compatible.append(bits)
+        # weight_planes[k]: options whose number of sections has bit k set, so the
+        # sections behind any set of options add up with a few popcounts
+        self.weight_planes = []
+        for i, option in enumerate(self.options):
+            weight = len(option.sections)
+            for k in range(weight.bit_length()):
+                if len(self.weight_planes) <= k:
+                    self.weight_planes.append(0)
+                if weight & (1 << k):
+                    self.weight_planes[k] |= 1 << i
+        self._count_memo = {}
+
+    def _option_indices(self, bits: int) -> Iterator[int]:
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def _feasible(self, depth: int, candidates: int) -> bool:
+        return all(candidates & self.group_bits[d] for d in range(depth, len(self.groups)))
+
+    def count(self, depth: int = 0, candidates: Optional[int] = None, by_section: bool = True) -> int:
+        """Number of schedules (of sections if by_section, else of options) from depth on."""
+        if candidates is None:
+            candidates = self.later_bits[0]
+        if depth == len(self.groups):
+            return 1
+        if depth == len(self.groups) - 1:
+            # Last component: every remaining compatible option completes a schedule
+            last = candidates & self.group_bits[depth]
+            if not by_section:
+                return last.bit_count()
+            return sum((last & plane).bit_count() << k for k, plane in enumerate(self.weight_planes))
+        key = (depth, candidates & self.later_bits[depth], by_section)
+        if key in self._count_memo:
+            return self._count_memo[key]
+        total = 0
+        for i in self._option_indices(candidates & self.group_bits[depth]):
+            remaining = candidates & self.compatible[i]
+            if self._feasible(depth + 1, remaining):
+                weight = len(self.options[i].sections) if by_section else 1
+                total += weight * self.count(depth + 1, remaining, by_section)
+        self._count_memo[key] = total
+        return total
+
+    def schedules(self, prune: Optional[Callable[[int], bool]] = None) -> Iterator[Tuple[Option, ...]]:
+        """
+        Every conflict-free choice of one option per group.
+
+        prune(mask), if given, is called with the week mask of each partial
+        schedule and cuts that branch when it returns True.
+        """
+        if not self.groups:
+            return
+        chosen = []
+
+        def backtrack(depth, candidates, mask):
+            if depth == len(self.groups):
+                yield tuple(chosen)
+                return
+            for i in self._option_indices(candidates & self.group_bits[depth]):
+                remaining = candidates & self.compatible[i]
+                if not self._feasible(depth + 1, remaining):
+                    continue
+                option = self.options[i]
+                if prune is not None and prune(mask | option.mask):
+                    continue
+                chosen.append(option)
+                yield from backtrack(depth + 1, remaining, mask | option.mask)
+                chosen.pop()
+
+        if self._feasible(0, self.later_bits[0]):
+            yield from backtrack(0, self.later_bits[0], 0)
+
+
+def schedule_mask(options: Sequence[Option]) -> int:
+    mask = 0
+    for option in options:
+        mask |= option.mask
+    return mask
+
+
+def mask_stats(mask: int) -> Dict[str, int]:
+    """Days with class, gap minutes, and earliest start / latest end (minutes) of a week mask."""
+    days = 0
+    gaps = 0
+    start = None
+    end = None
+    for i in range(len(DAYS)):
+        day = (mask >> (i * SLOTS_PER_DAY)) & DAY_MASK
+        if not day:
+            continue
+        days += 1
+        first = (day & -day).bit_length() - 1
+        last = day.bit_length()
+        gaps += (last - first - day.bit_count()) * SLOT_MINUTES
+        start = first if start is None else min(start, first)
+        end = last if end is None else max(end, last)
+    return {
+        'days': days,
+        'gaps': gaps,
+        'start': (start or 0) * SLOT_MINUTES,
+        'end': (end or 0) * SLOT_MINUTES,
+    }
+
+
+# Best value each time-based criterion could take, for bounding a whole course combination
+TIME_CRITERIA_FLOOR = {'days': 0, 'gaps': 0, 'start': -24 * 60, 'end': 0}
+
+
+def course_scores(courses: Sequence[Dict]) -> Dict[str, float]:
+    """The criteria that depend only on which courses are taken."""
+    ratings = [c.get('latest_course_rating') or 0 for c in courses if c.get('latest_course_rating')]
+    return {
+        'workload': round(sum(c.get('latest_hours_per_week') or 0 for c in courses), 2),
+        'rating': -round(sum(ratings) / len(ratings), 2) if ratings else 0,
+    }
+
+
+def schedule_scores(courses: Sequence[Dict], mask: int, fixed: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """All criteria of a schedule; pass fixed=course_scores(courses) to avoid recomputing it."""
+    stats = mask_stats(mask)
+    scores = dict(fixed if fixed is not None else course_scores(courses))
+    scores['days'] = stats['days']
+    scores['gaps'] = stats['gaps']
+    scores['start'] = -stats['start']
+    scores['end'] = stats['end']
+    return scores
+
+
+def generate_schedules(courses: Sequence[Dict], choose: Optional[int] = None,
+                       criteria: Sequence[str] = DEFAULT_CRITERIA, top: int = 10,
+                       bound: bool = True, count: bool = False) -> Tuple[List[Dict], Optional[int]]:
+    """
+    Rank conflict-free schedules of the wishlist courses.
+
+    With choose=k, schedules of every k-course subset of the wishlist compete;
+    subsets are tried best-first by the criteria that only depend on the courses.
+    Once `top` schedules are kept, subsets and partial schedules that already
+    score no better than the worst of them are cut (branch and bound; a
+    partial schedule's gaps are bounded by 0). bound=False ranks every
+    schedule, as a reference.
+
+    Returns:
+        Tuple of (the best `top` schedules, total number of section-level
+        schedules if count else None)
+    """
+    choose = choose or len(courses)
+    subsets = []
+    for subset in itertools.combinations(courses, choose):
+        fixed = course_scores(subset)
+        floor = {**TIME_CRITERIA_FLOOR, **fixed}
+        subsets.append((tuple(floor[name] for name in criteria), subset, fixed))
+    subsets.sort(key=lambda item: item[0])
+
+    # A partial schedule's gaps can still shrink, so with gaps first there is nothing to bound
+    partial_bound = bound and criteria[0] != 'gaps'
+
+    # Heap root is the worst kept schedule; on ties the one found first wins
+    best = []
+    total = 0
+    counter = itertools.count()
+
+    def worst_key():
+        return tuple(-value for value in best[0][0])
+
+    for floor, subset, fixed in subsets:
+        beaten = bound and len(best) == top and floor >= worst_key()
+        if beaten and not count:
+            break
+        search = ScheduleSearch(build_groups(subset))
+        if count:
+            total += search.count()
+        if beaten:
+            continue
+
+        def prune(mask):
+            if not partial_bound or len(best) < top or not mask:
+                return False
+            scores = schedule_scores(subset, mask, fixed)
+            scores['gaps'] = 0
+            return tuple(scores[name] for name in criteria) >= worst_key()
+
+        for options in search.schedules(prune):
+            scores = schedule_scores(subset, schedule_mask(options), fixed)
+            item = (tuple(-scores[name] for name in criteria), -next(counter), subset, options, scores)
+            if len(best) < top:
+                heapq.heappush(best, item)
+            elif item[:2] > best[0][:2]:
+                heapq.heapreplace(best, item)
+
+    ranked = sorted(best, key=lambda item: (tuple(-value for value in item[0]), -item[1]))
+    return [
+        {'courses': subset, 'options': options, 'scores': scores}
+        for _, _, subset, options, scores in ranked
+    ], total if count else None
+
+
+def brute_force_count(courses: Sequence[Dict]) -> int:
+    """Schedule count by trying every combination of sections (reference for --benchmark)."""
+    components = []
+    for course in courses:
+        by_component = {}
+        for section in course.get('current_sections') or []:
+            by_component.setdefault(section.get('course_component') or '', []).append(section_mask(section))
+        components.extend(by_component.values())
+    total = 0
+    for masks in itertools.product(*components):
+        used = 0
+        for mask in masks:
+            if used & mask:
+                break
+            used |= mask
+        else:
+            total += 1
+    return total
+
+
+def find_courses(catalog: List[Dict], wanted: Sequence[str]) -> List[Dict]:
+    """Look up wishlist entries by course_id, or by course code ("COMPSCI 50")."""
+    by_id = {c.get('course_id'): c for c in catalog}
+    by_code = {(c.get('course_code') or '').lower(): c for c in catalog}
+    courses = []
+    for key in wanted:
+        course = by_id.get(key) or by_code.get(key.lower())
+        if course is None:
+            raise SystemExit(f"Course not found: {key}")
+        courses.append(course)
+    return courses
+
+
+def format_minutes(minutes: int) -> str:
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d}{'am' if hour < 12 else 'pm'}"
+
+
+def print_schedule(rank: int, schedule: Dict, criteria: Sequence[str]):
+    scores = schedule['scores']
+    shown = []
+    for name in criteria:
+        value = abs(scores[name]) if name in ('rating', 'start') else scores[name]
+        shown.append(f"{name} {format_minutes(value) if name in ('start', 'end') else value}")
+    shown = ', '.join(shown)
+    print(f"#{rank}: {shown}")
+    order = {id(course): i for i, course in enumerate(schedule['courses'])}
+    options = sorted(schedule['options'], key=lambda o: (order[id(o.course)], o.sections[0].get('course_component', '')))
+    for option in options:
+        first = option.sections[0]
+        start, end = section_minutes(first)
+        when = (f"{first.get('weekdays', '')} {format_minutes(start)}-{format_minutes(end)}"
+                if start is not None and option.mask else 'no meeting time')
+        sections = ', '.join(s.get('section', '') for s in option.sections)
+        print(f"    {option.course.get('course_code', ''):<16} {first.get('course_component', ''):<11} "
+              f"{when:<40} section {sections}")
+
+
+def large_wishlists(catalog: List[Dict], size: int) -> List[Dict]:
+    """
+    A worst-case wishlist of `size` courses that still has schedules.
+
+    Courses with the most distinct section times are added first, skipping
+    any that would leave no conflict-free schedule.
+    """
+    def options(course):
+        return sum(len(g.options) for g in build_groups([course]))
+
+    wishlist = []
+    for course in sorted(catalog, key=lambda c: (-options(c), c.get('course_id', ''))):
+        if len(wishlist) == size:
+            break
+        if ScheduleSearch(build_groups(wishlist + [course])).count(by_section=False):
+            wishlist.append(course)
+    return wishlist
+
+
+def synthetic_catalog(size: int, sections: int, seed: int = 0) -> List[Dict]:
+    """
+    Courses shaped like large real ones: one to three lecture offerings on the
+    usual 75-minute grid, `sections` discussion sections spread over the week,
+    and (every third course) labs.
+    """
+    rng = random.Random(seed)
+    patterns = [('monday', 'wednesday'), ('tuesday', 'thursday')]
+    lecture_starts = [9 * 60, 10 * 60 + 30, 12 * 60, 13 * 60 + 30, 15 * 60, 16 * 60 + 30]
+    lecture_slots = [(pattern, start) for pattern in patterns for start in lecture_starts]
+
+    def make_section(number, component, days, start, length):
+        section = {
+            'section': f"{number:03d}",
+            'course_component': component,
+            'start_time': format_minutes(start),
+            'end_time': format_minutes(start + length),
+            'weekdays': ', '.join(day.capitalize() for day in days),
+        }
+        for day in DAYS:
+            section[f'lecture_{day}'] = day in days
+        return section
+
+    catalog = []
+    for i in range(size):
+        course_sections = [
+            make_section(n + 1, 'Lecture', days, start, 75)
+            for n, (days, start) in enumerate(rng.sample(lecture_slots, rng.randint(1, 3)))
+        ]
+        for n in range(sections):
+            day = rng.choice(DAYS[1:6])
+            course_sections.append(make_section(100 + n, 'Section', (day,), rng.randrange(9 * 60, 21 * 60, 30), 60))
+        if i % 3 == 0:
+            for n in range(sections // 2):
+                day = rng.choice(DAYS[1:6])
+                course_sections.append(make_section(200 + n, 'Laboratory', (day,), rng.randrange(9 * 60, 18 * 60, 60), 180))
+        catalog.append({
+            'course_id': f"SYN{i:03d}",
+            'course_code': f"SYN {i}",
+            'latest_hours_per_week': round(rng.uniform(3, 15), 1),
+            'latest_course_rating': round(rng.uniform(3, 5), 2),
+            'current_sections': course_sections,
+        })
+    return catalog
+
+
+def benchmark(courses: List[Dict], choose: int, criteria: Sequence[str], top: int):
+    """
+    Time ranking the best `choose`-course schedules of a large wishlist, and
+    check counts and pruning on a brute-forceable part of the best combination.
+    """
+    sections = sum(len(c.get('current_sections') or []) for c in courses)
+    subsets = sum(1 for _ in itertools.combinations(courses, choose))
+    print(f"Benchmark wishlist: {len(courses)} courses, {sections} sections, "
+          f"choosing {choose} ({subsets} course combinations)")
+
+    start = time.time()
+    results, _ = generate_schedules(courses, choose, criteria, top)
+    ranked_time = time.time() - start
+    print(f"  ranked by {', '.join(criteria)} (top {top}) in {ranked_time:.2f}s")
+    start = time.time()
+    _, total = generate_schedules(courses, choose, criteria, top, count=True)
+    count_time = time.time() - start
+    print(f"  with counting: {total} conflict-free schedules in {count_time:.2f}s "
+          f"({count_time / subsets * 1000:.2f} ms per combination)")
+    if results:
+        print(f"  best: {', '.join(c.get('course_code', '') for c in results[0]['courses'])} {results[0]['scores']}")
+
+    # Check on the best combination, which has schedules (as does any part of it); brute
+    # force only where it finishes, so drop courses until the product is small
+    if not results:
+        print("  no conflict-free schedules to check")
+        raise SystemExit(1)
+    small = list(results[0]['courses'])
+    while len(small) > 1:
+        product = 1
+        for course in small:
+            for group in build_groups([course]):
+                product *= sum(len(o.sections) for o in group.options)
+        if product <= 2_000_000:
+            break
+        small.pop()
+    start = time.time()
+    expected = brute_force_count(small)
+    brute_time = time.time() - start
+    start = time.time()
+    got = ScheduleSearch(build_groups(small)).count()
+    fast_time = time.time() - start
+    bounded, _ = generate_schedules(small, None, criteria, top)
+    exhaustive, _ = generate_schedules(small, None, criteria, top, bound=False)
+    same_ranking = [r['scores'] for r in bounded] == [r['scores'] for r in exhaustive]
+    print(f"  {len(small)}-course check: brute force {expected} schedules in {brute_time:.2f}s, "
+          f"bitset search {got} in {fast_time * 1000:.1f} ms ({'OK' if got == expected else 'MISMATCH'}); "
+          f"pruned ranking {'matches' if same_ranking else 'DIFFERS FROM'} exhaustive ranking")
+    if got != expected or not expected or not same_ranking:
+        raise SystemExit(1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Enumerate conflict-free schedules for a wishlist of courses')
+    parser.add_argument('courses', nargs='*', help='course_ids or course codes')
+    parser.add_argument('--input', default='results/master_courses.json', help='Merged course list')
+    parser.add_argument('--choose', type=int,
+                        help='Only take this many of the wishlist courses (with --benchmark, default 4)')
+    parser.add_argument('--rank', default=','.join(DEFAULT_CRITERIA),
+                        help=f"Comma-separated ranking criteria, in priority order: {', '.join(CRITERIA)} "
+                             f"(default: {','.join(DEFAULT_CRITERIA)})")
+    parser.add_argument('--top', type=int, default=10, help='Number of schedules to show')
+    parser.add_argument('--count', action='store_true', help='Also count every conflict-free schedule')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Benchmark an N-course worst-case wishlist')
+    parser.add_argument('--synthetic', type=int, metavar='SECTIONS',
+                        help='With --benchmark, use generated courses with this many sections each instead of --input')
+    args = parser.parse_args()
+
+    criteria = [name.strip() for name in args.rank.split(',') if name.strip()]
+    unknown = [name for name in criteria if name not in CRITERIA]
+    if unknown:
+        parser.error(f"unknown ranking criteria: {', '.join(unknown)}")
+
+    if args.benchmark and args.synthetic:
+        benchmark(synthetic_catalog(args.benchmark, args.synthetic), args.choose or 4, criteria, args.top)
+        return
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+
+    if args.benchmark:
+        benchmark(large_wishlists(catalog, args.benchmark), args.choose or 4, criteria, args.top)
+        return
+    if not args.courses:
+        parser.error('give course_ids (or --benchmark N)')
+    courses = find_courses(catalog, args.courses)
+    if args.choose and not 0 < args.choose <= len(courses):
+        parser.error('--choose must be between 1 and the number of courses')
+
+    start = time.time()
+    results, total = generate_schedules(courses, args.choose, criteria, args.top, count=args.count)
+    if not results:
+        print(f"No conflict-free schedules ({time.time() - start:.2f}s)")
+        return
+    found = f"{total} conflict-free schedules" if args.count else f"Best {len(results)} schedules"
+    print(f"{found} ({time.time() - start:.2f}s), ranked by {', '.join(criteria)}\n")
+    for rank, schedule in enumerate(results, 1):
+        print_schedule(rank, schedule, criteria)
+
+
+if __name__ == "__main__":
+    main()
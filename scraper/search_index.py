@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""Precomputed search index for master_courses.json.
+
+Course codes (current and all_historical_codes), titles, instructor names and
+descriptions are normalized (accents stripped, lowercased, split on anything
+that is not a letter or digit) into per-field sorted term lists with postings.
+A course's doc id is its position in master_courses.json. Postings are sorted
+doc ids stored as gaps, so they stay small integers. Codes and instructor names
+also get prefix postings, so the first few letters of a code or name resolve
+in a single lookup. They also get trigram postings, which find mid-string
+matches such as "sci 5" in "compsci 50".
+
+search() is the reference query implementation and linear_search() is the
+equivalent scan over the course list; --verify checks they agree.
+"""
+
+import argparse
+import bisect
+import json
+import random
+import re
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Set
+
+SEARCH_INDEX_FORMAT = 'crimsoncal-search'
+SEARCH_INDEX_VERSION = 1
+
+# Prefix postings are kept for code and instructor terms up to this many characters;
+# longer query tokens fall back to a range scan of the sorted term list
+MAX_PREFIX_LENGTH = 8
+
+# Fields with prefix and trigram postings (short strings people type partially)
+SUBSTRING_FIELDS = ('code', 'instructor')
+WORD_FIELDS = ('code', 'title', 'instructor', 'description')
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse everything but letters and digits to single spaces."""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM_RE.sub(' ', text.lower()).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    return normalize(text).split()
+
+
+def course_instructors(course: Dict) -> List[str]:
+    """Distinct instructor names of a course's current sections, in first-seen order."""
+    names = []
+    for section in course.get('current_sections') or []:
+        for name in (section.get('instructors') or '').split(','):
+            name = name.strip()
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def course_codes(course: Dict) -> List[str]:
+    codes = [course.get('course_code') or '']
+    codes.extend(course.get('all_historical_codes') or [])
+    return list(dict.fromkeys(code for code in codes if code))
+
+
+def field_strings(course: Dict) -> Dict[str, List[str]]:
+    """Normalized strings of each searchable field of a course."""
+    titles = [course.get('course_title') or '']
+    titles.extend(course.get('all_historical_titles') or [])
+    return {
+        'code': [normalize(code) for code in course_codes(course)],
+        'title': [normalize(title) for title in dict.fromkeys(titles) if title],
+        'instructor': [normalize(name) for name in course_instructors(course)],
+        'description': [normalize(course.get('description') or '')],
+    }
+
+
+def field_terms(field: str, strings: List[str]) -> Set[str]:
+    terms = set()
+    for string in strings:
+        words = string.split()
+        terms.update(words)
+        if field == 'code' and len(words) > 1:
+            # "compsci 50" is also typed as "compsci50"
+            terms.add(''.join(words))
+    return terms
+
+
+def trigrams(string: str) -> Set[str]:
+    return {string[i:i + 3] for i in range(len(string) - 2)}
+
+
+def encode_postings(doc_ids: Iterable[int]) -> List[int]:
+    """Sorted doc ids as gaps (first id, then differences)."""
+    gaps = []
+    previous = 0
+    for doc_id in sorted(doc_ids):
+        gaps.append(doc_id - previous)
+        previous = doc_id
+    return gaps
+
+
+def decode_postings(gaps: List[int]) -> List[int]:
+    doc_ids = []
+    total = 0
+    for gap in gaps:
+        total += gap
+        doc_ids.append(total)
+    return doc_ids
+
+
+def build_search_index(courses: List[Dict]) -> Dict[str, Any]:
+    """Build the index for the master_courses.json list."""
+    term_docs = {field: {} for field in WORD_FIELDS}
+    prefix_docs = {field: {} for field in SUBSTRING_FIELDS}
+    trigram_docs = {field: {} for field in SUBSTRING_FIELDS}
+    strings = {field: [] for field in SUBSTRING_FIELDS}
+
+    for doc_id, course in enumerate(courses):
+        for field, values in field_strings(course).items():
+            for term in field_terms(field, values):
+                term_docs[field].setdefault(term, set()).add(doc_id)
+                if field in SUBSTRING_FIELDS:
+                    for length in range(1, min(len(term), MAX_PREFIX_LENGTH) + 1):
+                        prefix_docs[field].setdefault(term[:length], set()).add(doc_id)
+            if field in SUBSTRING_FIELDS:
+                joined = '|'.join(values)
+                strings[field].append(joined)
+                for value in values:
+                    for gram in trigrams(value):
+                        trigram_docs[field].setdefault(gram, set()).add(doc_id)
+
+    fields = {}
+    for field in WORD_FIELDS:
+        terms = sorted(term_docs[field])
+        fields[field] = {
+            'terms': terms,
+            'postings': [encode_postings(term_docs[field][term]) for term in terms],
+        }
+        if field in SUBSTRING_FIELDS:
+            fields[field]['prefixes'] = {
+                prefix: encode_postings(docs) for prefix, docs in sorted(prefix_docs[field].items())
+            }
+            fields[field]['trigrams'] = {
+                gram: encode_postings(docs) for gram, docs in sorted(trigram_docs[field].items())
+            }
+
+    return {
+        'format': SEARCH_INDEX_FORMAT,
+        'version': SEARCH_INDEX_VERSION,
+        'max_prefix_length': MAX_PREFIX_LENGTH,
+        'docs': [course.get('course_id') for course in courses],
+        'fields': fields,
+        # Normalized code/instructor strings ("|"-joined) to confirm trigram candidates
+        'strings': strings,
+    }
+
+
+def _term_range_docs(field_index: Dict, token: str) -> Set[int]:
+    """Docs with a term starting with token, by binary search over the sorted terms."""
+    terms = field_index['terms']
+    docs = set()
+    i = bisect.bisect_left(terms, token)
+    while i < len(terms) and terms[i].startswith(token):
+        docs.update(decode_postings(field_index['postings'][i]))
+        i += 1
+    return docs
+
+
+def _token_docs(index: Dict, token: str) -> Set[int]:
+    docs = set()
+    for field, field_index in index['fields'].items():
+        if field in SUBSTRING_FIELDS and len(token) <= index['max_prefix_length']:
+            docs.update(decode_postings(field_index['prefixes'].get(token, [])))
+        else:
+            docs.update(_term_range_docs(field_index, token))
+    return docs
+
+
+def _substring_docs(index: Dict, query: str) -> Set[int]:
+    """Docs whose code or instructor string contains the normalized query."""
+    docs = set()
+    grams = trigrams(query)
+    for field in SUBSTRING_FIELDS:
+        field_grams = index['fields'][field]['trigrams']
+        if any(gram not in field_grams for gram in grams):
+            continue
+        candidates = None
+        for gram in sorted(grams, key=lambda g: len(field_grams[g])):
+            gram_docs = set(decode_postings(field_grams[gram]))
+            candidates = gram_docs if candidates is None else candidates & gram_docs
+            if not candidates:
+                break
+        strings = index['strings'][field]
+        docs.update(doc_id for doc_id in candidates or () if query in strings[doc_id])
+    return docs
+
+
+def search(index: Dict[str, Any], query: str) -> List[int]:
+    """
+    Doc ids (catalog order) of courses matching query.
+
+    A course matches if every query word is a prefix of some word of its code,
+    title, instructors or description, or if the whole normalized query
+    (3+ characters) occurs inside one of its codes or instructor names.
+    """
+    query = normalize(query)
+    if not query:
+        return list(range(len(index['docs'])))
+
+    matched = None
+    for token in query.split():
+        token_docs = _token_docs(index, token)
+        matched = token_docs if matched is None else matched & token_docs
+        if not matched:
+            break
+
+    if len(query) >= 3:
+        matched |= _substring_docs(index, query)
+    return sorted(matched)
+
+
+def linear_search_docs(courses: List[Dict]) -> List[Dict[str, Any]]:
+    """Per-course words and code/instructor strings, computed once like the frontend's lowercase copies."""
+    docs = []
+    for course in courses:
+        strings = field_strings(course)
+        words = set()
+        for field, values in strings.items():
+            words.update(field_terms(field, values))
+        docs.append({'words': words, 'substrings': [value for field in SUBSTRING_FIELDS for value in strings[field]]})
+    return docs
+
+
+def linear_search(docs: List[Dict[str, Any]], query: str) -> List[int]:
+    """The same matching rule as search(), by scanning every course (docs from linear_search_docs)."""
+    query = normalize(query)
+    if not query:
+        return list(range(len(docs)))
+    tokens = query.split()
+
+    matched = []
+    for doc_id, doc in enumerate(docs):
+        if all(any(word.startswith(token) for word in doc['words']) for token in tokens):
+            matched.append(doc_id)
+        elif len(query) >= 3 and any(query in value for value in doc['substrings']):
+            matched.append(doc_id)
+    return matched
+
+
+def sample_queries(courses: List[Dict], count: int = 200, seed: int = 0) -> List[str]:
+    """Queries of the kinds people type: codes, partial codes, instructor names, title words."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        course = rng.choice(courses)
+        codes = course_codes(course) or ['']
+        kind = rng.randrange(5)
+        if kind == 0:
+            queries.append(rng.choice(codes))
+        elif kind == 1:
+            code = rng.choice(codes)
+            queries.append(code[:rng.randint(1, max(1, len(code)))])
+        elif kind == 2:
+            names = course_instructors(course) or ['tba']
+            name = rng.choice(names)
+            queries.append(name[:rng.randint(2, max(2, len(name)))])
+        elif kind == 3:
+            words = (course.get('course_title') or '').split()
+            queries.append(' '.join(words[:rng.randint(1, max(1, len(words)))]))
+        else:
+            words = (course.get('description') or 'none').split()
+            queries.append(rng.choice(words))
+    return queries
+
+
+def verify_search(courses: List[Dict], index: Dict[str, Any], queries: List[str]) -> List[str]:
+    """Queries where search() and linear_search() disagree."""
+    index = json.loads(json.dumps(index))
+    docs = linear_search_docs(courses)
+    return [query for query in queries if search(index, query) != linear_search(docs, query)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the course search index from master_courses.json')
+    parser.add_argument('--input', default='results/master_courses.json', help='Merged course list')
+    parser.add_argument('--output', default='results/search_index.json', help='Search index output file')
+    parser.add_argument('--verify', action='store_true',
+                        help='Check sample queries against a linear scan and time both')
+    parser.add_argument('--queries', type=int, default=200, help='Number of sample queries for --verify')
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        courses = json.load(f)
+
+    start = time.time()
+    index = build_search_index(courses)
+    body = json.dumps(index, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    with open(args.output, 'wb') as f:
+        f.write(body)
+    print(f"Indexed {len(courses)} courses in {time.time() - start:.1f}s: {args.output} ({len(body) / 1e6:.2f} MB)")
+    for field, field_index in index['fields'].items():
+        extra = ''
+        if 'prefixes' in field_index:
+            extra = f", {len(field_index['prefixes'])} prefixes, {len(field_index['trigrams'])} trigrams"
+        print(f"  {field}: {len(field_index['terms'])} terms{extra}")
+
+    if args.verify:
+        queries = sample_queries(courses, args.queries)
+        mismatches = verify_search(courses, index, queries)
+
+        start = time.time()
+        for query in queries:
+            search(index, query)
+        indexed_time = (time.time() - start) / len(queries)
+        docs = linear_search_docs(courses)
+        start = time.time()
+        for query in queries:
+            linear_search(docs, query)
+        linear_time = (time.time() - start) / len(queries)
+
+        print(f"\n{len(queries)} queries: index {indexed_time * 1000:.2f} ms/query, "
+              f"linear scan {linear_time * 1000:.2f} ms/query")
+        if mismatches:
+            print(f"Mismatches ({len(mismatches)}): {mismatches[:10]}")
+            raise SystemExit(1)
+        print("All queries match the linear scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Section meeting times as minutes, week bitmasks and a per-day interval index.
+
+A section's week bitmask has one bit per 5-minute slot of the week (bit
+day * 288 + slot, days in DAYS order), so two sections conflict exactly when
+their masks share a bit. Masks are stored as sparse lists of [word index,
+32-bit word] pairs, so JavaScript can AND them with its 32-bit bitwise
+operators. The interval index lists, per day, every timed section sorted by
+start minute, for finding all sections that overlap a calendar.
+"""
+
+import argparse
+import bisect
+import json
+import random
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+TIME_INDEX_FORMAT = 'crimsoncal-section-times'
+TIME_INDEX_VERSION = 1
+
+DAYS = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WORD_BITS = 32
+
+_AMPM_RE = re.compile(r'(\d+):?(\d+)?\s*([ap])\.?m', re.IGNORECASE)
+_24H_RE = re.compile(r'(\d+):(\d+)')
+
+
+def parse_time(time_str: str) -> Optional[int]:
+    """Minutes since midnight of "10:30am", "1pm" or "13:30"; None if empty or unparseable."""
+    if not time_str:
+        return None
+    match = _AMPM_RE.search(time_str)
+    if match:
+        hour = int(match.group(1))
+        minute = int(match.group(2) or 0)
+        pm = match.group(3).lower() == 'p'
+        if pm and hour < 12:
+            hour += 12
+        elif not pm and hour == 12:
+            hour = 0
+    else:
+        match = _24H_RE.search(time_str)
+        if not match:
+            return None
+        hour, minute = int(match.group(1)), int(match.group(2))
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def section_days(section: Dict) -> int:
+    """Bitmask of meeting days (bit i = DAYS[i]) from the lecture_<day> flags, else the weekdays string."""
+    days = 0
+    has_flags = False
+    for i, day in enumerate(DAYS):
+        key = f'lecture_{day}'
+        if key in section:
+            has_flags = True
+            if section[key]:
+                days |= 1 << i
+    if not has_flags:
+        for name in (section.get('weekdays') or '').split(','):
+            name = name.strip().lower()
+            if name in DAYS:
+                days |= 1 << DAYS.index(name)
+    return days
+
+
+def section_minutes(section: Dict) -> Tuple[Optional[int], Optional[int]]:
+    """(start, end) in minutes since midnight, or (None, None) unless both parse and end > start."""
+    start = parse_time(section.get('start_time', ''))
+    end = parse_time(section.get('end_time', ''))
+    if start is None or end is None or end <= start:
+        return None, None
+    return start, end
+
+
+def week_mask(days: int, start: int, end: int) -> int:
+    """Bitmask of the 5-minute slots covered by [start, end) on each day in days; partial slots count."""
+    first_slot = start // SLOT_MINUTES
+    last_slot = -(-end // SLOT_MINUTES)
+    day_bits = ((1 << (last_slot - first_slot)) - 1) << first_slot
+    mask = 0
+    for i in range(len(DAYS)):
+        if days & (1 << i):
+            mask |= day_bits << (i * SLOTS_PER_DAY)
+    return mask
+
+
+def mask_words(mask: int) -> List[List[int]]:
+    """Sparse [word index, word] pairs of a week mask, nonzero words only."""
+    words = []
+    index = 0
+    while mask:
+        word = mask & ((1 << WORD_BITS) - 1)
+        if word:
+            words.append([index, word])
+        mask >>= WORD_BITS
+        index += 1
+    return words
+
+
+def words_mask(words: List[List[int]]) -> int:
+    mask = 0
+    for index, word in words:
+        mask |= word << (index * WORD_BITS)
+    return mask
+
+
+def words_conflict(a: List[List[int]], b: List[List[int]]) -> bool:
+    """Whether two sparse masks share a bit (merge join on word index)."""
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i][0] == b[j][0]:
+            if a[i][1] & b[j][1]:
+                return True
+            i += 1
+            j += 1
+        elif a[i][0] < b[j][0]:
+            i += 1
+        else:
+            j += 1
+    return False
+
+
+def build_time_index(courses: List[Dict]) -> Dict[str, Any]:
+    """
+    Build the week masks and interval index for every timed section of the merged courses.
+
+    sections[i] is [course_id, section]; masks[i] is its sparse week mask, and
+    intervals[day] holds parallel start/end/section arrays sorted by start.
+    """
+    sections = []
+    masks = []
+    intervals = {day: [] for day in DAYS}
+
+    for course in courses:
+        for section in course.get('current_sections') or []:
+            start, end = section_minutes(section)
+            days = section_days(section)
+            if start is None or not days:
+                continue
+            position = len(sections)
+            sections.append([course.get('course_id'), section.get('section')])
+            masks.append(mask_words(week_mask(days, start, end)))
+            for i, day in enumerate(DAYS):
+                if days & (1 << i):
+                    intervals[day].append((start, end, position))
+
+    interval_index = {}
+    for day, day_intervals in intervals.items():
+        day_intervals.sort()
+        interval_index[day] = {
+            'start': [start for start, _, _ in day_intervals],
+            'end': [end for _, end, _ in day_intervals],
+            'section': [position for _, _, position in day_intervals],
+        }
+
+    return {
+        'format': TIME_INDEX_FORMAT,
+        'version': TIME_INDEX_VERSION,
+        'days': DAYS,
+        'slot_minutes': SLOT_MINUTES,
+        'slots_per_day': SLOTS_PER_DAY,
+        'word_bits': WORD_BITS,
+        'sections': sections,
+        'masks': masks,
+        'intervals': interval_index,
+    }
+
+
+def overlapping_sections(index: Dict[str, Any], blocks: List[Tuple[str, int, int]]) -> List[int]:
+    """
+    Positions of sections overlapping any (day, start, end) block of a calendar.
+
+    Uses the interval index: per day, only sections starting before the block
+    ends are looked at, found by binary search on the sorted starts.
+    """
+    found = set()
+    for day, start, end in blocks:
+        day_index = index['intervals'][day]
+        stop = bisect.bisect_left(day_index['start'], end)
+        for i in range(stop):
+            if day_index['end'][i] > start:
+                found.add(day_index['section'][i])
+    return sorted(found)
+
+
+def calendar_words(blocks: List[Tuple[str, int, int]]) -> List[List[int]]:
+    """Sparse week mask of a calendar given as (day, start, end) blocks."""
+    mask = 0
+    for day, start, end in blocks:
+        mask |= week_mask(1 << DAYS.index(day), start, end)
+    return mask_words(mask)
+
+
+def verify_time_index(courses: List[Dict], index: Dict[str, Any], samples: int = 2000, seed: int = 0) -> List[str]:
+    """Check masks and the interval index against direct minute comparisons; returns the failures."""
+    rng = random.Random(seed)
+    timed = []
+    for course in courses:
+        for section in course.get('current_sections') or []:
+            start, end = section_minutes(section)
+            days = section_days(section)
+            if start is not None and days:
+                timed.append((days, start, end))
+
+    failures = []
+    if len(timed) != len(index['sections']):
+        failures.append(f"{len(index['sections'])} indexed sections, expected {len(timed)}")
+        return failures
+
+    def aligned(start, end):
+        return start % SLOT_MINUTES == 0 and end % SLOT_MINUTES == 0
+
+    for _ in range(min(samples, len(timed) ** 2)):
+        a, b = rng.randrange(len(timed)), rng.randrange(len(timed))
+        (days_a, start_a, end_a), (days_b, start_b, end_b) = timed[a], timed[b]
+        if not (aligned(start_a, end_a) and aligned(start_b, end_b)):
+            continue
+        expected = bool(days_a & days_b) and max(start_a, start_b) < min(end_a, end_b)
+        if words_conflict(index['masks'][a], index['masks'][b]) != expected:
+            failures.append(f"mask conflict of sections {a} and {b}")
+
+    for _ in range(min(samples // 20, len(timed))):
+        picked = rng.sample(range(len(timed)), min(3, len(timed)))
+        blocks = [
+            (DAYS[i], timed[p][1], timed[p][2]) for p in picked for i in range(len(DAYS)) if timed[p][0] & (1 << i)
+        ]
+        expected = sorted(
+            position for position, (days, start, end) in enumerate(timed)
+            if any(days & (1 << DAYS.index(day)) and max(start, s) < min(end, e) for day, s, e in blocks)
+        )
+        if overlapping_sections(index, blocks) != expected:
+            failures.append(f"interval index query for sections {picked}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build section week masks and the interval index')
+    parser.add_argument('--input', default='results/master_courses.json', help='Merged course list')
+    parser.add_argument('--output', default='results/section_times.json', help='Time index output file')
+    parser.add_argument('--verify', action='store_true', help='Check masks and the interval index against minute comparisons')
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        courses = json.load(f)
+
+    index = build_time_index(courses)
+    body = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    with open(args.output, 'wb') as f:
+        f.write(body)
+    print(f"Indexed {len(index['sections'])} timed sections: {args.output} ({len(body) / 1e6:.2f} MB)")
+
+    if args.verify:
+        failures = verify_time_index(courses, json.loads(body))
+        if failures:
+            print(f"Verification FAILED ({len(failures)}): {failures[:10]}")
+            raise SystemExit(1)
+        print("Masks and interval index match direct time comparisons")
+
+
+if __name__ == "__main__":
+    main()
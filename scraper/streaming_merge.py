@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Memory-bounded version of master_merge.py for large multi-term catalogs.
+
+master_merge.py holds every cleaned section, the analytics, the old master and
+the merged output in memory at once. This script instead:
+- streams records out of the cleaned files (JSON arrays through an incremental
+  parser, or .jsonl)
+- spills sections and analytics to an on-disk SQLite file and groups by
+  course_id there
+- looks fallback locations up one section at a time in the location store
+- writes each merged course as soon as it is built, in the same byte format
+  as master_merge.py
+
+Peak memory is set by the largest single course, not the whole catalog. The
+search, time and columnar outputs need the full catalog and are left to
+master_merge.py.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sqlite3
+import tempfile
+import time
+from glob import glob
+from typing import Any, Dict, Iterator, List, Tuple
+
+from location_store import DEFAULT_LOCATION_DB, current_run_id
+from master_merge import (MASTER_FILE, build_timestamp, generate_summary_stats, merge_course, open_location_store,
+                          remove_unwritten_outputs)
+
+CHUNK_SIZE = 1 << 20
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array, or (key, value) pairs of a
+    top-level object, without loading the whole file. .jsonl files yield one
+    value per line.
+    """
+    if path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def skip(chars):
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                fill()
+
+        def decode():
+            # A value that ends exactly at the end of the buffer may be cut short (e.g. a number)
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    if end < len(buffer) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        skip(_WHITESPACE)
+        if pos >= len(buffer) or buffer[pos] not in '[{':
+            raise ValueError(f"{path}: expected a JSON array or object")
+        is_object = buffer[pos] == '{'
+        closing = '}' if is_object else ']'
+        pos += 1
+
+        while True:
+            skip(_WHITESPACE + ',')
+            if pos >= len(buffer):
+                raise ValueError(f"{path}: unexpected end of file")
+            if buffer[pos] == closing:
+                return
+            if is_object:
+                key = decode()
+                skip(_WHITESPACE + ':')
+                yield key, decode()
+            else:
+                yield decode()
+
+
+class SpillStore:
+    """On-disk staging of section records and analytics, grouped by course_id in SQLite."""
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, 'merge_spill.sqlite')
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript('''
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            PRAGMA cache_size = -16000;
+            CREATE TABLE courses (course_id TEXT PRIMARY KEY, first_seq INTEGER, course_code TEXT);
+            CREATE TABLE sections (course_id TEXT, seq INTEGER, data TEXT);
+            CREATE TABLE analytics (course_id TEXT PRIMARY KEY, data TEXT);
+            CREATE TABLE locations (course_id TEXT, section TEXT, location TEXT);
+        ''')
+        self.sections = 0
+
+    def add_sections(self, records: Iterator[Dict], batch_size: int = 5000):
+        batch = []
+        for record in records:
+            course_id = record.get('course_id')
+            if not course_id:
+                continue
+            batch.append((course_id, self.sections, record))
+            self.sections += 1
+            if len(batch) >= batch_size:
+                self._insert_sections(batch)
+                batch = []
+        if batch:
+            self._insert_sections(batch)
+
+    def _insert_sections(self, batch):
+        # The first section seen of a course gives its position and course_code, as in merge_data
+        self.db.executemany(
+            'INSERT OR IGNORE INTO courses VALUES (?, ?, ?)',
+            [(course_id, seq, record.get('subject_catalog', 'UNKNOWN')) for course_id, seq, record in batch],
+        )
+        self.db.executemany(
+            'INSERT INTO sections VALUES (?, ?, ?)',
+            [(course_id, seq, json.dumps(record, ensure_ascii=False)) for course_id, seq, record in batch],
+        )
+        self.db.executemany(
+            'INSERT INTO locations VALUES (?, ?, ?)',
+            [(course_id, record.get('section', 'default'), record['location'])
+             for course_id, _, record in batch if record.get('location')],
+        )
+
+    def add_analytics(self, items: Iterator[Tuple[str, Any]], batch_size: int = 2000):
+        batch = []
+        for course_id, data in items:
+            batch.append((course_id, json.dumps(data, ensure_ascii=False)))
+            if len(batch) >= batch_size:
+                self.db.executemany('INSERT OR REPLACE INTO analytics VALUES (?, ?)', batch)
+                batch = []
+        if batch:
+            self.db.executemany('INSERT OR REPLACE INTO analytics VALUES (?, ?)', batch)
+
+    def scraped_locations(self) -> Iterator[Tuple[str, str, str]]:
+        """(course_id, section, location) of every section scraped with a location, in input order."""
+        return self.db.execute('SELECT course_id, section, location FROM locations ORDER BY rowid')
+
+    def course_count(self) -> int:
+        return self.db.execute('SELECT COUNT(*) FROM courses').fetchone()[0]
+
+    def grouped(self) -> Iterator[Tuple[str, List[Dict], Any]]:
+        """
+        (course_id, sections, analytics or None) in output order: by course_code,
+        ties in first-seen order, like merge_data's stable sort.
+        """
+        self.db.execute('CREATE INDEX sections_by_course ON sections (course_id, seq)')
+        rows = self.db.execute('''
+            SELECT c.course_id, s.data, a.data
+            FROM courses c
+            JOIN sections s ON s.course_id = c.course_id
+            LEFT JOIN analytics a ON a.course_id = c.course_id
+            ORDER BY c.course_code, c.first_seq, s.seq
+        ''')
+        current_id = None
+        sections = []
+        analytics = None
+        for course_id, section_json, analytics_json in rows:
+            if course_id != current_id:
+                if current_id is not None:
+                    yield current_id, sections, analytics
+                current_id = course_id
+                sections = []
+                analytics = json.loads(analytics_json) if analytics_json is not None else None
+            sections.append(json.loads(section_json))
+        if current_id is not None:
+            yield current_id, sections, analytics
+
+    def close(self):
+        self.db.close()
+
+
+def summary_stub(entry: Dict) -> Dict:
+    """The fields generate_summary_stats reads, without the heavy ones."""
+    return {
+        'course_code': entry['course_code'],
+        'course_title': entry['course_title'],
+        'latest_course_rating': entry.get('latest_course_rating', 0),
+        'latest_hours_per_week': entry.get('latest_hours_per_week', 0),
+        'historical_semesters': bool(entry.get('historical_semesters')),
+        'current_sections': [None] * len(entry.get('current_sections', [])),
+    }
+
+
+def write_entry(f, entry: Dict, first: bool):
+    """Write one list element exactly as json.dump(list, indent=2, ensure_ascii=False) would."""
+    body = json.dumps(entry, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+    f.write(('[\n  ' if first else ',\n  ') + body)
+
+
+def peak_memory_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if os.uname().sysname == 'Darwin' else peak / 1024
+
+
+def streaming_merge(cleaned_files: List[str], analytics_file: str, output_file: str,
+                    location_db: str = DEFAULT_LOCATION_DB, spill_dir: str = None) -> Dict[str, Any]:
+    """
+    Merge like master_merge.merge_data, streaming inputs and output.
+
+    Returns:
+        Report with course/section counts, locations preserved, summary stats and stage timings
+    """
+    timings = {}
+    start = time.time()
+    old_locations = open_location_store(location_db)
+    timings['old_locations'] = time.time() - start
+
+    work_dir = tempfile.mkdtemp(prefix='merge_spill_', dir=spill_dir)
+    store = SpillStore(work_dir)
+    try:
+        start = time.time()
+        for path in cleaned_files:
+            before = store.sections
+            store.add_sections(iter_json(path))
+            print(f"  Streamed {store.sections - before} sections from {path}")
+        timings['spill_sections'] = time.time() - start
+
+        start = time.time()
+        if os.path.exists(analytics_file):
+            store.add_analytics(iter_json(analytics_file))
+        store.db.commit()
+        timings['spill_analytics'] = time.time() - start
+
+        start = time.time()
+        stubs = []
+        locations_preserved = 0
+        tmp_output = output_file + '.tmp'
+        with open(tmp_output, 'w', encoding='utf-8') as f:
+            for course_id, sections, analytics_data in store.grouped():
+                analytics = {course_id: analytics_data} if analytics_data is not None else {}
+                entry, preserved = merge_course(course_id, sections, analytics, old_locations)
+                locations_preserved += preserved
+                write_entry(f, entry, not stubs)
+                stubs.append(summary_stub(entry))
+            f.write('\n]' if stubs else '[]')
+        os.replace(tmp_output, output_file)
+        timings['merge_and_write'] = time.time() - start
+
+        start = time.time()
+        recorded = old_locations.record(store.scraped_locations(), current_run_id())
+        timings['record_locations'] = time.time() - start
+    finally:
+        old_locations.close()
+        store.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'courses': len(stubs),
+        'sections': store.sections,
+        'locations_preserved': locations_preserved,
+        'locations_recorded': recorded,
+        'stats': generate_summary_stats(stubs),
+        'timings': {name: round(seconds, 3) for name, seconds in timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge scraped courses with Q guide analytics in bounded memory')
+    parser.add_argument('--output', default=MASTER_FILE, help=f'Merged output (default: {MASTER_FILE})')
+    parser.add_argument('--spill-dir', help='Directory for the temporary on-disk spill (default: system temp)')
+    args = parser.parse_args()
+
+    cleaned_files = sorted(glob('results/cleaned_*.json') + glob('results/cleaned_*.jsonl'))
+    if not cleaned_files and os.path.exists('results/all_courses_cleaned.json'):
+        cleaned_files = ['results/all_courses_cleaned.json']
+    if not cleaned_files:
+        print("Failed to load any course data")
+        return
+
+    if os.path.abspath(args.output) == os.path.abspath(MASTER_FILE):
+        # None of the optional outputs are built here
+        for path in remove_unwritten_outputs(set()):
+            print(f"Removing {path} (not written by this run)")
+
+    print("Streaming merge (keeping only currently offered courses)...")
+    report = streaming_merge(cleaned_files, 'qguide/results/course_analytics.json', args.output,
+                             spill_dir=args.spill_dir)
+
+    timestamp_file = 'results/last_updated.json'
+    with open(timestamp_file, 'w', encoding='utf-8') as f:
+        json.dump(build_timestamp(), f, indent=2)
+
+    stats = report['stats']
+    print(f"\nSaved {report['courses']} courses ({report['sections']} sections) to {args.output}")
+    print(f"Courses with Q guide analytics: {stats['courses_with_analytics']}")
+    print(f"Average rating (where available): {stats['avg_rating']}/5.0")
+    if report['locations_preserved'] > 0:
+        print(f"Locations preserved from old data: {report['locations_preserved']}")
+    print(f"Recorded {report['locations_recorded']} scraped locations in {DEFAULT_LOCATION_DB}")
+    print("Timings: " + ', '.join(f"{name} {seconds:.2f}s" for name, seconds in report['timings'].items()))
+    print(f"Peak memory: {peak_memory_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Shared fixtures: a small synthetic term of cleaned sections, its analytics and merged catalog."""
+
+import json
+import os
+import random
+import sys
+
+import pytest
+
+# The scraper modules import each other as top-level modules, as when run from scraper/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from master_merge import merge_data  # noqa: E402
+
+DEPARTMENTS = ['Computer Science', 'Economics', 'Mathematics', 'History', 'Physics']
+TIMES = [('9:00am', '10:15am'), ('10:30am', '11:45am'), ('12:00pm', '1:15pm'), ('1:30pm', '2:45pm'), ('', '')]
+PATTERNS = [('monday', 'wednesday'), ('tuesday', 'thursday'), ('friday',), ()]
+DAYS = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+
+
+def make_sections(num_courses: int = 60, seed: int = 0):
+    """Cleaned section records (the shape clean_subject_catalog.py writes) for num_courses courses."""
+    rng = random.Random(seed)
+    sections = []
+    for i in range(num_courses):
+        department = DEPARTMENTS[i % len(DEPARTMENTS)]
+        components = ['Lecture'] + ['Section'] * rng.randint(0, 3) + ['Laboratory'] * rng.randint(0, 1)
+        for j, component in enumerate(components):
+            start_time, end_time = rng.choice(TIMES)
+            pattern = rng.choice(PATTERNS) if start_time else ()
+            sections.append({
+                'course_id': str(100000 + i),
+                'subject_catalog': f"{department[:4].upper()} {i}",
+                'course_title': f"Topics in {department} {i}",
+                'section': f"{j + 1:03d}",
+                'instructors': f"Professor {rng.randint(1, 40)}",
+                'enrollment': str(rng.randint(0, 200)),
+                'class_number': str(5000 + i * 10 + j),
+                'instruction_mode': rng.choice(['In Person', 'Online']),
+                'course_component': component,
+                'start_time': start_time,
+                'end_time': end_time,
+                'weekdays': '',
+                'location': rng.choice(['', f"Science Center {rng.randint(100, 400)}"]),
+                'grading_basis': rng.choice(['Graded', 'SAT/UNS']),
+                **{f'lecture_{day}': day in pattern for day in DAYS},
+                'description': f"An introduction to topic {i}. " * rng.randint(1, 4),
+                'notes': rng.choice(['', 'Enrollment cap of 12.']),
+                'school': 'Faculty of Arts & Sciences',
+                'department': department,
+                'credits': '4',
+                'year_term': '2026 Fall',
+            })
+    return sections
+
+
+def make_analytics(sections, seed: int = 0):
+    """course_analytics.json for two thirds of the courses in sections."""
+    rng = random.Random(seed)
+    analytics = {}
+    for course_id in sorted({section['course_id'] for section in sections}):
+        if int(course_id) % 3 == 0:
+            continue
+        analytics[course_id] = {
+            'latest_course_rating': round(rng.uniform(3, 5), 2),
+            'latest_hours_per_week': round(rng.uniform(2, 15), 2),
+            'latest_num_students': rng.randint(5, 300),
+            'latest_semester': '2025 Fall',
+            'semesters': {'2025 Fall': {'course_rating': round(rng.uniform(3, 5), 2), 'hours_per_week': 6.5}},
+            'all_course_codes': [f"OLD {course_id}"],
+            'all_course_titles': [f"Old title {course_id}"],
+        }
+    return analytics
+
+
+@pytest.fixture
+def sections():
+    return make_sections()
+
+
+@pytest.fixture
+def analytics(sections):
+    return make_analytics(sections)
+
+
+@pytest.fixture
+def catalog(sections, analytics):
+    """A merged master_courses.json catalog."""
+    return merge_data(sections, analytics)[0]
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch, sections, analytics):
+    """
+    A scratch scraper/ directory (the working directory for the test) with
+    results/cleaned_fall2026.json and qguide/results/course_analytics.json.
+    """
+    root = tmp_path / 'scraper'
+    (root / 'results').mkdir(parents=True)
+    (root / 'qguide' / 'results').mkdir(parents=True)
+    (root / 'results' / 'cleaned_fall2026.json').write_text(json.dumps(sections), encoding='utf-8')
+    (root / 'qguide' / 'results' / 'course_analytics.json').write_text(json.dumps(analytics), encoding='utf-8')
+    monkeypatch.chdir(root)
+    return root
+
+
+@pytest.fixture
+def run_merge(workspace, monkeypatch):
+    """Run master_merge.py in the workspace with the given command-line options."""
+    import master_merge
+
+    def run(*options):
+        monkeypatch.setattr(sys, 'argv', ['master_merge.py', *options])
+        master_merge.main()
+
+    return run
@@ -0,0 +1,112 @@
+"""Catalog deltas (catalog_deltas.py): every delta applied to its base reproduces the new catalog byte for byte."""
+
+import copy
+import json
+
+import pytest
+
+from catalog_deltas import HISTORY_FILE, apply_delta, compute_delta, minified, record_version, version_of
+
+
+def change_enrollment(courses):
+    courses[0]['current_sections'][0]['enrollment'] = '999'
+
+
+def change_course_fields(courses):
+    courses[1]['course_title'] = 'Renamed'
+    courses[2]['latest_course_rating'] = None
+
+
+def remove_and_add_courses(courses):
+    new = copy.deepcopy(courses[3])
+    new['course_id'] = '999999'
+    del courses[5]
+    courses.insert(4, new)
+    courses.append(dict(new, course_id='999998'))
+
+
+def reorder_courses(courses):
+    courses[0], courses[-1] = courses[-1], courses[0]
+
+
+def restructure_sections(courses):
+    sections = courses[0]['current_sections']
+    sections.append(dict(sections[0], section='099', enrollment='0'))
+    courses[1]['current_sections'] = courses[1]['current_sections'][1:]
+    courses[2]['current_sections'].reverse()
+
+
+def reorder_fields(courses):
+    # Equal as dicts, but not as published bytes
+    courses[0] = dict(reversed(list(courses[0].items())))
+    section = courses[1]['current_sections'][0]
+    courses[1]['current_sections'][0] = dict(reversed(list(section.items())))
+    # and deeper down, in a field that is otherwise unchanged
+    semesters = courses[2]['historical_semesters']
+    courses[2]['historical_semesters'] = {term: dict(reversed(list(data.items()))) for term, data in semesters.items()}
+
+
+def repeat_section_ids(courses):
+    sections = courses[0]['current_sections']
+    sections.append(dict(sections[0]))
+
+
+EDITS = [change_enrollment, change_course_fields, remove_and_add_courses, reorder_courses,
+         restructure_sections, reorder_fields, repeat_section_ids]
+
+
+def edited(courses, *edits):
+    courses = copy.deepcopy(courses)
+    for edit in edits:
+        edit(courses)
+    return courses
+
+
+@pytest.mark.parametrize('edit', EDITS, ids=lambda edit: edit.__name__)
+def test_delta_reproduces_edited_catalog(catalog, edit):
+    new = edited(catalog, edit)
+    old_body = minified(catalog)
+    new_body = minified(new)
+    assert old_body != new_body
+
+    delta = compute_delta(catalog, new, version_of(old_body), version_of(new_body))
+    result = apply_delta(json.loads(old_body), json.loads(minified(delta)))
+    assert minified(result) == new_body
+    # The base catalog is left as it was
+    assert minified(catalog) == old_body
+
+
+def test_every_recorded_delta_applies_to_its_base(catalog, tmp_path):
+    history_dir = tmp_path / 'versions'
+    delta_dir = tmp_path / 'deltas'
+    versions = [edited(catalog, *EDITS[:i]) for i in range(1, len(EDITS) + 1)]
+
+    # The seed stands in for the published catalog: the first run already has a delta from it
+    manifest = record_version(versions[0], keep=3, seed=catalog,
+                              history_dir=str(history_dir), delta_dir=str(delta_dir))
+    assert list(manifest['deltas']) == [version_of(minified(catalog))]
+
+    for courses in versions[1:]:
+        manifest = record_version(courses, keep=3, history_dir=str(history_dir), delta_dir=str(delta_dir))
+        new_body = minified(courses)
+        assert manifest['latest'] == version_of(new_body)
+        # A delta from every kept version, none skipped
+        assert len(manifest['deltas']) == len(json.loads((history_dir / HISTORY_FILE).read_text())) - 1
+        for base_version, entry in manifest['deltas'].items():
+            base = json.loads((history_dir / f"{base_version}.json").read_bytes())
+            delta_body = (delta_dir / entry['path']).read_bytes()
+            assert entry['bytes'] == len(delta_body)
+            assert minified(apply_delta(base, json.loads(delta_body))) == new_body
+        # Only the deltas to the newest version are left
+        assert sorted(p.name for p in delta_dir.iterdir()) == sorted(
+            ['manifest.json'] + [entry['path'] for entry in manifest['deltas'].values()])
+
+
+def test_merge_without_deltas_removes_old_deltas(run_merge, workspace):
+    run_merge('--deltas', '2')
+    assert (workspace / 'results' / 'deltas' / 'manifest.json').exists()
+
+    run_merge()
+    assert not (workspace / 'results' / 'deltas').exists()
+    # The version history is kept for the next --deltas run
+    assert (workspace / 'results' / 'versions' / HISTORY_FILE).exists()
@@ -0,0 +1,65 @@
+"""The columnar encoding (catalog_encoding.py) decodes back to exactly the master catalog."""
+
+import json
+
+import pytest
+
+from catalog_encoding import decode_catalog, encode_catalog, minified
+
+
+def round_trip(courses):
+    return decode_catalog(json.loads(minified(encode_catalog(courses))))
+
+
+def test_decoded_catalog_equals_master(catalog):
+    decoded = round_trip(catalog)
+    assert decoded == catalog
+    # Same key order too, so the published JSON is byte-identical
+    assert minified(decoded) == minified(catalog)
+
+
+def test_round_trip_keeps_irregular_sections(catalog):
+    course = catalog[0]
+    sections = course['current_sections']
+    # No weekday flags at all, only some of them, and values of unusual types
+    no_flags = {key: value for key, value in sections[0].items() if not key.startswith('lecture_')}
+    some_flags = dict(sections[0])
+    some_flags.pop('lecture_saturday')
+    some_flags.pop('lecture_sunday')
+    course['current_sections'] = [no_flags, some_flags, dict(sections[0], enrollment=17, start_minutes=None)]
+    catalog[1]['current_sections'] = []
+    catalog[2]['historical_semesters'] = {}
+
+    assert minified(round_trip(catalog)) == minified(catalog)
+
+
+def test_round_trip_of_empty_catalog():
+    assert round_trip([]) == []
+
+
+def test_master_merge_columnar_output_decodes_to_master(run_merge, workspace):
+    run_merge('--columnar')
+
+    with open(workspace / 'results' / 'master_courses.json', encoding='utf-8') as f:
+        master = json.load(f)
+    with open(workspace / 'results' / 'master_courses.columnar.json', encoding='utf-8') as f:
+        encoded = json.load(f)
+    assert minified(decode_catalog(encoded)) == minified(master)
+
+
+def test_merge_without_columnar_removes_old_encoding(run_merge, workspace):
+    run_merge('--columnar')
+    run_merge()
+
+    assert not (workspace / 'results' / 'master_courses.columnar.json').exists()
+
+
+def test_failed_round_trip_fails_the_merge_before_writing(run_merge, workspace, monkeypatch):
+    import master_merge
+    monkeypatch.setattr(master_merge, 'verify_round_trip', lambda courses, encoded: False)
+
+    with pytest.raises(SystemExit) as exit_info:
+        run_merge('--columnar')
+    assert exit_info.value.code == 1
+    assert not (workspace / 'results' / 'master_courses.json').exists()
+    assert not (workspace / 'results' / 'last_updated.json').exists()
@@ -0,0 +1,101 @@
+"""Schedule enumeration and ranking (schedule_generator.py) against hand-checked wishlists and brute force."""
+
+import itertools
+
+from schedule_generator import (ScheduleSearch, brute_force_count, build_groups, format_minutes, generate_schedules,
+                                section_mask, synthetic_catalog)
+from section_times import DAYS
+
+
+def section(number, component, days, start, end):
+    result = {
+        'section': number,
+        'course_component': component,
+        'start_time': format_minutes(start),
+        'end_time': format_minutes(end),
+    }
+    for day in DAYS:
+        result[f'lecture_{day}'] = day in days
+    return result
+
+
+def course(course_id, sections, hours=5.0):
+    return {'course_id': course_id, 'course_code': course_id, 'latest_hours_per_week': hours,
+            'current_sections': sections}
+
+
+MW = ('monday', 'wednesday')
+TTH = ('tuesday', 'thursday')
+
+# A: lecture MW 9-10:15 plus a Monday or a Friday section; B: MW 9-10:15 (clashes with A) or TTh 9-10:15;
+# C: one time-less section, and two sections at the same Tuesday time (interchangeable)
+WISHLIST = [
+    course('A', [section('001', 'Lecture', MW, 540, 615), section('101', 'Section', ('monday',), 720, 780),
+                 section('102', 'Section', ('friday',), 540, 600)], hours=10),
+    course('B', [section('001', 'Lecture', MW, 540, 615), section('002', 'Lecture', TTH, 540, 615)], hours=4),
+    course('C', [section('001', 'Lecture', ('tuesday',), 660, 720), section('002', 'Lecture', ('tuesday',), 660, 720),
+                 {'section': '003', 'course_component': 'Lecture', 'start_time': '', 'end_time': ''}], hours=2),
+]
+
+
+def section_schedules(search):
+    """Expand option-level schedules into section-level ones."""
+    return [combo for options in search.schedules() for combo in itertools.product(*(o.sections for o in options))]
+
+
+def test_enumerates_exactly_the_conflict_free_schedules():
+    search = ScheduleSearch(build_groups(WISHLIST))
+    schedules = section_schedules(search)
+
+    # B must take its TTh lecture; A has 2 sections; C has 3 sections (two share a time)
+    assert len(schedules) == 2 * 3
+    assert search.count() == brute_force_count(WISHLIST) == 6
+    assert search.count(by_section=False) == 2 * 2
+    for combo in schedules:
+        masks = [section_mask(s) for s in combo]
+        assert all(not (a & b) for a, b in itertools.combinations(masks, 2))
+        assert WISHLIST[1]['current_sections'][1] in combo
+
+
+def test_no_schedules_when_a_component_always_clashes():
+    clash = course('D', [section('001', 'Lecture', MW, 570, 630)])
+    search = ScheduleSearch(build_groups([WISHLIST[0], clash]))
+    assert list(search.schedules()) == []
+    assert search.count() == brute_force_count([WISHLIST[0], clash]) == 0
+
+
+def test_counts_match_brute_force_on_generated_courses():
+    catalog = synthetic_catalog(6, 3, seed=1)
+    for subset in itertools.combinations(catalog, 3):
+        search = ScheduleSearch(build_groups(subset))
+        assert search.count() == brute_force_count(subset) == len(section_schedules(search))
+
+
+def test_ranking_prefers_fewer_days_then_fewer_gaps():
+    results, total = generate_schedules(WISHLIST, criteria=('days', 'gaps'), top=10, count=True)
+    assert total == 6
+    assert len(results) == 4
+    # The Friday section adds a day, so the Monday one wins despite its gap after the lecture;
+    # C's time-less section avoids a Tuesday gap
+    best = results[0]
+    assert (best['scores']['days'], best['scores']['gaps']) == (4, 105)
+    assert [s['section'] for o in best['options'] for s in o.sections if s['course_component'] == 'Section'] == ['101']
+    scores = [(r['scores']['days'], r['scores']['gaps']) for r in results]
+    assert scores == sorted(scores)
+
+
+def test_choose_picks_the_best_course_combination():
+    results, _ = generate_schedules(WISHLIST, choose=2, criteria=('workload', 'days'), top=3)
+    assert [c['course_id'] for c in results[0]['courses']] == ['B', 'C']
+    assert results[0]['scores']['workload'] == 6
+    assert results[0]['scores']['days'] == 2
+    assert len(results) == 3
+
+
+def test_bounded_ranking_matches_exhaustive_ranking():
+    catalog = synthetic_catalog(7, 4, seed=2)
+    for criteria in (('workload', 'days', 'gaps'), ('days', 'end'), ('gaps', 'start')):
+        bounded, _ = generate_schedules(catalog, 3, criteria, top=5)
+        exhaustive, _ = generate_schedules(catalog, 3, criteria, top=5, bound=False)
+        assert bounded
+        assert [r['scores'] for r in bounded] == [r['scores'] for r in exhaustive]